@@ -0,0 +1,205 @@
+# attendance/artifacts.py
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
+
+from .models import Attendance, AttendanceReport
+
+logger = logging.getLogger(__name__)
+
+# A render claimed longer ago than this many seconds was lost with its process and may be taken over
+PENDING_TIMEOUT = getattr(settings, 'ATTENDANCE_REPORT_PENDING_TIMEOUT', 300)
+
+CONTENT_TYPES = {
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+}
+
+
+def report_range(period, start_date=None, end_date=None, today=None):
+    """(start, end) dates a report covers; daily, weekly and monthly reports run up to today"""
+    today = today or timezone.now().date()
+    if period == 'daily':
+        return today, today
+    if period == 'weekly':
+        return today - timedelta(days=today.weekday()), today
+    if period == 'monthly':
+        return today.replace(day=1), today
+
+    start_date = parse_date(start_date) if isinstance(start_date, str) else start_date
+    end_date = parse_date(end_date) if isinstance(end_date, str) else end_date
+    if not start_date or not end_date:
+        raise ValueError('start_date and end_date are required for a custom period')
+    if start_date > end_date:
+        raise ValueError('start_date must not be after end_date')
+    return start_date, end_date
+
+
+def data_version(course_id, start_date, end_date):
+    """
+    Fingerprint of a course's attendance in a date range.
+
+    Every write stamps Attendance.updated_at with the server's clock, so
+    the latest stamp moves on any create or update, even one carrying an
+    old client recorded_at; the row count catches deletions, which leave no
+    stamp behind.
+    """
+    stats = Attendance.objects.filter(course_id=course_id, date__range=(start_date, end_date)).aggregate(
+        latest=Max('updated_at'), rows=Count('id')
+    )
+    latest = stats['latest'].isoformat() if stats['latest'] else 'none'
+    return f"{latest}:{stats['rows']}"
+
+
+def _stored(course, period, start_date, end_date, format_type, version):
+    """The ready or pending report row for a data version, or None"""
+    report = AttendanceReport.objects.filter(
+        course=course, period=period, start_date=start_date, end_date=end_date,
+        format=format_type, data_version=version
+    ).first()
+    if report is not None and report.status == 'ready' and not report.file.storage.exists(report.file.name):
+        # The file was removed from disk; render it again
+        report.delete()
+        return None
+    return report
+
+
+def claim_expired(report):
+    """Whether a pending report's render was claimed too long ago to still be running"""
+    return report.status == 'pending' and timezone.now() - report.created_at > timedelta(seconds=PENDING_TIMEOUT)
+
+
+def _delete_files(storage, names):
+    for name in names:
+        try:
+            storage.delete(name)
+        except OSError as e:
+            logger.error(f"Error deleting attendance report file {name}: {str(e)}")
+
+
+def _file_digest(content):
+    """(sha256 hex digest, size) of a File, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in content.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    content.seek(0)
+    return digest.hexdigest(), size
+
+
+def _claim(course, period, start_date, end_date, format_type, version, user):
+    """A pending row for the data version, or None when another request holds one"""
+    try:
+        with transaction.atomic():
+            return AttendanceReport.objects.create(
+                course=course,
+                period=period,
+                start_date=start_date,
+                end_date=end_date,
+                format=format_type,
+                data_version=version,
+                status='pending',
+                generated_by=user
+            )
+    except IntegrityError:
+        return None
+
+
+def _render_claimed(report, render):
+    """Render into a claimed row and mark it ready; None when the claim was taken over meanwhile"""
+    try:
+        content, file_name = render(report.start_date, report.end_date)
+        content = ContentFile(content) if isinstance(content, bytes) else File(content)
+        try:
+            report.etag, report.size = _file_digest(content)
+            report.file.save(file_name, content, save=False)
+        finally:
+            content.close()
+    except BaseException:
+        AttendanceReport.objects.filter(pk=report.pk, status='pending').delete()
+        raise
+
+    report.file_name = file_name
+    report.status = 'ready'
+    updated = AttendanceReport.objects.filter(pk=report.pk, status='pending').update(
+        file=report.file.name, file_name=file_name, etag=report.etag, size=report.size, status='ready'
+    )
+    if not updated:
+        _delete_files(report.file.storage, [report.file.name])
+        return None
+
+    superseded = AttendanceReport.objects.filter(
+        course_id=report.course_id, period=report.period, start_date=report.start_date,
+        end_date=report.end_date, format=report.format, status='ready'
+    ).exclude(pk=report.pk)
+    names = list(superseded.values_list('file', flat=True))
+    superseded.delete()
+    storage = report.file.storage
+    transaction.on_commit(lambda: _delete_files(storage, names))
+    return report
+
+
+def get_report(course, period, start_date, end_date, format_type, render, user=None):
+    """
+    The stored report for the current attendance data, rendering it when there is none.
+
+    `render(start_date, end_date)` returns (file bytes or a file object
+    positioned at the start, file name); a file object is copied to storage
+    in chunks and closed. It runs at most once per data version: the first
+    request claims the render by committing a pending row, which the unique
+    constraint makes the only one, then renders outside any transaction so
+    no database lock is held meanwhile. Other requests get the pending row
+    back at once, for the caller to answer 202 and the client to poll; a
+    claim older than PENDING_TIMEOUT is taken over instead. Reports for
+    older versions of the same range are deleted once replaced. Returns
+    (report, created); report.status is 'pending' when another request is
+    still rendering it.
+    """
+    while True:
+        version = data_version(course.id, start_date, end_date)
+        report = _stored(course, period, start_date, end_date, format_type, version)
+        if report is not None and report.status == 'ready':
+            return report, False
+
+        if report is not None and claim_expired(report):
+            logger.warning(f"Taking over attendance report render {report.id} for course {course.id}")
+            AttendanceReport.objects.filter(pk=report.pk, status='pending').delete()
+            report = None
+
+        if report is not None:
+            return report, False
+
+        claim = _claim(course, period, start_date, end_date, format_type, version, user)
+        if claim is not None:
+            report = _render_claimed(claim, render)
+            if report is not None:
+                return report, True
+
+
+def report_response(request, report):
+    """The report file as an attachment with its ETag; 304 when the client already has it"""
+    etag = f'"{report.etag}"'
+    client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in client_etags or '*' in client_etags:
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            report.file.open('rb'),
+            as_attachment=True,
+            filename=report.file_name,
+            content_type=CONTENT_TYPES[report.format]
+        )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    response['X-Report-Id'] = str(report.id)
+    return response
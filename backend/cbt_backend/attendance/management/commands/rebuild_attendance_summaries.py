@@ -0,0 +1,50 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.summaries import (
+    courses_with_attendance, rebuild_student_summaries, rebuild_summaries, verify_student_summaries, verify_summaries
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount daily attendance summaries for a date range, and the per-student course totals of every '
+        'course with attendance in it, or only report the ones that are off'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', required=True, help='First date, YYYY-MM-DD')
+        parser.add_argument('--end', help='Last date, YYYY-MM-DD (defaults to --start)')
+        parser.add_argument('--course', type=int, action='append', dest='courses', help='Limit to a course id; repeatable')
+        parser.add_argument('--verify', action='store_true', help='Report mismatched summaries without changing them')
+
+    def handle(self, *args, **options):
+        try:
+            start_date = date.fromisoformat(options['start'])
+            end_date = date.fromisoformat(options['end']) if options['end'] else start_date
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+        if end_date < start_date:
+            raise CommandError('--end is before --start')
+
+        course_ids = courses_with_attendance(start_date, end_date, options['courses'])
+
+        if options['verify']:
+            mismatches = verify_summaries(start_date, end_date, options['courses'])
+            for course_id, summary_date, stored, expected in mismatches:
+                self.stdout.write(f'course {course_id} on {summary_date}: stored {stored}, expected {expected}')
+            for course_id in course_ids:
+                student_mismatches = verify_student_summaries(course_id)
+                for student_id, stored, expected in student_mismatches:
+                    self.stdout.write(f'course {course_id}, student {student_id}: stored {stored}, expected {expected}')
+                mismatches += student_mismatches
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} summaries do not match their attendance records')
+            self.stdout.write(self.style.SUCCESS('All summaries match their attendance records'))
+            return
+
+        written, deleted = rebuild_summaries(start_date, end_date, options['courses'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} summaries, removed {deleted} without attendance'))
+        students = sum(rebuild_student_summaries(course_id) for course_id in course_ids)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {students} student totals in {len(course_ids)} courses'))
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def backfill_student_summaries(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    StudentAttendanceSummary = apps.get_model('attendance', 'StudentAttendanceSummary')
+    rows = Attendance.objects.order_by().values('student_id', 'course_id').annotate(
+        total=Count('id'),
+        present=Count('id', filter=Q(status='present')),
+        absent=Count('id', filter=Q(status='absent')),
+        late=Count('id', filter=Q(status='late')),
+        last_date=Max('date'),
+    )
+    StudentAttendanceSummary.objects.bulk_create([
+        StudentAttendanceSummary(
+            student_id=row['student_id'],
+            course_id=row['course_id'],
+            total_classes=row['total'],
+            present_count=row['present'],
+            absent_count=row['absent'],
+            late_count=row['late'],
+            last_date=row['last_date'],
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+        ('courses', '0004_alter_courseduration_options_courseduration_order'),
+        ('students', '0009_student_profile_photo_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_classes', models.IntegerField(default=0)),
+                ('present_count', models.IntegerField(default=0)),
+                ('absent_count', models.IntegerField(default=0)),
+                ('late_count', models.IntegerField(default=0)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='students.student')),
+            ],
+            options={
+                'unique_together': {('student', 'course')},
+            },
+        ),
+        migrations.RunPython(backfill_student_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_student_attendance_summary'),
+        ('courses', '0004_alter_courseduration_options_courseduration_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendance',
+            name='recorded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.CreateModel(
+            name='AttendanceSyncOperation',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('outcome', models.CharField(max_length=10)),
+                ('applied_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.course')),
+                ('recorded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RosterRemoval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_id', models.BigIntegerField()),
+                ('removed_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.course')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'removed_at'], name='attendance__course__61f805_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:06
+
+import attendance.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_offline_sync'),
+        ('courses', '0004_alter_courseduration_options_courseduration_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(max_length=20)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('format', models.CharField(choices=[('pdf', 'PDF'), ('excel', 'Excel')], max_length=10)),
+                ('data_version', models.CharField(max_length=64)),
+                ('file', models.FileField(storage=attendance.models.attendance_report_storage, upload_to='%Y/%m')),
+                ('file_name', models.CharField(max_length=255)),
+                ('etag', models.CharField(max_length=64)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.course')),
+                ('generated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'unique_together': {('course', 'period', 'start_date', 'end_date', 'format', 'data_version')},
+            },
+        ),
+    ]
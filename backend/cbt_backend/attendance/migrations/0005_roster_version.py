@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_attendance_report'),
+        ('courses', '0004_alter_courseduration_options_courseduration_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RosterVersion',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='courses.course')),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_roster_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='attendancereport',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready')], default='ready', max_length=10),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_attendance_updated_at_report_status'),
+        ('courses', '0004_alter_courseduration_options_courseduration_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancesyncoperation',
+            index=models.Index(fields=['applied_at'], name='attendance__applied_52ddaa_idx'),
+        ),
+    ]
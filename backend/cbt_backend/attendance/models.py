@@ -1,6 +1,9 @@
 # attendance/models.py
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -18,7 +21,10 @@ class Attendance(models.Model):
     check_in_time = models.TimeField(null=True, blank=True)
     remarks = models.TextField(blank=True, null=True)
     recorded_by = models.ForeignKey(User, on_delete=models.CASCADE)
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    # When the mark was made; offline sync carries the client's time and uses it to resolve conflicts
+    recorded_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Server time of the last write, whatever the client's clock said; upserts must list it in update_fields
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['student', 'course', 'date']
@@ -38,4 +44,86 @@ class AttendanceSummary(models.Model):
     
     class Meta:
         unique_together = ['course', 'date']
-        ordering = ['-date']
\ No newline at end of file
+        ordering = ['-date']
+
+class StudentAttendanceSummary(models.Model):
+    """Running attendance totals for one student in one course, kept in step by attendance/summaries.py"""
+    student = models.ForeignKey('students.Student', on_delete=models.CASCADE)
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE)
+    total_classes = models.IntegerField(default=0)
+    present_count = models.IntegerField(default=0)
+    absent_count = models.IntegerField(default=0)
+    late_count = models.IntegerField(default=0)
+    last_date = models.DateField(null=True, blank=True)
+    
+    class Meta:
+        unique_together = ['student', 'course']
+
+class AttendanceSyncOperation(models.Model):
+    """Client-generated id of a synced attendance operation, kept so a re-sent operation is applied once"""
+    id = models.UUIDField(primary_key=True)
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE)
+    recorded_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    outcome = models.CharField(max_length=10)
+    applied_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['applied_at']),
+        ]
+
+class RosterRemoval(models.Model):
+    """A student leaving a course roster (deleted or moved to another course), for offline roster deltas"""
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE)
+    student_id = models.BigIntegerField()
+    removed_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['course', 'removed_at']),
+        ]
+
+class RosterVersion(models.Model):
+    """Counter bumped on every roster change, so each process can tell its cached copy of the roster is stale"""
+    course = models.OneToOneField('courses.Course', on_delete=models.CASCADE, primary_key=True)
+    version = models.PositiveIntegerField(default=0)
+
+def attendance_report_storage():
+    # Outside MEDIA_ROOT: reports hold student details and are only served through the download view
+    return FileSystemStorage(
+        location=getattr(settings, 'ATTENDANCE_REPORT_ROOT', settings.BASE_DIR / 'private' / 'attendance_reports')
+    )
+
+class AttendanceReport(models.Model):
+    """A rendered attendance report, reused until the attendance it was built from changes"""
+    FORMAT_CHOICES = [
+        ('pdf', 'PDF'),
+        ('excel', 'Excel'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+    ]
+    
+    course = models.ForeignKey('courses.Course', on_delete=models.CASCADE)
+    period = models.CharField(max_length=20)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    # Latest updated_at and row count of the attendance in range when the report was rendered
+    data_version = models.CharField(max_length=64)
+    # Pending while one request renders the report; the row claims the render for that data version
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ready')
+    file = models.FileField(upload_to='%Y/%m', storage=attendance_report_storage)
+    file_name = models.CharField(max_length=255)
+    etag = models.CharField(max_length=64)
+    size = models.PositiveIntegerField(default=0)
+    generated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['course', 'period', 'start_date', 'end_date', 'format', 'data_version']
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.course.name} - {self.period} - {self.start_date} to {self.end_date} ({self.format})"
@@ -0,0 +1,176 @@
+# attendance/registers.py
+from datetime import date
+
+import numpy as np
+from django.db.models import F, FilteredRelation, Q
+
+from reports.xlsx import XlsxExport
+from students.models import Student
+from .summaries import LATE_WEIGHT
+from .sync import CLASS_SKIP_CODE, CLASS_STATUS_CODES
+
+# A register cell is an index into REGISTER_SYMBOLS: 0 for no mark, then the offline sync status codes
+REGISTER_SYMBOLS = CLASS_SKIP_CODE + ''.join(CLASS_STATUS_CODES)
+STATUS_CELLS = {status: REGISTER_SYMBOLS.index(symbol) for symbol, status in CLASS_STATUS_CODES.items()}
+
+# Longest range one register covers, about a term
+MAX_REGISTER_DAYS = 190
+
+
+def _rates(present, late, total):
+    """Vectorized attendance_rate, rounded to one decimal"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = np.where(total > 0, (present + late * LATE_WEIGHT) / total * 100, 0.0)
+    return np.round(rates, 1)
+
+
+def _totals(grid, axis):
+    counts = {status: (grid == cell).sum(axis=axis) for status, cell in STATUS_CELLS.items()}
+    counts['attendance_rate'] = _rates(counts['present'], counts['late'], (grid > 0).sum(axis=axis))
+    return counts
+
+
+def build_register(course_ids, start_date, end_date, center_id=None):
+    """
+    Attendance register of students by class days for the given courses.
+
+    Students and their marks in the range come from one LEFT JOIN query,
+    ordered by course and name; the grid is filled with numpy scatter
+    indexing. Class days are the days in the range with any mark. Enrolled
+    students are listed even without marks; students who have left are
+    listed only when they have marks in the range.
+
+    Returns a dict of numpy arrays: 'student_ids', 'registration_nos',
+    'names', 'course_ids', 'dates' (date objects), 'grid' (students x
+    days, cells indexing REGISTER_SYMBOLS), and 'student_totals' /
+    'day_totals' with a count per status plus 'attendance_rate'.
+    """
+    students = Student.objects.filter(course_id__in=course_ids)
+    if center_id:
+        students = students.filter(center_id=center_id)
+    rows = list(
+        students.annotate(
+            marks=FilteredRelation(
+                'attendance',
+                condition=Q(attendance__date__range=(start_date, end_date), attendance__course_id=F('course_id'))
+            )
+        ).order_by('course_id', 'full_name_english', 'id').values_list(
+            'id', 'registration_no', 'full_name_english', 'course_id', 'enrollment_status', 'marks__date', 'marks__status'
+        )
+    )
+
+    if not rows:
+        empty = np.zeros((0, 0), dtype=np.int8)
+        return {
+            'student_ids': np.zeros(0, dtype=np.int64),
+            'registration_nos': np.array([], dtype=object),
+            'names': np.array([], dtype=object),
+            'course_ids': np.zeros(0, dtype=np.int64),
+            'dates': [],
+            'grid': empty,
+            'student_totals': _totals(empty, 1),
+            'day_totals': _totals(empty, 0),
+        }
+
+    ids, registration_nos, names, row_course_ids, enrollment, dates, statuses = zip(*rows)
+    ids = np.array(ids, dtype=np.int64)
+
+    # Rows come in register order; number students by first appearance
+    student_ids, first_rows, inverse = np.unique(ids, return_index=True, return_inverse=True)
+    order = np.argsort(first_rows)
+    position = np.empty_like(order)
+    position[order] = np.arange(len(order))
+    student_rows = position[inverse]
+    first_rows = first_rows[order]
+
+    ordinals = np.array([day.toordinal() if day else -1 for day in dates], dtype=np.int64)
+    cells = np.array([STATUS_CELLS.get(status, 0) for status in statuses], dtype=np.int8)
+    marked = (ordinals >= 0) & (cells > 0)
+    day_ordinals = np.unique(ordinals[marked])
+
+    grid = np.zeros((len(first_rows), len(day_ordinals)), dtype=np.int8)
+    grid[student_rows[marked], np.searchsorted(day_ordinals, ordinals[marked])] = cells[marked]
+
+    enrolled = np.array(enrollment, dtype=object)[first_rows] == 'Enrolled'
+    keep = enrolled | grid.any(axis=1)
+    grid = grid[keep]
+    kept_rows = first_rows[keep]
+
+    return {
+        'student_ids': ids[kept_rows],
+        'registration_nos': np.array(registration_nos, dtype=object)[kept_rows],
+        'names': np.array(names, dtype=object)[kept_rows],
+        'course_ids': np.array(row_course_ids, dtype=np.int64)[kept_rows],
+        'dates': [date.fromordinal(ordinal) for ordinal in day_ordinals.tolist()],
+        'grid': grid,
+        'student_totals': _totals(grid, 1),
+        'day_totals': _totals(grid, 0),
+    }
+
+
+def register_marks(grid):
+    """One string per student with a REGISTER_SYMBOLS character per class day"""
+    symbols = np.frombuffer(REGISTER_SYMBOLS.encode(), dtype=np.uint8)
+    width = grid.shape[1]
+    raw = symbols[grid].tobytes()
+    return [raw[index * width:(index + 1) * width].decode('ascii') for index in range(grid.shape[0])]
+
+
+def register_json(register):
+    """Columnar form: parallel lists per student and per day, and one mark string per student"""
+    def totals(values):
+        return {key: array.tolist() for key, array in values.items()}
+
+    return {
+        'dates': [day.isoformat() for day in register['dates']],
+        'symbols': {CLASS_SKIP_CODE: None, **CLASS_STATUS_CODES},
+        'students': {
+            'id': register['student_ids'].tolist(),
+            'registration_no': register['registration_nos'].tolist(),
+            'name': register['names'].tolist(),
+            'course_id': register['course_ids'].tolist(),
+        },
+        'marks': register_marks(register['grid']),
+        'student_totals': totals(register['student_totals']),
+        'day_totals': totals(register['day_totals']),
+    }
+
+
+def register_xlsx(register, course_names):
+    """XlsxExport with the register sheet: one row per student, a column per class day, totals row last"""
+    statuses = list(STATUS_CELLS)
+    headers = (
+        ['Registration No', 'Student Name', 'Course']
+        + [day.strftime('%Y-%m-%d') for day in register['dates']]
+        + [status.title() for status in statuses] + ['Attendance Rate']
+    )
+    student_totals = register['student_totals']
+    day_totals = register['day_totals']
+
+    def rows():
+        marks = register_marks(register['grid'])
+        for index, student_marks in enumerate(marks):
+            yield (
+                [
+                    register['registration_nos'][index],
+                    register['names'][index],
+                    course_names.get(int(register['course_ids'][index]), ''),
+                ]
+                + [symbol if symbol != CLASS_SKIP_CODE else '' for symbol in student_marks]
+                + [int(student_totals[status][index]) for status in statuses]
+                + [float(student_totals['attendance_rate'][index]) / 100]
+            )
+        for status in statuses:
+            yield ['', f'Total {status.title()}', ''] + day_totals[status].tolist()
+        yield ['', 'Attendance Rate', ''] + [f"{rate:.1f}%" for rate in day_totals['attendance_rate'].tolist()]
+
+    export = XlsxExport()
+    date_columns = {index: 11 for index in range(3, 3 + len(register['dates']))}
+    export.write_sheet(
+        'Register',
+        headers,
+        rows(),
+        column_formats={'Attendance Rate': 'percent'},
+        widths={'Registration No': 20, 'Student Name': 30, 'Course': 25, **date_columns}
+    )
+    return export
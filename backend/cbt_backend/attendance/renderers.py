@@ -0,0 +1,212 @@
+# attendance/renderers.py
+# Attendance report renderers for reports.render_pool: they take the output file and plain data
+# (the records in a spool file written by spool_records) and return the download file name.
+import logging
+import os
+import pickle
+import tempfile
+from itertools import islice
+
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import LongTable, Table, TableStyle, Paragraph, Spacer
+
+from reports.pdf import StreamingDocTemplate
+from reports.xlsx import XlsxExport
+from .summaries import LATE_WEIGHT
+
+logger = logging.getLogger(__name__)
+
+# Records per pickled chunk in a spool file
+SPOOL_CHUNK_RECORDS = 2000
+# Rows per PDF table; the table is split page by page, so bounded tables keep splitting linear
+PDF_TABLE_CHUNK_ROWS = 500
+
+
+def spool_records(records, chunk_size=SPOOL_CHUNK_RECORDS):
+    """
+    Path of a new temporary file holding the report records, for a renderer in another process.
+
+    Records are written as they are read, one pickled chunk at a time; the
+    caller deletes the file once the render is done.
+    """
+    records = iter(records)
+    fd, path = tempfile.mkstemp(prefix='attendance-records-')
+    try:
+        with os.fdopen(fd, 'wb') as spool:
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                pickle.dump(chunk, spool, protocol=pickle.HIGHEST_PROTOCOL)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def read_spooled_records(path):
+    """The records of a spool file one at a time, holding one chunk in memory"""
+    with open(path, 'rb') as spool:
+        while True:
+            try:
+                chunk = pickle.load(spool)
+            except EOFError:
+                return
+            yield from chunk
+
+
+def generate_attendance_excel(output, course, period, start_date, end_date, summary, records_path):
+    """Generate Excel report, streaming the records from their spool file into a constant-memory workbook"""
+    try:
+        attendance_rate = (
+            (summary['present_count'] + summary['late_count'] * LATE_WEIGHT) / summary['total_records']
+            if summary['total_records'] > 0 else 0
+        )
+        
+        export = XlsxExport(output)
+        
+        # Main data sheet
+        export.write_sheet(
+            'Attendance Data',
+            ['Student Name', 'NIC', 'Email', 'Date', 'Status', 'Check-in Time', 'Remarks', 'Recorded By', 'Recorded At'],
+            (
+                [
+                    record['student_name'],
+                    record['student_nic'],
+                    record['student_email'],
+                    record['date'],
+                    record['status'].title(),
+                    record['check_in_time'] or '-',
+                    record['remarks'] or '-',
+                    record['recorded_by'],
+                    record['recorded_at'],
+                ]
+                for record in read_spooled_records(records_path)
+            ),
+            column_formats={'Date': 'date', 'Check-in Time': 'time', 'Recorded At': 'datetime'},
+            widths={'Student Name': 30, 'Email': 30, 'Remarks': 40}
+        )
+        
+        # Summary sheet
+        export.write_sheet(
+            'Summary',
+            ['Metric', 'Count'],
+            [
+                ['Total Students', summary['total_students']],
+                ['Total Records', summary['total_records']],
+                ['Present', summary['present_count']],
+                ['Absent', summary['absent_count']],
+                ['Late', summary['late_count']],
+                ['Attendance Rate', f"{attendance_rate * 100:.1f}%"],
+            ],
+            widths={'Metric': 20}
+        )
+        
+        export.close()
+        return f"attendance_report_{course['code']}_{period}_{timezone.now().strftime('%Y%m%d_%H%M')}.xlsx"
+        
+    except Exception as e:
+        logger.error(f"Error generating Excel report: {str(e)}")
+        raise
+
+
+def _pdf_record_rows(records):
+    for record in records:
+        yield [
+            record['student_name'],
+            record['student_nic'],
+            record['date'].strftime('%Y-%m-%d'),
+            record['status'].title(),
+            record['check_in_time'].strftime('%H:%M') if record['check_in_time'] else '-',
+            record['remarks'] or '-'
+        ]
+
+
+def _pdf_story(course, period, start_date, end_date, summary, records):
+    """Flowables of the attendance PDF, each record table built only when the one before it has been drawn"""
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=30,
+        alignment=1  # Center
+    )
+    
+    # Title
+    yield Paragraph(f"Attendance Report - {course['name']}", title_style)
+    yield Paragraph(f"Course: {course['code']} | Period: {period.title()}", styles['Heading2'])
+    yield Paragraph(f"Date Range: {start_date} to {end_date}", styles['Heading3'])
+    yield Spacer(1, 20)
+    
+    # Summary table
+    summary_data = [
+        ['Total Students', 'Total Records', 'Present', 'Absent', 'Late', 'Attendance Rate'],
+        [
+            str(summary['total_students']),
+            str(summary['total_records']),
+            str(summary['present_count']),
+            str(summary['absent_count']),
+            str(summary['late_count']),
+            f"{(summary['present_count'] + summary['late_count'] * LATE_WEIGHT) / summary['total_records'] * 100:.1f}%" if summary['total_records'] > 0 else '0%'
+        ]
+    ]
+    
+    summary_table = Table(summary_data, colWidths=[1.2*inch]*6)
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, 1), colors.beige),
+        ('FONTSIZE', (0, 1), (-1, 1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    yield summary_table
+    yield Spacer(1, 20)
+    
+    # Attendance data tables; fixed column widths spare LongTable from measuring every cell
+    header = ['Student Name', 'NIC', 'Date', 'Status', 'Check-in', 'Remarks']
+    col_widths = [1.6*inch, 1.1*inch, 0.85*inch, 0.65*inch, 0.65*inch, 2.05*inch]
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('FONTSIZE', (0, 1), (-1, -1), 7),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    rows = _pdf_record_rows(records)
+    while True:
+        chunk = list(islice(rows, PDF_TABLE_CHUNK_ROWS))
+        if not chunk:
+            break
+        yield LongTable([header] + chunk, colWidths=col_widths, repeatRows=1, style=table_style)
+
+
+def generate_attendance_pdf(output, course, period, start_date, end_date, summary, records_path):
+    """
+    Generate PDF report with every record, paginated across as many tables as needed.
+    
+    The story is a generator fed to StreamingDocTemplate and the records
+    are read from their spool file as it goes, so of the records only the
+    table being drawn and its chunk are held in memory. ReportLab still
+    keeps each finished page, compressed, until the file is written.
+    """
+    try:
+        doc = StreamingDocTemplate(output, pagesize=A4, topMargin=1*inch)
+        doc.build(_pdf_story(course, period, start_date, end_date, summary, read_spooled_records(records_path)))
+        return f"attendance_report_{course['code']}_{period}_{timezone.now().strftime('%Y%m%d_%H%M')}.pdf"
+        
+    except Exception as e:
+        logger.error(f"Error generating PDF report: {str(e)}")
+        raise
@@ -0,0 +1,61 @@
+# attendance/rosters.py
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+
+from .models import RosterVersion
+
+ROSTER_CACHE_ALIAS = getattr(settings, 'ATTENDANCE_ROSTER_CACHE', 'default')
+# Seconds an unused roster is kept; freshness comes from RosterVersion, not from this timeout
+ROSTER_CACHE_TIMEOUT = getattr(settings, 'ATTENDANCE_ROSTER_CACHE_TIMEOUT', 300)
+
+ROSTER_FIELDS = ['id', 'registration_no', 'full_name_english', 'email', 'mobile_no', 'nic_id', 'center_id']
+
+
+def roster_cache_key(course_id):
+    return f"attendance_roster:{course_id}"
+
+
+def roster_version(course_id):
+    return RosterVersion.objects.filter(course_id=course_id).values_list('version', flat=True).first() or 0
+
+
+def get_course_roster(course_id, center_id=None):
+    """
+    Enrolled students of a course as a list of dicts with ROSTER_FIELDS.
+
+    The whole course roster is cached; the center filter is applied in
+    memory so every center shares one entry. Each entry is stored with the
+    course's RosterVersion and rebuilt when the version in the database has
+    moved on, so a change made by any process is seen by every process on
+    its next read, whatever the cache backend.
+    """
+    from students.models import Student
+
+    cache = caches[ROSTER_CACHE_ALIAS]
+    key = roster_cache_key(course_id)
+    # Read before the roster, so a change committed while it is built leaves the entry stale rather than current
+    version = roster_version(course_id)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == version:
+        roster = cached[1]
+    else:
+        roster = list(
+            Student.objects.filter(course_id=course_id, enrollment_status='Enrolled').values(*ROSTER_FIELDS)
+        )
+        cache.set(key, (version, roster), ROSTER_CACHE_TIMEOUT)
+    if center_id:
+        return [student for student in roster if student['center_id'] == center_id]
+    return roster
+
+
+def invalidate_rosters(course_ids):
+    """Bump the RosterVersion of the courses, which stales their cached rosters in every process"""
+    course_ids = {course_id for course_id in course_ids if course_id is not None}
+    if not course_ids:
+        return
+    RosterVersion.objects.bulk_create(
+        [RosterVersion(course_id=course_id) for course_id in course_ids], ignore_conflicts=True
+    )
+    RosterVersion.objects.filter(course_id__in=course_ids).update(version=F('version') + 1)
+    caches[ROSTER_CACHE_ALIAS].delete_many([roster_cache_key(course_id) for course_id in course_ids])
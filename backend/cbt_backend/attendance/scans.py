@@ -0,0 +1,205 @@
+# attendance/scans.py
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Attendance
+from .rosters import get_course_roster
+from .summaries import apply_status_changes
+
+logger = logging.getLogger(__name__)
+
+# Seconds between flushes of buffered scans to the database. Scans are acknowledged as queued before they
+# are written: a clean shutdown flushes them, but a worker that is killed or crashes loses up to this many
+# seconds of accepted scans (longer while the database is unavailable and flushes are being retried)
+FLUSH_INTERVAL = getattr(settings, 'ATTENDANCE_SCAN_FLUSH_INTERVAL', 0.3)
+# Repeat scans of the same student for the same course within this many seconds are dropped
+DEDUPE_WINDOW = getattr(settings, 'ATTENDANCE_SCAN_DEDUPE_WINDOW', 60)
+# Seconds a course roster is trusted before it is read again
+ROSTER_TTL = getattr(settings, 'ATTENDANCE_SCAN_ROSTER_TTL', 30)
+
+
+class ScanBuffer:
+    """
+    Write-behind buffer for QR attendance scans.
+
+    submit() checks a scan against an in-memory roster and a dedupe window
+    and returns an acknowledgement without touching the database; the scan
+    is queued, not yet recorded, and is lost if the process dies before
+    the next flush. A
+    background thread flushes the buffered scans every FLUSH_INTERVAL
+    seconds as one bulk upsert, so a class scanning in at once costs a
+    handful of writes instead of several per student. Scans are held in
+    process memory until the next flush. A flush that fails on a locked or
+    unavailable database keeps its scans for the next one; any other
+    failure is retried scan by scan and the scans that still fail are
+    logged and dropped, so one bad row cannot block the rest for good.
+    """
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, dedupe_window=DEDUPE_WINDOW, roster_ttl=ROSTER_TTL):
+        self.flush_interval = flush_interval
+        self.dedupe_window = dedupe_window
+        self.roster_ttl = roster_ttl
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._last_seen = {}
+        self._rosters = {}
+        self._thread = None
+        self._stop = threading.Event()
+
+    def roster(self, course_id):
+        """{'ids': {student id: roster row}, 'registration_nos': {...}} for the course, refreshed every roster_ttl"""
+        now = time.monotonic()
+        entry = self._rosters.get(course_id)
+        if entry is None or now - entry[0] > self.roster_ttl:
+            students = get_course_roster(course_id)
+            entry = (now, {
+                'ids': {student['id']: student for student in students},
+                'registration_nos': {student['registration_no']: student for student in students},
+            })
+            self._rosters[course_id] = entry
+        return entry[1]
+
+    def submit(self, course_id, recorded_by_id, student_id=None, registration_no=None):
+        """
+        Buffer one scan; returns (ack status, roster row or None).
+
+        The status is 'accepted', 'duplicate' (seen within the dedupe window)
+        or 'not_enrolled'.
+        """
+        roster = self.roster(course_id)
+        if student_id is not None:
+            student = roster['ids'].get(student_id)
+        else:
+            student = roster['registration_nos'].get(registration_no)
+        if student is None:
+            return 'not_enrolled', None
+
+        now = timezone.now()
+        key = (student['id'], course_id, now.date())
+        with self._lock:
+            last_seen = self._last_seen.get(key)
+            if last_seen is not None and (now - last_seen).total_seconds() < self.dedupe_window:
+                return 'duplicate', student
+            self._last_seen[key] = now
+            self._pending[key] = (now, recorded_by_id)
+        self._ensure_thread()
+        return 'accepted', student
+
+    def flush(self):
+        """Write every buffered scan with one upsert per flush; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._forget_old_scans()
+            if not pending:
+                return 0
+            try:
+                self._write(pending)
+            except OperationalError as e:
+                logger.warning(f"Database unavailable, keeping {len(pending)} attendance scans: {str(e)}")
+                self._requeue(pending)
+                return 0
+            except Exception as e:
+                logger.warning(f"Error flushing {len(pending)} attendance scans, retrying per scan: {str(e)}")
+                return self._write_each(pending)
+            return len(pending)
+
+    def _write_each(self, pending):
+        written = 0
+        scans = list(pending.items())
+        for index, (key, scan) in enumerate(scans):
+            try:
+                self._write({key: scan})
+            except OperationalError as e:
+                logger.warning(f"Database unavailable, keeping {len(scans) - index} attendance scans: {str(e)}")
+                self._requeue(dict(scans[index:]))
+                break
+            except Exception as e:
+                logger.error(f"Dropping attendance scan {key}: {str(e)}")
+            else:
+                written += 1
+        return written
+
+    def _requeue(self, pending):
+        with self._lock:
+            # Newer scans of the same student win over the failed ones
+            self._pending = {**pending, **self._pending}
+
+    def _write(self, pending):
+        by_day = defaultdict(list)
+        for (student_id, course_id, date) in pending:
+            by_day[(course_id, date)].append(student_id)
+
+        with transaction.atomic():
+            previous_statuses = {}
+            for (course_id, date), student_ids in by_day.items():
+                for student_id, old_status in Attendance.objects.filter(
+                    course_id=course_id, date=date, student_id__in=student_ids
+                ).values_list('student_id', 'status'):
+                    previous_statuses[(student_id, course_id, date)] = old_status
+
+            Attendance.objects.bulk_create(
+                [
+                    Attendance(
+                        student_id=student_id,
+                        course_id=course_id,
+                        date=date,
+                        status='present',
+                        check_in_time=scanned_at.time(),
+                        recorded_by_id=recorded_by_id,
+                        recorded_at=scanned_at
+                    )
+                    for (student_id, course_id, date), (scanned_at, recorded_by_id) in pending.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['student', 'course', 'date'],
+                update_fields=['status', 'check_in_time', 'recorded_by', 'recorded_at', 'updated_at']
+            )
+
+            for (course_id, date), student_ids in by_day.items():
+                apply_status_changes(course_id, date, [
+                    (student_id, previous_statuses.get((student_id, course_id, date)), 'present')
+                    for student_id in student_ids
+                ])
+
+    def _forget_old_scans(self):
+        cutoff = timezone.now()
+        self._last_seen = {
+            key: seen for key, seen in self._last_seen.items()
+            if (cutoff - seen).total_seconds() < self.dedupe_window
+        }
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='attendance-scan-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+            close_old_connections()
+        self.flush()
+
+    def stop(self):
+        """Stop the flusher thread after one last flush"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+
+scan_buffer = ScanBuffer()
+atexit.register(scan_buffer.stop)
@@ -0,0 +1,40 @@
+# attendance/signals.py
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from students.models import Student
+from .models import RosterRemoval
+from .rosters import invalidate_rosters
+
+
+@receiver(post_init, sender=Student)
+def remember_roster_course(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred course_id is not fetched just for this
+    instance._roster_course_id = instance.__dict__.get('course_id')
+
+
+# Connected before invalidate_student_rosters, which resets _roster_course_id
+@receiver(post_save, sender=Student)
+def record_roster_move(sender, instance, created=False, raw=False, **kwargs):
+    """Tombstone for offline roster deltas when a student moves to another course"""
+    previous_course_id = getattr(instance, '_roster_course_id', None)
+    if raw or created or previous_course_id is None or previous_course_id == instance.course_id:
+        return
+    RosterRemoval.objects.create(course_id=previous_course_id, student_id=instance.pk)
+
+
+@receiver(post_delete, sender=Student)
+def record_roster_deletion(sender, instance, **kwargs):
+    """Tombstone for offline roster deltas, which cannot see a deleted row"""
+    if instance.course_id is not None:
+        RosterRemoval.objects.create(course_id=instance.course_id, student_id=instance.pk)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student_rosters(sender, instance, raw=False, **kwargs):
+    """Any saved student may have joined, left or changed details on a roster; drop the old and new course's"""
+    if raw:
+        return
+    invalidate_rosters([instance.course_id, getattr(instance, '_roster_course_id', None)])
+    instance._roster_course_id = instance.course_id
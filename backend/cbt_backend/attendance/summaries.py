@@ -0,0 +1,289 @@
+# attendance/summaries.py
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DateField, F, FloatField, Max, Q, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Attendance, AttendanceSummary, StudentAttendanceSummary
+
+# Share of a present mark that a late mark counts for in attendance rates
+LATE_WEIGHT = getattr(settings, 'ATTENDANCE_LATE_WEIGHT', 0.8)
+
+STATUS_COUNT_FIELDS = {
+    'present': 'present_count',
+    'absent': 'absent_count',
+    'late': 'late_count',
+}
+
+SUMMARY_FIELDS = ['total_students', 'present_count', 'absent_count', 'late_count', 'attendance_rate']
+STUDENT_SUMMARY_FIELDS = ['total_classes', 'present_count', 'absent_count', 'late_count', 'last_date']
+
+
+def attendance_rate(present, late, total):
+    """Attendance rate as a percentage, with late marks weighted by LATE_WEIGHT"""
+    return (present + late * LATE_WEIGHT) / total * 100 if total > 0 else 0.0
+
+
+def _deltas(changes, total_field='total_students'):
+    """Counter of summary column -> change for a list of (old_status, new_status) pairs"""
+    deltas = Counter()
+    for old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        if old_status is not None:
+            deltas[total_field] -= 1
+            if old_status in STATUS_COUNT_FIELDS:
+                deltas[STATUS_COUNT_FIELDS[old_status]] -= 1
+        if new_status is not None:
+            deltas[total_field] += 1
+            if new_status in STATUS_COUNT_FIELDS:
+                deltas[STATUS_COUNT_FIELDS[new_status]] += 1
+    return deltas
+
+
+def apply_status_changes(course_id, date, changes):
+    """
+    Move the (course, date) summary and the students' course totals by the given status changes.
+
+    Each change is (student_id, old_status, new_status) for one attendance
+    row, with None for a row that was created (old) or deleted (new). Counts
+    are shifted with F() expressions, and the day's rate is computed from
+    the shifted counts in the same UPDATE. A missing summary is built from
+    the attendance rows instead.
+    """
+    deltas = _deltas([(old_status, new_status) for _, old_status, new_status in changes])
+    if not any(deltas.values()):
+        return
+
+    counts = {field: F(field) + deltas[field] for field in SUMMARY_FIELDS[:-1]}
+    rate = Case(
+        When(
+            total_students__gt=-deltas['total_students'],
+            then=(counts['present_count'] + counts['late_count'] * Value(float(LATE_WEIGHT))) * Value(100.0)
+            / counts['total_students']
+        ),
+        default=Value(0.0),
+        output_field=FloatField()
+    )
+    with transaction.atomic():
+        updated = AttendanceSummary.objects.filter(course_id=course_id, date=date).update(
+            attendance_rate=rate, **counts
+        )
+        if not updated:
+            rebuild_summary(course_id, date)
+        _apply_student_changes(course_id, date, changes)
+
+
+def _apply_student_changes(course_id, date, changes):
+    """Shift StudentAttendanceSummary rows with one UPDATE per distinct (old, new) status pair"""
+    changes = [change for change in changes if change[1] != change[2]]
+    existing = set(
+        StudentAttendanceSummary.objects.filter(
+            course_id=course_id, student_id__in={student_id for student_id, _, _ in changes}
+        ).values_list('student_id', flat=True)
+    )
+
+    recount = set()
+    by_transition = defaultdict(list)
+    for student_id, old_status, new_status in changes:
+        if student_id not in existing or new_status is None:
+            # No row yet, or a removal that may move last_date back: recount from attendance
+            recount.add(student_id)
+        else:
+            by_transition[(old_status, new_status)].append(student_id)
+
+    day = Value(date, output_field=DateField())
+    for (old_status, new_status), student_ids in by_transition.items():
+        updates = {
+            field: F(field) + delta
+            for field, delta in _deltas([(old_status, new_status)], total_field='total_classes').items()
+            if delta
+        }
+        if old_status is None:
+            updates['last_date'] = Coalesce(Greatest('last_date', day), day)
+        StudentAttendanceSummary.objects.filter(course_id=course_id, student_id__in=student_ids).update(**updates)
+
+    if recount:
+        rebuild_student_summaries(course_id, recount)
+
+
+def record_status_change(student_id, course_id, date, old_status, new_status):
+    apply_status_changes(course_id, date, [(student_id, old_status, new_status)])
+
+
+def count_attendance(queryset):
+    return queryset.aggregate(
+        total=Count('id'),
+        present=Count('id', filter=Q(status='present')),
+        absent=Count('id', filter=Q(status='absent')),
+        late=Count('id', filter=Q(status='late'))
+    )
+
+
+def _summary_values(counts):
+    return {
+        'total_students': counts['total'],
+        'present_count': counts['present'],
+        'absent_count': counts['absent'],
+        'late_count': counts['late'],
+        'attendance_rate': attendance_rate(counts['present'], counts['late'], counts['total']),
+    }
+
+
+def rebuild_summary(course_id, date):
+    """Recount one summary from its attendance rows"""
+    values = _summary_values(count_attendance(Attendance.objects.filter(course_id=course_id, date=date)))
+    try:
+        with transaction.atomic():
+            summary, _ = AttendanceSummary.objects.update_or_create(course_id=course_id, date=date, defaults=values)
+    except IntegrityError:
+        # Created concurrently; the recount above is still current
+        AttendanceSummary.objects.filter(course_id=course_id, date=date).update(**values)
+        summary = AttendanceSummary.objects.get(course_id=course_id, date=date)
+    return summary
+
+
+def get_summary(course, date):
+    """The stored summary, built on first read when attendance exists; an unsaved empty summary otherwise"""
+    summary = AttendanceSummary.objects.filter(course=course, date=date).first()
+    if summary is not None:
+        return summary
+    if Attendance.objects.filter(course=course, date=date).exists():
+        return rebuild_summary(course.id, date)
+    return AttendanceSummary(course=course, date=date)
+
+
+def _expected_summaries(start_date, end_date, course_ids=None):
+    """{(course_id, date): summary values} recounted from attendance in one grouped query"""
+    attendance = Attendance.objects.filter(date__range=(start_date, end_date))
+    if course_ids:
+        attendance = attendance.filter(course_id__in=course_ids)
+    rows = attendance.order_by().values('course_id', 'date').annotate(
+        total=Count('id'),
+        present=Count('id', filter=Q(status='present')),
+        absent=Count('id', filter=Q(status='absent')),
+        late=Count('id', filter=Q(status='late'))
+    )
+    return {(row['course_id'], row['date']): _summary_values(row) for row in rows}
+
+
+def _stored_summaries(start_date, end_date, course_ids=None):
+    summaries = AttendanceSummary.objects.filter(date__range=(start_date, end_date))
+    if course_ids:
+        summaries = summaries.filter(course_id__in=course_ids)
+    return {(summary.course_id, summary.date): summary for summary in summaries}
+
+
+def verify_summaries(start_date, end_date, course_ids=None):
+    """List of (course_id, date, stored values or None, expected values or None) for every summary that is off"""
+    expected = _expected_summaries(start_date, end_date, course_ids)
+    stored = _stored_summaries(start_date, end_date, course_ids)
+    mismatches = []
+    for key in sorted(set(expected) | set(stored)):
+        expected_values = expected.get(key)
+        summary = stored.get(key)
+        stored_values = {field: getattr(summary, field) for field in SUMMARY_FIELDS} if summary else None
+        if expected_values is None:
+            # A stored summary with nothing behind it only matters if it claims attendance
+            if stored_values['total_students']:
+                mismatches.append((*key, stored_values, None))
+            continue
+        if stored_values is None or any(
+            abs(stored_values[field] - value) > 1e-6 for field, value in expected_values.items()
+        ):
+            mismatches.append((*key, stored_values, expected_values))
+    return mismatches
+
+
+def rebuild_summaries(start_date, end_date, course_ids=None):
+    """Recount every summary in the date range; returns (written, deleted)"""
+    expected = _expected_summaries(start_date, end_date, course_ids)
+    stored = _stored_summaries(start_date, end_date, course_ids)
+
+    with transaction.atomic():
+        to_update, to_create = [], []
+        for (course_id, date), values in expected.items():
+            summary = stored.get((course_id, date))
+            if summary is None:
+                to_create.append(AttendanceSummary(course_id=course_id, date=date, **values))
+                continue
+            for field, value in values.items():
+                setattr(summary, field, value)
+            to_update.append(summary)
+        AttendanceSummary.objects.bulk_create(to_create, batch_size=500)
+        AttendanceSummary.objects.bulk_update(to_update, SUMMARY_FIELDS, batch_size=500)
+        orphaned = [summary.id for key, summary in stored.items() if key not in expected]
+        AttendanceSummary.objects.filter(id__in=orphaned).delete()
+
+    return len(to_create) + len(to_update), len(orphaned)
+
+
+def student_attendance_totals(course_id, student_ids=None):
+    """{student_id: {total, present, absent, late, last_date}} for a course, in one GROUP BY student query"""
+    attendance = Attendance.objects.filter(course_id=course_id)
+    if student_ids is not None:
+        attendance = attendance.filter(student_id__in=student_ids)
+    rows = attendance.order_by().values('student_id').annotate(
+        total=Count('id'),
+        present=Count('id', filter=Q(status='present')),
+        absent=Count('id', filter=Q(status='absent')),
+        late=Count('id', filter=Q(status='late')),
+        last_date=Max('date')
+    )
+    return {row['student_id']: row for row in rows}
+
+
+def _student_summary_values(totals):
+    return {
+        'total_classes': totals['total'],
+        'present_count': totals['present'],
+        'absent_count': totals['absent'],
+        'late_count': totals['late'],
+        'last_date': totals['last_date'],
+    }
+
+
+def rebuild_student_summaries(course_id, student_ids=None):
+    """Recount the course totals of the given students (all students when None); returns the rows written"""
+    totals = student_attendance_totals(course_id, student_ids)
+    with transaction.atomic():
+        StudentAttendanceSummary.objects.bulk_create(
+            [
+                StudentAttendanceSummary(course_id=course_id, student_id=student_id, **_student_summary_values(row))
+                for student_id, row in totals.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['student', 'course'],
+            update_fields=STUDENT_SUMMARY_FIELDS,
+            batch_size=500
+        )
+        stale = StudentAttendanceSummary.objects.filter(course_id=course_id).exclude(student_id__in=list(totals))
+        if student_ids is not None:
+            stale = stale.filter(student_id__in=student_ids)
+        stale.delete()
+    return len(totals)
+
+
+def verify_student_summaries(course_id):
+    """List of (student_id, stored values or None, expected values or None) for every course total that is off"""
+    expected = {
+        student_id: _student_summary_values(row) for student_id, row in student_attendance_totals(course_id).items()
+    }
+    stored = {
+        row['student_id']: {field: row[field] for field in STUDENT_SUMMARY_FIELDS}
+        for row in StudentAttendanceSummary.objects.filter(course_id=course_id).values('student_id', *STUDENT_SUMMARY_FIELDS)
+    }
+    return [
+        (student_id, stored.get(student_id), expected.get(student_id))
+        for student_id in sorted(set(expected) | set(stored))
+        if stored.get(student_id) != expected.get(student_id)
+    ]
+
+
+def courses_with_attendance(start_date, end_date, course_ids=None):
+    attendance = Attendance.objects.filter(date__range=(start_date, end_date))
+    if course_ids:
+        attendance = attendance.filter(course_id__in=course_ids)
+    return list(attendance.order_by().values_list('course_id', flat=True).distinct())
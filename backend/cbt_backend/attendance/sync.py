@@ -0,0 +1,314 @@
+# attendance/sync.py
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+
+from students.models import Student
+from .models import Attendance, AttendanceSyncOperation, RosterRemoval
+from .rosters import ROSTER_FIELDS
+from .summaries import apply_status_changes
+
+# Deltas re-read this many seconds before the cursor, so rows committed late by a slow transaction are not missed
+CURSOR_OVERLAP = timedelta(seconds=getattr(settings, 'ATTENDANCE_SYNC_CURSOR_OVERLAP', 5))
+# Cursors older than this get a full roster instead of a delta
+CURSOR_MAX_AGE = timedelta(days=getattr(settings, 'ATTENDANCE_SYNC_CURSOR_MAX_AGE_DAYS', 30))
+MAX_OPERATIONS = getattr(settings, 'ATTENDANCE_SYNC_MAX_OPERATIONS', 5000)
+# Applied operation ids are kept this long; a client resending a batch after that would apply it again
+OPERATION_RETENTION = timedelta(days=getattr(settings, 'ATTENDANCE_SYNC_OPERATION_RETENTION_DAYS', 90))
+
+# One character per student in a class bitstring; '-' leaves the student unmarked
+CLASS_STATUS_CODES = {
+    'P': 'present',
+    'A': 'absent',
+    'L': 'late',
+}
+CLASS_SKIP_CODE = '-'
+
+
+class SyncError(ValueError):
+    pass
+
+
+def parse_cursor(value):
+    try:
+        cursor = parse_datetime(value or '')
+    except ValueError:
+        cursor = None
+    if cursor is None:
+        raise SyncError('Invalid cursor')
+    if timezone.is_naive(cursor):
+        cursor = timezone.make_aware(cursor)
+    return cursor
+
+
+def roster_delta(course_id, center_id=None, since=None):
+    """
+    Roster changes of a course since a cursor returned by an earlier call.
+
+    Returns {'full', 'students', 'removed', 'cursor'}. Without a cursor (or
+    with one older than CURSOR_MAX_AGE) 'students' is the whole roster and
+    'full' is True; the client replaces its copy. Otherwise 'students' holds
+    the enrolled students changed since the cursor and 'removed' the ids of
+    students who left the roster, whether withdrawn, moved to another center
+    or course, or deleted. Both lists may repeat entries the client already
+    has, since each delta overlaps the previous one by CURSOR_OVERLAP.
+    """
+    now = timezone.now()
+    if since is None or now - since > CURSOR_MAX_AGE:
+        # Read from the database, not the roster cache: the cursor must not be newer than the data
+        students = Student.objects.filter(course_id=course_id, enrollment_status='Enrolled')
+        if center_id:
+            students = students.filter(center_id=center_id)
+        return {'full': True, 'students': list(students.values(*ROSTER_FIELDS)), 'removed': [], 'cursor': now}
+
+    window_start = since - CURSOR_OVERLAP
+    students, removed = [], set()
+    for student in Student.objects.filter(course_id=course_id, updated_at__gte=window_start).values(
+        *ROSTER_FIELDS, 'enrollment_status'
+    ):
+        if student.pop('enrollment_status') == 'Enrolled' and (not center_id or student['center_id'] == center_id):
+            students.append(student)
+        else:
+            removed.add(student['id'])
+
+    # Students who left the course entirely, unless they rejoined within the window
+    current = {student['id'] for student in students}
+    removed.update(
+        student_id
+        for student_id in RosterRemoval.objects.filter(course_id=course_id, removed_at__gte=window_start)
+        .values_list('student_id', flat=True)
+        if student_id not in current
+    )
+    return {'full': False, 'students': students, 'removed': sorted(removed), 'cursor': now}
+
+
+def purge_old_sync_operations():
+    """Delete operation ids applied longer ago than OPERATION_RETENTION"""
+    AttendanceSyncOperation.objects.filter(applied_at__lt=timezone.now() - OPERATION_RETENTION).delete()
+
+
+def _parse_recorded_at(value, now):
+    """Client timestamp of a mark; missing means now, and clocks running ahead are clamped to now"""
+    if not value:
+        return now
+    try:
+        recorded_at = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:
+        recorded_at = None
+    if recorded_at is None:
+        raise SyncError(f"Invalid recorded_at '{value}'")
+    if timezone.is_naive(recorded_at):
+        recorded_at = timezone.make_aware(recorded_at)
+    return min(recorded_at, now)
+
+
+def _parse_operation_id(value):
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        raise SyncError(f"Invalid operation id '{value}'")
+
+
+def _parse_student_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise SyncError(f"Invalid student_id '{value}'")
+
+
+def _parse_date(value):
+    try:
+        date = parse_date(value) if isinstance(value, str) else None
+    except ValueError:
+        date = None
+    if date is None:
+        raise SyncError(f"Invalid date '{value}'")
+    return date
+
+
+def _parse_check_in_time(value, status_val):
+    if not value or status_val == 'absent':
+        return None
+    try:
+        check_in_time = parse_time(value) if isinstance(value, str) else None
+    except ValueError:
+        check_in_time = None
+    if check_in_time is None:
+        raise SyncError(f"Invalid check_in_time '{value}'")
+    return check_in_time
+
+
+def _expand_operations(operations, classes, now):
+    """
+    Flatten single operations and class bitstrings into marks.
+
+    Returns (units, errors): units maps an operation id to its list of
+    {'student_id', 'date', 'status', 'check_in_time', 'remarks',
+    'recorded_at'} marks; a class is one unit with a mark per student.
+    """
+    units, errors = {}, []
+
+    for operation in operations:
+        try:
+            op_id = _parse_operation_id(operation.get('id'))
+            status_val = operation.get('status')
+            if status_val not in CLASS_STATUS_CODES.values():
+                raise SyncError(f"Invalid status '{status_val}'")
+            units[op_id] = [{
+                'student_id': _parse_student_id(operation.get('student_id')),
+                'date': _parse_date(operation.get('date')),
+                'status': status_val,
+                'check_in_time': _parse_check_in_time(operation.get('check_in_time'), status_val),
+                'remarks': operation.get('remarks'),
+                'recorded_at': _parse_recorded_at(operation.get('recorded_at'), now),
+            }]
+        except SyncError as e:
+            errors.append({'id': operation.get('id'), 'error': str(e)})
+
+    for class_op in classes:
+        try:
+            op_id = _parse_operation_id(class_op.get('id'))
+            date = _parse_date(class_op.get('date'))
+            recorded_at = _parse_recorded_at(class_op.get('recorded_at'), now)
+            student_ids = class_op.get('student_ids')
+            statuses = class_op.get('statuses')
+            if not isinstance(student_ids, list):
+                raise SyncError('student_ids must be a list')
+            if not isinstance(statuses, str):
+                raise SyncError('statuses must be a string')
+            student_ids = [_parse_student_id(student_id) for student_id in student_ids]
+            if len(statuses) != len(student_ids):
+                raise SyncError('statuses must have one character per student')
+            if set(statuses) - set(CLASS_STATUS_CODES) - {CLASS_SKIP_CODE}:
+                raise SyncError(f"statuses may only contain {''.join(CLASS_STATUS_CODES)}{CLASS_SKIP_CODE}")
+            units[op_id] = [
+                {
+                    'student_id': student_id,
+                    'date': date,
+                    'status': CLASS_STATUS_CODES[code],
+                    'check_in_time': None,
+                    'remarks': None,
+                    'recorded_at': recorded_at,
+                }
+                for student_id, code in zip(student_ids, statuses)
+                if code != CLASS_SKIP_CODE
+            ]
+        except SyncError as e:
+            errors.append({'id': class_op.get('id'), 'error': str(e)})
+
+    return units, errors
+
+
+def apply_sync_operations(course, user, operations=(), classes=()):
+    """
+    Apply a batch of offline attendance operations in one transaction.
+
+    Operations carry client-generated UUIDs: one that was already applied
+    is reported as a duplicate and skipped, so a client can resend a batch
+    whose response it never received, for up to OPERATION_RETENTION. Conflicts are resolved by
+    recorded_at, latest wins: within the batch, and against the stored
+    mark, which is left alone (and the operation reported stale) when it
+    was recorded later. The winning marks are written with one upsert.
+
+    Returns {'applied', 'duplicates', 'stale', 'errors'}; the first three
+    list operation ids, errors lists {'id', 'error'}. A class counts as
+    applied when any of its marks was written.
+    """
+    marks = len(operations) + sum(
+        len(class_op['student_ids']) for class_op in classes if isinstance(class_op.get('student_ids'), list)
+    )
+    if marks > MAX_OPERATIONS:
+        raise SyncError(f'A sync batch may hold at most {MAX_OPERATIONS} marks')
+
+    now = timezone.now()
+    units, errors = _expand_operations(operations, classes, now)
+
+    duplicates = set(AttendanceSyncOperation.objects.filter(id__in=list(units)).values_list('id', flat=True))
+    for op_id in duplicates:
+        del units[op_id]
+
+    # Students are checked as bulk_update_attendance checks them, plus their course, with one query
+    students = {
+        student_id: (center_id, course_id)
+        for student_id, center_id, course_id in Student.objects.filter(
+            id__in={mark['student_id'] for marks in units.values() for mark in marks}
+        ).values_list('id', 'center_id', 'course_id')
+    }
+    for op_id, marks in list(units.items()):
+        for mark in marks:
+            student_id = mark['student_id']
+            if student_id not in students:
+                error = f"Student with ID {student_id} not found"
+            elif user.center_id and students[student_id][0] != user.center_id:
+                error = f"Student {student_id} does not belong to your center"
+            elif students[student_id][1] != course.id:
+                error = f"Student {student_id} is not enrolled in this course"
+            else:
+                continue
+            errors.append({'id': str(op_id), 'error': error})
+            del units[op_id]
+            break
+
+    # Latest recorded_at per (student, date) within the batch
+    winners = {}
+    for op_id, marks in units.items():
+        for mark in marks:
+            key = (mark['student_id'], mark['date'])
+            if key not in winners or mark['recorded_at'] >= winners[key][1]['recorded_at']:
+                winners[key] = (op_id, mark)
+
+    applied_units = set()
+    with transaction.atomic():
+        existing = {
+            (row['student_id'], row['date']): row
+            for row in Attendance.objects.select_for_update().filter(
+                course=course,
+                student_id__in={student_id for student_id, _ in winners},
+                date__in={date for _, date in winners}
+            ).values('student_id', 'date', 'status', 'recorded_at')
+        }
+
+        rows, changes = [], defaultdict(list)
+        for key, (op_id, mark) in winners.items():
+            current = existing.get(key)
+            if current is not None and current['recorded_at'] > mark['recorded_at']:
+                continue
+            applied_units.add(op_id)
+            rows.append(Attendance(course=course, recorded_by=user, **mark))
+            changes[mark['date']].append((mark['student_id'], current['status'] if current else None, mark['status']))
+
+        Attendance.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['student', 'course', 'date'],
+            update_fields=['status', 'check_in_time', 'remarks', 'recorded_by', 'recorded_at', 'updated_at'],
+            batch_size=500
+        )
+        for date, date_changes in changes.items():
+            apply_status_changes(course.id, date, date_changes)
+
+        AttendanceSyncOperation.objects.bulk_create(
+            [
+                AttendanceSyncOperation(
+                    id=op_id,
+                    course=course,
+                    recorded_by=user,
+                    outcome='applied' if op_id in applied_units else 'stale'
+                )
+                for op_id in units
+            ],
+            ignore_conflicts=True,
+            batch_size=500
+        )
+
+    return {
+        'applied': [str(op_id) for op_id in units if op_id in applied_units],
+        'duplicates': [str(op_id) for op_id in duplicates],
+        'stale': [str(op_id) for op_id in units if op_id not in applied_units],
+        'errors': errors,
+    }
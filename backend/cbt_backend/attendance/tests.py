@@ -1,3 +1,636 @@
+import datetime
+import os
+import shutil
+import tempfile
+import uuid
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.db import OperationalError
+from django.db.models import F
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from centers.models import Center
+from courses.models import Course
+from reports.render_pool import render_to_file
+from students.models import Student, Batch
+from students.qr import encode_student_qr
+from users.models import User
+from .artifacts import data_version, get_report
+from .models import (
+    Attendance, AttendanceReport, AttendanceSummary, AttendanceSyncOperation, RosterVersion, StudentAttendanceSummary
+)
+from .renderers import read_spooled_records, spool_records
+from .rosters import get_course_roster
+from .scans import ScanBuffer
+from .summaries import (
+    SUMMARY_FIELDS, STUDENT_SUMMARY_FIELDS, apply_status_changes, rebuild_student_summaries, rebuild_summaries,
+    verify_student_summaries, verify_summaries
+)
+
+
+def create_student(index, center, course, batch, **fields):
+    values = {
+        'full_name_english': f'Student {index}',
+        'name_with_initials': f'S. {index}',
+        'gender': 'Male',
+        'date_of_birth': datetime.date(2000, 1, 1),
+        'nic_id': f'2000{index:08d}',
+        'district': 'Colombo',
+        'divisional_secretariat': 'Colombo',
+        'grama_niladhari_division': 'Colombo',
+        'village': 'Colombo',
+        'mobile_no': '0771234567',
+        'center': center,
+        'course': course,
+        'batch': batch,
+    }
+    values.update(fields)
+    return Student.objects.create(**values)
+
+
+class AttendanceSummaryTests(TestCase):
+    """Summaries shifted by apply_status_changes match a recount from the attendance rows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='instructor', email='instructor@example.com', role='instructor')
+        cls.center = Center.objects.create(name='Colombo Center', district='Colombo')
+        cls.course = Course.objects.create(name='Web Development', code='WEB01', district='Colombo', center=cls.center)
+        cls.batch = Batch.objects.create(batch_code='01', batch_name='1st Batch')
+        cls.students = [create_student(index, cls.center, cls.course, cls.batch) for index in range(4)]
+        cls.days = [datetime.date(2024, 5, day) for day in (6, 7, 8)]
+
+    def mark(self, student, date, status):
+        """Create, change or delete (status None) one attendance row and apply the change to the summaries"""
+        attendance = Attendance.objects.filter(student=student, course=self.course, date=date).first()
+        old_status = attendance.status if attendance else None
+        if status is None:
+            attendance.delete()
+        elif attendance is None:
+            Attendance.objects.create(
+                student=student, course=self.course, date=date, status=status, recorded_by=self.user
+            )
+        else:
+            Attendance.objects.filter(pk=attendance.pk).update(status=status)
+        apply_status_changes(self.course.id, date, [(student.id, old_status, status)])
+
+    def snapshot(self):
+        summaries = {
+            summary['date']: summary
+            for summary in AttendanceSummary.objects.filter(course=self.course).values('date', *SUMMARY_FIELDS)
+        }
+        students = {
+            summary['student_id']: summary
+            for summary in StudentAttendanceSummary.objects.filter(course=self.course).values(
+                'student_id', *STUDENT_SUMMARY_FIELDS
+            )
+        }
+        return summaries, students
+
+    def assertMatchesRebuild(self):
+        self.assertEqual(verify_summaries(self.days[0], self.days[-1]), [])
+        self.assertEqual(verify_student_summaries(self.course.id), [])
+
+        summaries, students = self.snapshot()
+        rebuild_summaries(self.days[0], self.days[-1])
+        rebuild_student_summaries(self.course.id)
+        rebuilt_summaries, rebuilt_students = self.snapshot()
+
+        self.assertEqual(set(summaries), set(rebuilt_summaries))
+        for date, summary in summaries.items():
+            for field in SUMMARY_FIELDS:
+                self.assertAlmostEqual(summary[field], rebuilt_summaries[date][field], msg=f'{date} {field}')
+        self.assertEqual(students, rebuilt_students)
+
+    def test_deltas_match_rebuild(self):
+        first, second, third, fourth = self.students
+        for date in self.days:
+            self.mark(first, date, 'present')
+            self.mark(second, date, 'late')
+            self.mark(third, date, 'absent')
+        self.mark(fourth, self.days[0], 'present')
+        self.assertMatchesRebuild()
+
+        # Status changes, a removal of the latest day and a removal of a student's only row
+        self.mark(first, self.days[1], 'absent')
+        self.mark(second, self.days[0], 'present')
+        self.mark(third, self.days[2], None)
+        self.mark(fourth, self.days[0], None)
+        self.mark(third, self.days[1], 'late')
+        self.assertMatchesRebuild()
+
+        self.assertEqual(StudentAttendanceSummary.objects.get(student=third).last_date, self.days[1])
+        self.assertFalse(StudentAttendanceSummary.objects.filter(student=fourth).exists())
+
+    def test_batched_changes_match_rebuild(self):
+        date = self.days[0]
+        Attendance.objects.bulk_create([
+            Attendance(student=student, course=self.course, date=date, status='present', recorded_by=self.user)
+            for student in self.students
+        ])
+        apply_status_changes(self.course.id, date, [(student.id, None, 'present') for student in self.students])
+        self.assertMatchesRebuild()
+
+        Attendance.objects.filter(student__in=self.students[:2], date=date).update(status='late')
+        Attendance.objects.filter(student=self.students[2], date=date).delete()
+        apply_status_changes(self.course.id, date, [
+            (self.students[0].id, 'present', 'late'),
+            (self.students[1].id, 'present', 'late'),
+            (self.students[2].id, 'present', None),
+            (self.students[3].id, 'present', 'present'),
+        ])
+        self.assertMatchesRebuild()
+
+        summary = AttendanceSummary.objects.get(course=self.course, date=date)
+        self.assertEqual((summary.total_students, summary.present_count, summary.late_count), (3, 1, 2))
+
+
+    def test_update_is_rolled_back_when_the_summary_fails(self):
+        self.mark(self.students[0], self.days[0], 'present')
+        attendance = Attendance.objects.get(student=self.students[0], date=self.days[0])
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with mock.patch('attendance.views.record_status_change', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                client.patch(
+                    f'/api/attendance/attendance/{attendance.id}/?date={self.days[0].isoformat()}',
+                    {'status': 'late'}, format='json'
+                )
+
+        self.assertEqual(Attendance.objects.get(pk=attendance.pk).status, 'present')
+        self.assertMatchesRebuild()
+
+class RosterCacheTests(TestCase):
+    """A cached roster is rebuilt once its course's RosterVersion moves, whichever process moved it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.center = Center.objects.create(name='Colombo Center', district='Colombo')
+        cls.course = Course.objects.create(name='Web Development', code='WEB01', district='Colombo', center=cls.center)
+        cls.batch = Batch.objects.create(batch_code='01', batch_name='1st Batch')
+
+    def setUp(self):
+        cache.clear()
+
+    def roster_ids(self):
+        return [student['id'] for student in get_course_roster(self.course.id)]
+
+    def test_saved_student_invalidates_roster(self):
+        first = create_student(0, self.center, self.course, self.batch, enrollment_status='Enrolled')
+        self.assertEqual(self.roster_ids(), [first.id])
+
+        second = create_student(1, self.center, self.course, self.batch, enrollment_status='Enrolled')
+        self.assertEqual(sorted(self.roster_ids()), [first.id, second.id])
+
+        second.enrollment_status = 'Dropped'
+        second.save()
+        self.assertEqual(self.roster_ids(), [first.id])
+
+    def test_version_bumped_elsewhere_invalidates_cached_roster(self):
+        student = create_student(0, self.center, self.course, self.batch, enrollment_status='Enrolled')
+        self.assertEqual(self.roster_ids(), [student.id])
+
+        # Another process changes the roster; only the shared version tells this one
+        Student.objects.filter(pk=student.pk).update(enrollment_status='Dropped')
+        self.assertEqual(self.roster_ids(), [student.id])
+        RosterVersion.objects.filter(course=self.course).update(version=F('version') + 1)
+        self.assertEqual(self.roster_ids(), [])
+
+
+class ScanBufferTests(TestCase):
+    """Failed flushes keep scans only while the database is unavailable"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='instructor', email='instructor@example.com', role='instructor')
+        cls.center = Center.objects.create(name='Colombo Center', district='Colombo')
+        cls.course = Course.objects.create(name='Web Development', code='WEB01', district='Colombo', center=cls.center)
+        cls.batch = Batch.objects.create(batch_code='01', batch_name='1st Batch')
+        cls.students = [
+            create_student(index, cls.center, cls.course, cls.batch, enrollment_status='Enrolled') for index in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.buffer = ScanBuffer()
+        # Flush in the test's thread and connection only
+        self.buffer._ensure_thread = lambda: None
+        for student in self.students:
+            self.assertEqual(self.buffer.submit(self.course.id, self.user.id, student_id=student.id)[0], 'accepted')
+
+    def present_ids(self):
+        return set(Attendance.objects.filter(course=self.course).values_list('student_id', flat=True))
+
+    def test_failing_scan_is_dropped_and_the_rest_written(self):
+        write = self.buffer._write
+        bad_id = self.students[1].id
+
+        def failing_write(pending):
+            if any(student_id == bad_id for student_id, _, _ in pending):
+                raise ValueError('bad row')
+            write(pending)
+
+        with mock.patch.object(self.buffer, '_write', side_effect=failing_write):
+            with self.assertLogs('attendance.scans', 'WARNING') as logs:
+                self.assertEqual(self.buffer.flush(), 2)
+        self.assertIn('Dropping attendance scan', logs.output[-1])
+
+        self.assertEqual(self.present_ids(), {self.students[0].id, self.students[2].id})
+        self.assertEqual(self.buffer._pending, {})
+
+    def test_locked_database_keeps_scans_for_next_flush(self):
+        with mock.patch.object(self.buffer, '_write', side_effect=OperationalError('database is locked')):
+            with self.assertLogs('attendance.scans', 'WARNING'):
+                self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(len(self.buffer._pending), 3)
+
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(self.present_ids(), {student.id for student in self.students})
+        self.assertEqual(StudentAttendanceSummary.objects.filter(course=self.course, present_count=1).count(), 3)
+
+
+class ScanQRAttendanceTests(TestCase):
+    """Signed ID card codes are accepted; unsigned legacy codes only until their transition date"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.center = Center.objects.create(name='Colombo Center', district='Colombo')
+        cls.user = User.objects.create(
+            username='instructor', email='instructor@example.com', role='instructor', center=cls.center
+        )
+        cls.course = Course.objects.create(
+            name='Web Development', code='WEB01', district='Colombo', center=cls.center, instructor=cls.user
+        )
+        cls.batch = Batch.objects.create(batch_code='01', batch_name='1st Batch')
+        cls.student = create_student(0, cls.center, cls.course, cls.batch, enrollment_status='Enrolled')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.buffer = ScanBuffer()
+        self.buffer._ensure_thread = lambda: None
+        patcher = mock.patch('attendance.views.scan_buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def scan(self, qr_data):
+        return self.client.post(
+            '/api/attendance/scan-qr/', {'qr_data': qr_data, 'course_id': self.course.id}, format='json'
+        )
+
+    def buffer_pending(self):
+        return len(self.buffer._pending)
+
+    def legacy_code(self):
+        return f'{{"student_id": {self.student.id}}}'
+
+    def test_signed_code_is_accepted(self):
+        response = self.scan(encode_student_qr(self.student.id, self.student.registration_no))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['student']['id'], self.student.id)
+        # Acknowledged as queued; nothing is written until the buffer flushes
+        self.assertEqual(response.json()['attendance'], {
+            'status': 'present', 'duplicate': False, 'queued': True, 'recorded': False
+        })
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertTrue(Attendance.objects.filter(student=self.student, course=self.course).exists())
+
+    def test_only_the_course_instructor_may_scan(self):
+        code = encode_student_qr(self.student.id, self.student.registration_no)
+        for username, role in (('other', 'instructor'), ('manager', 'district_manager')):
+            self.client.force_authenticate(User.objects.create(
+                username=username, email=f'{username}@example.com', role=role, center=self.center
+            ))
+            self.assertEqual(self.scan(code).status_code, 403)
+        self.assertEqual(self.buffer_pending(), 0)
+
+    def test_legacy_code_is_rejected_by_default(self):
+        self.assertEqual(self.scan(self.legacy_code()).status_code, 400)
+
+    def test_legacy_code_is_accepted_and_logged_until_transition_ends(self):
+        today = datetime.date.today()
+        with mock.patch('students.qr.ACCEPT_LEGACY_CODES_UNTIL', today + datetime.timedelta(days=1)):
+            with self.assertLogs('attendance.views', 'WARNING') as logs:
+                self.assertEqual(self.scan(self.legacy_code()).status_code, 200)
+        self.assertIn(f'legacy QR code for student {self.student.id}', logs.output[0])
+
+        with mock.patch('students.qr.ACCEPT_LEGACY_CODES_UNTIL', today - datetime.timedelta(days=1)):
+            self.assertEqual(self.scan(self.legacy_code()).status_code, 400)
+
+
+class OfflineSyncTests(TestCase):
+    """Roster deltas and replayed, conflicting attendance operations from offline clients"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.center = Center.objects.create(name='Colombo Center', district='Colombo')
+        cls.user = User.objects.create(
+            username='instructor', email='instructor@example.com', role='instructor', center=cls.center
+        )
+        cls.course = Course.objects.create(
+            name='Web Development', code='WEB01', district='Colombo', center=cls.center, instructor=cls.user
+        )
+        cls.other_course = Course.objects.create(name='Welding', code='WLD01', district='Colombo', center=cls.center)
+        cls.batch = Batch.objects.create(batch_code='01', batch_name='1st Batch')
+        cls.students = [
+            create_student(index, cls.center, cls.course, cls.batch, enrollment_status='Enrolled') for index in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def roster(self, cursor=None):
+        params = {'cursor': cursor} if cursor else {}
+        response = self.client.get(f'/api/attendance/sync/course/{self.course.id}/roster/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def sync(self, operations=(), classes=()):
+        response = self.client.post(
+            f'/api/attendance/sync/course/{self.course.id}/attendance/',
+            {'operations': list(operations), 'classes': list(classes)},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def operation(self, student, status, recorded_at, date=datetime.date(2024, 5, 6)):
+        return {
+            'id': str(uuid.uuid4()),
+            'student_id': student.id,
+            'date': date.isoformat(),
+            'status': status,
+            'recorded_at': recorded_at.isoformat(),
+        }
+
+    def test_full_roster_reads_the_database_not_the_cache(self):
+        get_course_roster(self.course.id)
+        # A change that bypasses the signals, and so the roster cache
+        Student.objects.filter(pk=self.students[0].pk).update(enrollment_status='Dropped')
+
+        roster = self.roster()
+        self.assertTrue(roster['full'])
+        self.assertEqual(
+            sorted(student['id'] for student in roster['students']), [student.id for student in self.students[1:]]
+        )
+
+    def test_delta_since_cursor_lists_changes_and_tombstones(self):
+        Student.objects.update(updated_at=timezone.now() - datetime.timedelta(hours=1))
+        cursor = self.roster()['cursor']
+        unchanged, renamed, dropped, moved, deleted = self.students
+
+        renamed.full_name_english = 'Renamed Student'
+        renamed.save()
+        dropped.enrollment_status = 'Dropped'
+        dropped.save()
+        moved.course = self.other_course
+        moved.save()
+        deleted_id = deleted.id
+        deleted.delete()
+        joined = create_student(5, self.center, self.course, self.batch, enrollment_status='Enrolled')
+
+        delta = self.roster(cursor)
+        self.assertFalse(delta['full'])
+        self.assertEqual(sorted(student['id'] for student in delta['students']), sorted([renamed.id, joined.id]))
+        self.assertEqual(delta['removed'], sorted([dropped.id, moved.id, deleted_id]))
+        self.assertNotIn(unchanged.id, delta['removed'])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(f'/api/attendance/sync/course/{self.course.id}/roster/', {'cursor': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_replayed_operations_are_applied_once(self):
+        recorded_at = timezone.now() - datetime.timedelta(hours=1)
+        operations = [self.operation(self.students[0], 'present', recorded_at)]
+        classes = [{
+            'id': str(uuid.uuid4()),
+            'date': '2024-05-06',
+            'recorded_at': recorded_at.isoformat(),
+            'student_ids': [student.id for student in self.students[1:3]],
+            'statuses': 'AL',
+        }]
+
+        first = self.sync(operations, classes)
+        self.assertEqual(sorted(first['applied']), sorted([operations[0]['id'], classes[0]['id']]))
+
+        replay = self.sync(operations, classes)
+        self.assertEqual(replay['applied'], [])
+        self.assertEqual(sorted(replay['duplicates']), sorted([operations[0]['id'], classes[0]['id']]))
+        self.assertEqual(Attendance.objects.filter(course=self.course).count(), 3)
+        summary = AttendanceSummary.objects.get(course=self.course, date=datetime.date(2024, 5, 6))
+        self.assertEqual((summary.total_students, summary.present_count, summary.absent_count), (3, 1, 1))
+
+    def test_latest_recorded_at_wins(self):
+        student = self.students[0]
+        now = timezone.now()
+        first = self.operation(student, 'present', now - datetime.timedelta(hours=2))
+        self.assertEqual(self.sync([first])['applied'], [first['id']])
+
+        # Recorded earlier than the stored mark: left alone
+        older = self.operation(student, 'absent', now - datetime.timedelta(hours=3))
+        self.assertEqual(self.sync([older])['stale'], [older['id']])
+
+        # Within one batch the later mark wins, whatever the order
+        later = self.operation(student, 'late', now - datetime.timedelta(minutes=10))
+        earlier = self.operation(student, 'absent', now - datetime.timedelta(hours=1))
+        result = self.sync([later, earlier])
+        self.assertEqual(result['applied'], [later['id']])
+        self.assertEqual(result['stale'], [earlier['id']])
+
+        self.assertEqual(Attendance.objects.get(student=student, course=self.course).status, 'late')
+        self.assertEqual(verify_student_summaries(self.course.id), [])
+
+    def test_class_student_ids_must_be_a_list(self):
+        class_op = {'id': str(uuid.uuid4()), 'date': '2024-05-06', 'student_ids': '12', 'statuses': 'PP'}
+        result = self.sync(classes=[class_op])
+        self.assertEqual(result['errors'], [{'id': class_op['id'], 'error': 'student_ids must be a list'}])
+        self.assertFalse(Attendance.objects.exists())
+
+
+    def test_marks_for_students_of_another_course_are_rejected(self):
+        outsider = create_student(9, self.center, self.other_course, self.batch, enrollment_status='Enrolled')
+        recorded_at = timezone.now() - datetime.timedelta(hours=1)
+        operation = self.operation(outsider, 'present', recorded_at)
+        class_op = {
+            'id': str(uuid.uuid4()),
+            'date': '2024-05-06',
+            'recorded_at': recorded_at.isoformat(),
+            'student_ids': [self.students[0].id, outsider.id],
+            'statuses': 'PP',
+        }
+
+        result = self.sync([operation], [class_op])
+        error = f"Student {outsider.id} is not enrolled in this course"
+        self.assertEqual(result['errors'], [{'id': operation['id'], 'error': error}, {'id': class_op['id'], 'error': error}])
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_old_operation_ids_are_purged(self):
+        old = self.operation(self.students[0], 'present', timezone.now() - datetime.timedelta(hours=1))
+        self.sync([old])
+        AttendanceSyncOperation.objects.update(applied_at=timezone.now() - datetime.timedelta(days=365))
+
+        recent = self.operation(self.students[1], 'present', timezone.now() - datetime.timedelta(hours=1))
+        self.sync([recent])
+        self.assertEqual(list(AttendanceSyncOperation.objects.values_list('id', flat=True)), [uuid.UUID(recent['id'])])
+
+class AttendanceReportTests(TestCase):
+    """Stored reports follow the server-side write stamp and are rendered once per data version"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='instructor', email='instructor@example.com', role='instructor')
+        cls.center = Center.objects.create(name='Colombo Center', district='Colombo')
+        cls.course = Course.objects.create(name='Web Development', code='WEB01', district='Colombo', center=cls.center)
+        cls.batch = Batch.objects.create(batch_code='01', batch_name='1st Batch')
+        cls.students = [create_student(index, cls.center, cls.course, cls.batch) for index in range(3)]
+        cls.date = datetime.date(2024, 5, 6)
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        patcher = mock.patch.object(AttendanceReport._meta.get_field('file'), 'storage', FileSystemStorage(root))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.renders = []
+
+    def mark(self, student, status='present', recorded_at=None):
+        return Attendance.objects.create(
+            student=student, course=self.course, date=self.date, status=status, recorded_by=self.user,
+            recorded_at=recorded_at or timezone.now()
+        )
+
+    def render(self, start_date, end_date):
+        self.renders.append((start_date, end_date))
+        return f'report {len(self.renders)}'.encode(), 'report.pdf'
+
+    def get_report(self):
+        return get_report(self.course, 'custom', self.date, self.date, 'pdf', self.render, self.user)
+
+    def test_version_moves_when_client_time_is_older(self):
+        now = timezone.now()
+        self.mark(self.students[0], recorded_at=now)
+        self.mark(self.students[1], recorded_at=now - datetime.timedelta(hours=2))
+        version = data_version(self.course.id, self.date, self.date)
+
+        # Delete one mark and add one recorded offline earlier: same count, same latest recorded_at
+        Attendance.objects.filter(student=self.students[1]).delete()
+        self.mark(self.students[2], recorded_at=now - datetime.timedelta(hours=3))
+        self.assertNotEqual(data_version(self.course.id, self.date, self.date), version)
+
+    def test_report_is_rendered_once_per_version(self):
+        self.mark(self.students[0])
+        report, created = self.get_report()
+        self.assertTrue(created)
+        self.assertEqual((report.status, report.file.read()), ('ready', b'report 1'))
+        report.file.close()
+
+        self.assertEqual(self.get_report(), (report, False))
+        self.assertEqual(len(self.renders), 1)
+
+        self.mark(self.students[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            replacement, created = self.get_report()
+        self.assertTrue(created)
+        self.assertEqual(len(self.renders), 2)
+        self.assertEqual(list(AttendanceReport.objects.values_list('id', flat=True)), [replacement.id])
+        self.assertFalse(replacement.file.storage.exists(report.file.name))
+
+    def test_failed_render_releases_claim(self):
+        self.mark(self.students[0])
+
+        def failing_render(start_date, end_date):
+            raise ValueError('render failed')
+
+        with self.assertRaises(ValueError):
+            get_report(self.course, 'custom', self.date, self.date, 'pdf', failing_render, self.user)
+        self.assertFalse(AttendanceReport.objects.exists())
+
+    def test_reports_render_from_spooled_records(self):
+        records = [
+            {
+                'student_name': f'Student {index}',
+                'student_nic': f'2000{index:08d}',
+                'student_email': None,
+                'date': self.date,
+                'status': 'present',
+                'check_in_time': datetime.time(8, 30),
+                'remarks': None,
+                'recorded_by': 'Instructor',
+                'recorded_at': timezone.now(),
+            }
+            for index in range(5)
+        ]
+        records_path = spool_records(iter(records), chunk_size=2)
+        self.addCleanup(os.unlink, records_path)
+        self.assertEqual(list(read_spooled_records(records_path)), records)
+
+        summary = {'total_students': 5, 'total_records': 5, 'present_count': 5, 'absent_count': 0, 'late_count': 0}
+        for format_type, magic in (('pdf', b'%PDF'), ('excel', b'PK')):
+            path, file_name = render_to_file(f'attendance_{format_type}', {
+                'course': {'name': self.course.name, 'code': self.course.code},
+                'period': 'custom',
+                'start_date': self.date,
+                'end_date': self.date,
+                'summary': summary,
+                'records_path': records_path,
+            })
+            self.addCleanup(os.unlink, path)
+            with open(path, 'rb') as output:
+                self.assertEqual(output.read(len(magic)), magic)
+            self.assertTrue(file_name.startswith(f'attendance_report_{self.course.code}_custom_'))
+
+    def test_pending_claim_is_answered_at_once_then_taken_over_when_stale(self):
+        self.mark(self.students[0])
+        claim = AttendanceReport.objects.create(
+            course=self.course, period='custom', start_date=self.date, end_date=self.date, format='pdf',
+            data_version=data_version(self.course.id, self.date, self.date), status='pending'
+        )
+
+        report, created = self.get_report()
+        self.assertEqual((report.id, report.status, created), (claim.id, 'pending', False))
+        self.assertEqual(self.renders, [])
+
+        AttendanceReport.objects.filter(pk=claim.pk).update(created_at=timezone.now() - datetime.timedelta(hours=1))
+        with self.assertLogs('attendance.artifacts', 'WARNING'):
+            report, created = self.get_report()
+
+        self.assertTrue(created)
+        self.assertEqual(len(self.renders), 1)
+        self.assertEqual(list(AttendanceReport.objects.values_list('id', 'status')), [(report.id, 'ready')])
+
+    def test_pending_report_is_accepted_with_its_id_to_poll(self):
+        Course.objects.filter(pk=self.course.pk).update(instructor=self.user)
+        self.mark(self.students[0])
+        claim = AttendanceReport.objects.create(
+            course=self.course, period='custom', start_date=self.date, end_date=self.date, format='pdf',
+            data_version=data_version(self.course.id, self.date, self.date), status='pending'
+        )
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.post('/api/attendance/reports/generate/', {
+            'course_id': self.course.id, 'period': 'custom', 'format': 'pdf',
+            'start_date': self.date.isoformat(), 'end_date': self.date.isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual((response.json()['report_id'], response.json()['status']), (claim.id, 'pending'))
+
+        status_url = f'/api/attendance/reports/{claim.id}/status/'
+        self.assertEqual(client.get(status_url).json()['status'], 'pending')
+        AttendanceReport.objects.filter(pk=claim.pk).update(created_at=timezone.now() - datetime.timedelta(hours=1))
+        self.assertEqual(client.get(status_url).json()['status'], 'expired')
+        AttendanceReport.objects.filter(pk=claim.pk).update(status='ready', file_name='report.pdf')
+        self.assertEqual(client.get(status_url).json()['status'], 'ready')
 
-# Create your tests here.
+        other = User.objects.create(username='other', email='other@example.com', role='instructor')
+        client.force_authenticate(other)
+        self.assertEqual(client.get(status_url).status_code, 403)
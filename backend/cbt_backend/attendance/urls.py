@@ -13,8 +13,13 @@ urlpatterns = [
     path('course/<int:course_id>/bulk/', views.bulk_update_attendance, name='bulk-update-attendance'),
     path('summary/<int:course_id>/', views.get_attendance_summary, name='attendance-summary'),
     path('course/<int:course_id>/student-stats/', views.get_student_attendance_stats, name='student-attendance-stats'),
+    path('sync/course/<int:course_id>/roster/', views.sync_course_roster, name='sync-course-roster'),
+    path('sync/course/<int:course_id>/attendance/', views.sync_course_attendance, name='sync-course-attendance'),
+    path('register/', views.get_attendance_register, name='attendance-register'),
+    path('scan-qr/', views.scan_qr_attendance, name='scan-qr-attendance'),
     
     # Report endpoints - ONLY THESE TWO (remove the duplicates and non-existent ones)
     path('reports/generate/', views.generate_attendance_report, name='generate_attendance_report'),
+    path('reports/<int:report_id>/status/', views.attendance_report_status, name='attendance_report_status'),
     path('reports/<int:report_id>/download/', views.download_attendance_report, name='download_attendance_report'),
 ]
\ No newline at end of file
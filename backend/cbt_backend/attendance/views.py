@@ -6,23 +6,30 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from django.db.models import Q, Count, Case, When, IntegerField
+from django.utils.text import slugify
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
+from django.db import transaction
+from django.http import Http404, HttpResponse
 from datetime import datetime, timedelta
-import pandas as pd
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-import io
 import logging
+import os
 
-from .models import Attendance, AttendanceSummary
+from .artifacts import claim_expired, get_report, report_range, report_response
+from .models import Attendance, AttendanceReport, StudentAttendanceSummary
+from .renderers import spool_records
 from .serializers import AttendanceSerializer, AttendanceSummarySerializer
+from .registers import MAX_REGISTER_DAYS, build_register, register_json, register_xlsx
+from .rosters import get_course_roster
+from .scans import scan_buffer
+from .sync import SyncError, apply_sync_operations, parse_cursor, purge_old_sync_operations, roster_delta
+from .summaries import (
+    apply_status_changes, attendance_rate, count_attendance, get_summary, record_status_change
+)
 from students.models import Student
+from students.qr import InvalidQRCode, accepts_legacy_codes, resolve_student_qr
 from courses.models import Course
+from reports.render_pool import RenderBusy, render_report_file
 
 logger = logging.getLogger(__name__)
 
@@ -67,53 +74,29 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             
         return queryset.select_related('student', 'course', 'recorded_by')
     
+    # The row and the summaries it counts towards are written in one transaction, so they never disagree
     def perform_create(self, serializer):
-        serializer.save(recorded_by=self.request.user)
-        self._update_attendance_summary(serializer.instance)
+        with transaction.atomic():
+            instance = serializer.save(recorded_by=self.request.user)
+            record_status_change(instance.student_id, instance.course_id, instance.date, None, instance.status)
     
     def perform_update(self, serializer):
-        instance = serializer.save()
-        self._update_attendance_summary(instance)
+        previous = serializer.instance
+        previous = (previous.student_id, previous.course_id, previous.date, previous.status)
+        with transaction.atomic():
+            instance = serializer.save(recorded_at=timezone.now())
+            if previous[:3] == (instance.student_id, instance.course_id, instance.date):
+                record_status_change(instance.student_id, instance.course_id, instance.date, previous[3], instance.status)
+            else:
+                # Moved to another student, course or day: leave the old totals, join the new ones
+                record_status_change(*previous, None)
+                record_status_change(instance.student_id, instance.course_id, instance.date, None, instance.status)
     
-    def _update_attendance_summary(self, attendance_instance):
-        """Update attendance summary for the course and date"""
-        try:
-            summary, created = AttendanceSummary.objects.get_or_create(
-                course=attendance_instance.course,
-                date=attendance_instance.date,
-                defaults={
-                    'total_students': 0,
-                    'present_count': 0,
-                    'absent_count': 0,
-                    'late_count': 0,
-                    'attendance_rate': 0.0
-                }
-            )
-            
-            # Recalculate counts
-            attendance_data = Attendance.objects.filter(
-                course=attendance_instance.course,
-                date=attendance_instance.date
-            ).aggregate(
-                total=Count('id'),
-                present=Count(Case(When(status='present', then=1), output_field=IntegerField())),
-                absent=Count(Case(When(status='absent', then=1), output_field=IntegerField())),
-                late=Count(Case(When(status='late', then=1), output_field=IntegerField()))
-            )
-            
-            summary.total_students = attendance_data['total']
-            summary.present_count = attendance_data['present']
-            summary.absent_count = attendance_data['absent']
-            summary.late_count = attendance_data['late']
-            summary.attendance_rate = (
-                (attendance_data['present'] + attendance_data['late'] * 0.5) / 
-                attendance_data['total'] * 100
-                if attendance_data['total'] > 0 else 0
-            )
-            summary.save()
-            
-        except Exception as e:
-            logger.error(f"Error updating attendance summary: {str(e)}")
+    def perform_destroy(self, instance):
+        previous = (instance.student_id, instance.course_id, instance.date, instance.status)
+        with transaction.atomic():
+            instance.delete()
+            record_status_change(*previous, None)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -127,7 +110,7 @@ def get_course_students(request, course_id):
             try:
                 course = Course.objects.get(id=course_id, instructor=user)
                 # Additional center check
-                if user.center and course.center != user.center:
+                if user.center and course.center_id != user.center_id:
                     return Response(
                         {'error': 'You do not have permission to access this course'}, 
                         status=status.HTTP_403_FORBIDDEN
@@ -140,36 +123,31 @@ def get_course_students(request, course_id):
         else:
             course = Course.objects.get(id=course_id)
         
-        # Get enrolled students from the same center
-        students = Student.objects.filter(
-            course=course_id,
-            enrollment_status='Enrolled'
-        )
-        
-        # If user has a center, filter students by that center
-        if user.center:
-            students = students.filter(center=user.center)
+        # Enrolled students, narrowed to the user's center when they have one
+        students = get_course_roster(course.id, user.center_id)
         
-        # Get today's attendance records
+        # Today's attendance, read once and keyed by student
         today = timezone.now().date()
-        attendance_records = Attendance.objects.filter(
-            course=course_id,
-            date=today
-        )
+        attendance_records = {
+            record['student_id']: record
+            for record in Attendance.objects.filter(course=course, date=today).values(
+                'student_id', 'status', 'check_in_time', 'remarks'
+            )
+        }
         
         # Prepare response data
         student_data = []
         for student in students:
-            attendance_record = attendance_records.filter(student=student).first()
+            attendance_record = attendance_records.get(student['id'])
             student_data.append({
-                'id': student.id,
-                'name': student.full_name_english,
-                'email': student.email,
-                'phone': student.mobile_no,
-                'nic': student.nic_id,
-                'attendance_status': attendance_record.status if attendance_record else None,
-                'check_in_time': attendance_record.check_in_time if attendance_record else None,
-                'remarks': attendance_record.remarks if attendance_record else None,
+                'id': student['id'],
+                'name': student['full_name_english'],
+                'email': student['email'],
+                'phone': student['mobile_no'],
+                'nic': student['nic_id'],
+                'attendance_status': attendance_record['status'] if attendance_record else None,
+                'check_in_time': attendance_record['check_in_time'] if attendance_record else None,
+                'remarks': attendance_record['remarks'] if attendance_record else None,
             })
         
         return Response(student_data)
@@ -199,7 +177,7 @@ def bulk_update_attendance(request, course_id):
             try:
                 course = Course.objects.get(id=course_id, instructor=user)
                 # Additional center check
-                if user.center and course.center != user.center:
+                if user.center and course.center_id != user.center_id:
                     return Response(
                         {'error': 'You do not have permission to access this course'}, 
                         status=status.HTTP_403_FORBIDDEN
@@ -215,82 +193,67 @@ def bulk_update_attendance(request, course_id):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        updated_count = 0
         errors = []
+        valid_statuses = {choice for choice, _ in Attendance.ATTENDANCE_STATUS}
         
+        # One query for every referenced student; the center check happens in memory
+        requested_ids = set()
         for record in attendance_data:
             try:
-                student_id = record.get('student_id')
-                status_val = record.get('status', 'absent')
-                check_in_time = record.get('check_in_time')
-                remarks = record.get('remarks')
-                
-                # Get student and verify they belong to the same center
-                try:
-                    student = Student.objects.get(id=student_id)
-                    # Center check for students
-                    if user.center and student.center != user.center:
-                        errors.append(f"Student {student_id} does not belong to your center")
-                        continue
-                except Student.DoesNotExist:
-                    errors.append(f"Student with ID {student_id} not found")
-                    continue
-                
-                # Create or update attendance record
-                attendance, created = Attendance.objects.update_or_create(
-                    student=student,
-                    course=course,
-                    date=date,
-                    defaults={
-                        'status': status_val,
-                        'check_in_time': check_in_time if status_val != 'absent' else None,
-                        'remarks': remarks,
-                        'recorded_by': user
-                    }
-                )
-                updated_count += 1
-                logger.info(f"Updated attendance for student {student_id}: {status_val}")
-                
-            except Exception as e:
-                error_msg = f"Failed to update attendance for student {student_id}: {str(e)}"
-                errors.append(error_msg)
-                logger.error(error_msg)
-        
-        # Update summary
-        if updated_count > 0:
+                requested_ids.add(int(record.get('student_id')))
+            except (TypeError, ValueError):
+                pass
+        student_centers = dict(
+            Student.objects.filter(id__in=requested_ids).values_list('id', 'center_id')
+        )
+        
+        # Keyed by student so a repeated student keeps its last record, as sequential upserts would
+        rows = {}
+        for record in attendance_data:
+            student_id = record.get('student_id')
+            status_val = record.get('status', 'absent')
             try:
-                # Recalculate summary for this course and date
-                attendance_records = Attendance.objects.filter(
-                    course=course,
-                    date=date
-                )
-                
-                total_students = attendance_records.count()
-                present_count = attendance_records.filter(status='present').count()
-                absent_count = attendance_records.filter(status='absent').count()
-                late_count = attendance_records.filter(status='late').count()
-                
-                attendance_rate = (
-                    (present_count + late_count * 0.8) / total_students * 100
-                    if total_students > 0 else 0
+                student_id = int(student_id)
+            except (TypeError, ValueError):
+                errors.append(f"Student with ID {student_id} not found")
+                continue
+            if student_id not in student_centers:
+                errors.append(f"Student with ID {student_id} not found")
+                continue
+            if user.center and student_centers[student_id] != user.center_id:
+                errors.append(f"Student {student_id} does not belong to your center")
+                continue
+            if status_val not in valid_statuses:
+                errors.append(f"Invalid status '{status_val}' for student {student_id}")
+                continue
+            
+            rows[student_id] = Attendance(
+                student_id=student_id,
+                course=course,
+                date=date,
+                status=status_val,
+                check_in_time=record.get('check_in_time') if status_val != 'absent' else None,
+                remarks=record.get('remarks'),
+                recorded_by=user
+            )
+        
+        updated_count = len(rows)
+        if rows:
+            with transaction.atomic():
+                previous_statuses = dict(
+                    Attendance.objects.filter(course=course, date=date, student_id__in=rows)
+                    .values_list('student_id', 'status')
                 )
-                
-                # Update or create summary
-                summary, created = AttendanceSummary.objects.update_or_create(
-                    course=course,
-                    date=date,
-                    defaults={
-                        'total_students': total_students,
-                        'present_count': present_count,
-                        'absent_count': absent_count,
-                        'late_count': late_count,
-                        'attendance_rate': attendance_rate
-                    }
+                Attendance.objects.bulk_create(
+                    rows.values(),
+                    update_conflicts=True,
+                    unique_fields=['student', 'course', 'date'],
+                    update_fields=['status', 'check_in_time', 'remarks', 'recorded_by', 'recorded_at', 'updated_at']
                 )
-                logger.info(f"Updated attendance summary: {present_count} present, {absent_count} absent, {late_count} late")
-                
-            except Exception as e:
-                logger.error(f"Error updating attendance summary: {str(e)}")
+                apply_status_changes(course.id, date, [
+                    (student_id, previous_statuses.get(student_id), row.status) for student_id, row in rows.items()
+                ])
+            logger.info(f"Updated attendance for {updated_count} students in course {course.id} on {date}")
         
         response_data = {
             'message': f'Successfully updated {updated_count} attendance records',
@@ -314,6 +277,113 @@ def bulk_update_attendance(request, course_id):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync_course_roster(request, course_id):
+    """Roster changes since the client's cursor, for instructors working offline"""
+    try:
+        user = request.user
+        
+        # Verify instructor owns the course and it's in their center
+        if user.role == 'instructor':
+            try:
+                course = Course.objects.get(id=course_id, instructor=user)
+                if user.center and course.center_id != user.center_id:
+                    return Response(
+                        {'error': 'You do not have permission to access this course'}, 
+                        status=status.HTTP_403_FORBIDDEN
+                    )
+            except Course.DoesNotExist:
+                return Response(
+                    {'error': 'Course not found or you do not have permission'}, 
+                    status=status.HTTP_403_FORBIDDEN
+                )
+        else:
+            course = Course.objects.get(id=course_id)
+        
+        cursor = request.query_params.get('cursor')
+        try:
+            since = parse_cursor(cursor) if cursor else None
+        except SyncError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        delta = roster_delta(course.id, user.center_id, since)
+        delta['cursor'] = delta['cursor'].isoformat()
+        return Response(delta)
+        
+    except Course.DoesNotExist:
+        return Response({'error': 'Course not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error(f"Error syncing course roster: {str(e)}")
+        return Response(
+            {'error': 'Failed to sync roster'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def sync_course_attendance(request, course_id):
+    """
+    Apply attendance recorded offline.
+    
+    Body: {"operations": [{"id", "student_id", "date", "status", "check_in_time",
+    "remarks", "recorded_at"}], "classes": [{"id", "date", "recorded_at",
+    "student_ids", "statuses"}]}, where statuses has one of P/A/L/- per student.
+    """
+    try:
+        user = request.user
+        
+        # Same permission rules as bulk_update_attendance
+        if user.role == 'instructor':
+            try:
+                course = Course.objects.get(id=course_id, instructor=user)
+                if user.center and course.center_id != user.center_id:
+                    return Response(
+                        {'error': 'You do not have permission to access this course'}, 
+                        status=status.HTTP_403_FORBIDDEN
+                    )
+            except Course.DoesNotExist:
+                return Response(
+                    {'error': 'Course not found or you do not have permission'}, 
+                    status=status.HTTP_403_FORBIDDEN
+                )
+        else:
+            return Response(
+                {'error': 'Permission denied'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        operations = request.data.get('operations') or []
+        classes = request.data.get('classes') or []
+        if not isinstance(operations, list) or not isinstance(classes, list) or not all(
+            isinstance(entry, dict) for entry in operations + classes
+        ):
+            return Response(
+                {'error': 'operations and classes must be lists of objects'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        purge_old_sync_operations()
+        try:
+            result = apply_sync_operations(course, user, operations, classes)
+        except SyncError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        logger.info(
+            f"Attendance sync from user {user.id} for course {course.id}: {len(result['applied'])} applied, "
+            f"{len(result['duplicates'])} duplicates, {len(result['stale'])} stale, {len(result['errors'])} errors"
+        )
+        return Response(result)
+        
+    except Exception as e:
+        logger.error(f"Error in attendance sync: {str(e)}")
+        return Response(
+            {'error': 'Failed to sync attendance'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_attendance_summary(request, course_id):
@@ -346,18 +416,7 @@ def get_attendance_summary(request, course_id):
         else:
             date = timezone.now().date()
         
-        # Get or create summary
-        summary, created = AttendanceSummary.objects.get_or_create(
-            course=course,
-            date=date,
-            defaults={
-                'total_students': 0,
-                'present_count': 0,
-                'absent_count': 0,
-                'late_count': 0,
-                'attendance_rate': 0.0
-            }
-        )
+        summary = get_summary(course, date)
         
         serializer = AttendanceSummarySerializer(summary)
         return Response(serializer.data)
@@ -383,7 +442,7 @@ def get_student_attendance_stats(request, course_id):
             try:
                 course = Course.objects.get(id=course_id, instructor=user)
                 # Additional center check
-                if user.center and course.center != user.center:
+                if user.center and course.center_id != user.center_id:
                     return Response(
                         {'error': 'You do not have permission to access this course'}, 
                         status=status.HTTP_403_FORBIDDEN
@@ -409,26 +468,23 @@ def get_student_attendance_stats(request, course_id):
         if user.center:
             students = students.filter(center=user.center)
         
-        # Calculate attendance for each student
-        student_stats = []
-        for student in students:
-            # Get all attendance records for this student in this course
-            attendance_records = Attendance.objects.filter(
-                student=student,
-                course=course
+        # Running per-student totals for this course, joined to the roster in memory
+        totals = {
+            row['student_id']: row
+            for row in StudentAttendanceSummary.objects.filter(course=course).values(
+                'student_id', 'total_classes', 'present_count', 'absent_count', 'late_count', 'last_date'
             )
+        }
+        
+        student_stats = []
+        for student in students.values('id', 'full_name_english', 'email', 'mobile_no', 'nic_id', 'enrollment_status'):
+            row = totals.get(student['id'])
+            total_classes = row['total_classes'] if row else 0
+            present_classes = row['present_count'] if row else 0
+            late_classes = row['late_count'] if row else 0
             
-            total_classes = attendance_records.count()
-            if total_classes > 0:
-                present_classes = attendance_records.filter(status='present').count()
-                late_classes = attendance_records.filter(status='late').count()
-                
-                # Calculate attendance percentage (late counts as 0.8 of present)
-                attendance_percentage = round(
-                    ((present_classes + late_classes * 0.8) / total_classes) * 100, 2
-                )
-            else:
-                attendance_percentage = 0
+            # Calculate attendance percentage (late counts as LATE_WEIGHT of present)
+            attendance_percentage = round(attendance_rate(present_classes, late_classes, total_classes), 2)
             
             # Determine status based on attendance
             if attendance_percentage >= 80:
@@ -438,24 +494,20 @@ def get_student_attendance_stats(request, course_id):
             else:
                 status = 'inactive'
             
-            # Get last activity date
-            last_attendance = attendance_records.order_by('-date').first()
-            last_active = last_attendance.date if last_attendance else 'Never'
-            
             student_stats.append({
-                'id': student.id,
-                'name': student.full_name_english,
-                'email': student.email,
-                'phone': student.mobile_no,
-                'nic': student.nic_id,
+                'id': student['id'],
+                'name': student['full_name_english'],
+                'email': student['email'],
+                'phone': student['mobile_no'],
+                'nic': student['nic_id'],
                 'attendance_percentage': attendance_percentage,
                 'total_classes': total_classes,
                 'present_classes': present_classes,
                 'late_classes': late_classes,
-                'absent_classes': attendance_records.filter(status='absent').count(),
+                'absent_classes': row['absent_count'] if row else 0,
                 'status': status,
-                'last_active': last_active,
-                'enrollment_status': student.enrollment_status
+                'last_active': row['last_date'] if row and row['last_date'] else 'Never',
+                'enrollment_status': student['enrollment_status']
             })
         
         return Response(student_stats)
@@ -471,276 +523,148 @@ def get_student_attendance_stats(request, course_id):
 
 # ========== ATTENDANCE REPORT FUNCTIONS ==========
 
-def generate_report_data(course, period, start_date, end_date):
-    """Generate attendance report data"""
-    # Calculate date range based on period
-    today = timezone.now().date()
-    
-    if period == 'daily':
-        start_date = today
-        end_date = today
-    elif period == 'weekly':
-        start_date = today - timedelta(days=today.weekday())
-        end_date = today
-    elif period == 'monthly':
-        start_date = today.replace(day=1)
-        end_date = today
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_attendance_register(request):
+    """
+    Attendance register (students by class days) for a course or a whole district.
     
-    # Fetch attendance data
-    attendance_records = Attendance.objects.filter(
+    Query: course or district (instructors pass their course; district staff
+    get their own district), optional center, and month=YYYY-MM or
+    start_date/end_date (default: this month). export=xlsx returns a workbook
+    instead of the columnar JSON.
+    """
+    try:
+        user = request.user
+        params = request.query_params
+        course_id = params.get('course')
+        
+        # Scope: one course, or every course of a district
+        courses = Course.objects.all()
+        if user.role == 'instructor':
+            if not course_id:
+                return Response({'error': 'course is required'}, status=status.HTTP_400_BAD_REQUEST)
+            courses = courses.filter(instructor=user)
+            if user.center:
+                courses = courses.filter(center_id=user.center_id)
+        elif user.role in ('district_manager', 'training_officer'):
+            if not user.district:
+                return Response({'error': 'No district assigned'}, status=status.HTTP_403_FORBIDDEN)
+            courses = courses.filter(district=user.district)
+        elif user.role == 'admin':
+            if not course_id and not params.get('district'):
+                return Response({'error': 'course or district is required'}, status=status.HTTP_400_BAD_REQUEST)
+            if params.get('district'):
+                courses = courses.filter(district=params['district'])
+        else:
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        if course_id:
+            courses = courses.filter(id=course_id)
+        course_names = dict(courses.values_list('id', 'name'))
+        if course_id and not course_names:
+            return Response(
+                {'error': 'Course not found or you do not have permission'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # Date range
+        today = timezone.now().date()
+        try:
+            if params.get('start_date') or params.get('end_date'):
+                start_date, end_date = report_range('custom', params.get('start_date'), params.get('end_date'))
+            else:
+                month = datetime.strptime(params['month'], '%Y-%m').date() if params.get('month') else today.replace(day=1)
+                next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+                start_date, end_date = month, next_month - timedelta(days=1)
+        except ValueError:
+            return Response({'error': 'Invalid date range'}, status=status.HTTP_400_BAD_REQUEST)
+        if (end_date - start_date).days >= MAX_REGISTER_DAYS:
+            return Response(
+                {'error': f'A register covers at most {MAX_REGISTER_DAYS} days'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        register = build_register(list(course_names), start_date, end_date, params.get('center'))
+        
+        if params.get('export') == 'xlsx':
+            scope = course_names[int(course_id)] if course_id else (user.district or params.get('district'))
+            return register_xlsx(register, course_names).to_response(
+                f"attendance_register_{slugify(scope)}_{start_date:%Y%m%d}_{end_date:%Y%m%d}.xlsx"
+            )
+        
+        return Response({
+            'start_date': start_date,
+            'end_date': end_date,
+            'courses': course_names,
+            **register_json(register)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error building attendance register: {str(e)}")
+        return Response(
+            {'error': 'Failed to build attendance register'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+# Rows fetched per database round trip while a report is written
+REPORT_CHUNK_SIZE = 2000
+
+REPORT_RECORD_FIELDS = [
+    'student__full_name_english', 'student__nic_id', 'student__email', 'date', 'status',
+    'check_in_time', 'remarks', 'recorded_by__first_name', 'recorded_by__last_name', 'recorded_at',
+]
+
+def iter_report_records(course, start_date, end_date, chunk_size=REPORT_CHUNK_SIZE):
+    """Attendance records of the range one at a time, read in chunks of plain values"""
+    rows = Attendance.objects.filter(
         course=course,
         date__range=[start_date, end_date]
-    ).select_related('student', 'recorded_by')
+    ).order_by('-date', 'student__full_name_english', 'id').values(*REPORT_RECORD_FIELDS)
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield {
+            'student_name': row['student__full_name_english'],
+            'student_nic': row['student__nic_id'],
+            'student_email': row['student__email'],
+            'date': row['date'],
+            'status': row['status'],
+            'check_in_time': row['check_in_time'],
+            'remarks': row['remarks'],
+            'recorded_by': f"{row['recorded_by__first_name']} {row['recorded_by__last_name']}",
+            'recorded_at': row['recorded_at']
+        }
+
+def generate_report_data(course, period, start_date, end_date):
+    """
+    Generate attendance report data for a date range resolved by report_range.
     
-    # Prepare report data
-    report_data = {
+    'records' is a one-pass iterator over every record in the range, so a
+    report writer can stream them instead of holding the whole range.
+    """
+    counts = count_attendance(Attendance.objects.filter(course=course, date__range=[start_date, end_date]))
+    return {
         'course': course,
         'period': period,
         'start_date': start_date,
         'end_date': end_date,
-        'records': [],
+        'records': iter_report_records(course, start_date, end_date),
         'summary': {
             'total_students': Student.objects.filter(course=course, enrollment_status='Enrolled').count(),
-            'total_records': attendance_records.count(),
-            'present_count': attendance_records.filter(status='present').count(),
-            'absent_count': attendance_records.filter(status='absent').count(),
-            'late_count': attendance_records.filter(status='late').count(),
+            'total_records': counts['total'],
+            'present_count': counts['present'],
+            'absent_count': counts['absent'],
+            'late_count': counts['late'],
         }
     }
-    
-    # Add individual records
-    for record in attendance_records:
-        report_data['records'].append({
-            'student_name': record.student.full_name_english,
-            'student_nic': record.student.nic_id,
-            'student_email': record.student.email,
-            'date': record.date,
-            'status': record.status,
-            'check_in_time': record.check_in_time,
-            'remarks': record.remarks,
-            'recorded_by': f"{record.recorded_by.first_name} {record.recorded_by.last_name}",
-            'recorded_at': record.recorded_at
-        })
-    
-    return report_data
-
-def generate_excel_report(report_data, course, period):
-    """Generate Excel report - SIMPLIFIED VERSION"""
-    try:
-        # Create DataFrame with basic data
-        df_data = []
-        for record in report_data['records']:
-            df_data.append({
-                'Student Name': record['student_name'],
-                'NIC': record['student_nic'],
-                'Email': record['student_email'],
-                'Date': record['date'].strftime('%Y-%m-%d'),
-                'Status': record['status'].title(),
-                'Check-in Time': record['check_in_time'] or '-',
-                'Remarks': record['remarks'] or '-',
-                'Recorded By': record['recorded_by'],
-                'Recorded At': record['recorded_at'].strftime('%Y-%m-%d %H:%M')
-            })
-        
-        df = pd.DataFrame(df_data)
-        
-        # Create Excel file in memory - SIMPLIFIED APPROACH
-        output = io.BytesIO()
-        
-        # Use openpyxl which is more reliable and commonly available
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            # Main data sheet
-            df.to_excel(writer, sheet_name='Attendance Data', index=False)
-            
-            # Summary sheet
-            summary_data = {
-                'Metric': ['Total Students', 'Total Records', 'Present', 'Absent', 'Late', 'Attendance Rate'],
-                'Count': [
-                    report_data['summary']['total_students'],
-                    report_data['summary']['total_records'],
-                    report_data['summary']['present_count'],
-                    report_data['summary']['absent_count'],
-                    report_data['summary']['late_count'],
-                    f"{(report_data['summary']['present_count'] + report_data['summary']['late_count'] * 0.8) / report_data['summary']['total_records'] * 100:.1f}%" if report_data['summary']['total_records'] > 0 else '0%'
-                ]
-            }
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
-            
-            # Get the workbook and worksheets for basic formatting
-            workbook = writer.book
-            worksheet_data = writer.sheets['Attendance Data']
-            worksheet_summary = writer.sheets['Summary']
-            
-            # Basic column width adjustment
-            for col in worksheet_data.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)  # Cap at 50
-                worksheet_data.column_dimensions[column].width = adjusted_width
-            
-            for col in worksheet_summary.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 30)
-                worksheet_summary.column_dimensions[column].width = adjusted_width
-        
-        # Get the file content
-        file_content = output.getvalue()
-        output.close()
-        
-        file_name = f"attendance_report_{course.code}_{period}_{timezone.now().strftime('%Y%m%d_%H%M')}.xlsx"
-        
-        return file_content, file_name
-        
-    except Exception as e:
-        logger.error(f"Error generating Excel report: {str(e)}")
-        # Fallback: Create a very basic Excel file
-        try:
-            output = io.BytesIO()
-            
-            # Create a simple DataFrame with just the essential data
-            simple_data = []
-            for record in report_data['records'][:100]:  # Limit to 100 records for fallback
-                simple_data.append({
-                    'Student': record['student_name'],
-                    'NIC': record['student_nic'],
-                    'Date': record['date'].strftime('%Y-%m-%d'),
-                    'Status': record['status'].title()
-                })
-            
-            df_simple = pd.DataFrame(simple_data)
-            df_simple.to_excel(output, index=False, engine='openpyxl')
-            
-            file_content = output.getvalue()
-            output.close()
-            
-            file_name = f"attendance_report_{course.code}_{period}_{timezone.now().strftime('%Y%m%d_%H%M')}.xlsx"
-            
-            return file_content, file_name
-        except Exception as fallback_error:
-            logger.error(f"Fallback Excel generation also failed: {str(fallback_error)}")
-            raise e
-
-def generate_pdf_report(report_data, course, period):
-    """Generate PDF report"""
-    try:
-        # Create PDF in memory
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=1*inch)
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=30,
-            alignment=1  # Center
-        )
-        
-        # Content
-        content = []
-        
-        # Title
-        content.append(Paragraph(f"Attendance Report - {course.name}", title_style))
-        content.append(Paragraph(f"Course: {course.code} | Period: {period.title()}", styles['Heading2']))
-        content.append(Paragraph(f"Date Range: {report_data['start_date']} to {report_data['end_date']}", styles['Heading3']))
-        content.append(Spacer(1, 20))
-        
-        # Summary table
-        summary_data = [
-            ['Total Students', 'Total Records', 'Present', 'Absent', 'Late', 'Attendance Rate'],
-            [
-                str(report_data['summary']['total_students']),
-                str(report_data['summary']['total_records']),
-                str(report_data['summary']['present_count']),
-                str(report_data['summary']['absent_count']),
-                str(report_data['summary']['late_count']),
-                f"{(report_data['summary']['present_count'] + report_data['summary']['late_count'] * 0.8) / report_data['summary']['total_records'] * 100:.1f}%" if report_data['summary']['total_records'] > 0 else '0%'
-            ]
-        ]
-        
-        summary_table = Table(summary_data, colWidths=[1.2*inch]*6)
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, 1), colors.beige),
-            ('FONTSIZE', (0, 1), (-1, 1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        content.append(summary_table)
-        content.append(Spacer(1, 20))
-        
-        # Attendance data table
-        if report_data['records']:
-            data = [['Student Name', 'NIC', 'Date', 'Status', 'Check-in', 'Remarks']]
-            for record in report_data['records'][:50]:  # Limit to first 50 records
-                data.append([
-                    record['student_name'],
-                    record['student_nic'],
-                    record['date'].strftime('%Y-%m-%d'),
-                    record['status'].title(),
-                    record['check_in_time'] or '-',
-                    record['remarks'] or '-'
-                ])
-            
-            attendance_table = Table(data, repeatRows=1)
-            attendance_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('FONTSIZE', (0, 1), (-1, -1), 7),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            content.append(attendance_table)
-        
-        # Build PDF
-        doc.build(content)
-        
-        # Get file content from buffer
-        file_content = buffer.getvalue()
-        buffer.close()
-        
-        file_name = f"attendance_report_{course.code}_{period}_{timezone.now().strftime('%Y%m%d_%H%M')}.pdf"
-        
-        return file_content, file_name
-        
-    except Exception as e:
-        logger.error(f"Error generating PDF report: {str(e)}")
-        raise
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def generate_attendance_report(request):
-    """Generate attendance report in Excel or PDF format"""
+    """Generate attendance report in Excel or PDF format; unchanged data is served from the stored report"""
     try:
         data = request.data
         course_id = data.get('course_id')
         period = data.get('period')
         format_type = data.get('format')
-        start_date = data.get('start_date')
-        end_date = data.get('end_date')
         
         # Validate input
         if not all([course_id, period, format_type]):
@@ -748,33 +672,58 @@ def generate_attendance_report(request):
                 'success': False,
                 'message': 'Missing required fields: course_id, period, format'
             }, status=status.HTTP_400_BAD_REQUEST)
+        if format_type != 'excel':
+            format_type = 'pdf'
         
         # Check if user has access to this course
         course = get_object_or_404(Course, id=course_id)
-        if request.user.role != 'admin' and course.instructor != request.user:
+        if request.user.role != 'admin' and course.instructor_id != request.user.id:
             return Response({
                 'success': False,
                 'message': 'Access denied - You are not assigned to this course'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        # Generate report data
-        report_data = generate_report_data(course, period, start_date, end_date)
-        
-        # Generate file based on format
-        if format_type == 'excel':
-            file_content, file_name = generate_excel_report(report_data, course, period)
-            content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        else:  # pdf
-            file_content, file_name = generate_pdf_report(report_data, course, period)
-            content_type = 'application/pdf'
+        try:
+            start_date, end_date = report_range(period, data.get('start_date'), data.get('end_date'))
+        except ValueError as e:
+            return Response({'success': False, 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        def render(start_date, end_date):
+            # Records go to the render worker through a spool file, never as one list in memory
+            report_data = generate_report_data(course, period, start_date, end_date)
+            records_path = spool_records(report_data['records'])
+            try:
+                return render_report_file(
+                    f"attendance_{format_type}",
+                    course={'name': course.name, 'code': course.code},
+                    period=period,
+                    start_date=start_date,
+                    end_date=end_date,
+                    summary=report_data['summary'],
+                    records_path=records_path
+                )
+            finally:
+                os.unlink(records_path)
         
-        # Create response with file
-        response = HttpResponse(file_content, content_type=content_type)
-        response['Content-Disposition'] = f'attachment; filename="{file_name}"'
-        response['Content-Length'] = len(file_content)
+        report, created = get_report(course, period, start_date, end_date, format_type, render, request.user)
+        if report.status == 'pending':
+            # Another request is rendering this report; the client polls its status and downloads it once ready
+            return Response({
+                'success': True,
+                'report_id': report.id,
+                'status': report.status,
+                'message': 'Report is being generated'
+            }, status=status.HTTP_202_ACCEPTED)
+        if not created:
+            logger.info(f"Serving stored attendance report {report.id} for course {course.id}")
         
-        return response
+        return report_response(request, report)
         
+    except RenderBusy as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         logger.error(f"Failed to generate report: {str(e)}")
         return Response({
@@ -784,17 +733,66 @@ def generate_attendance_report(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def download_attendance_report(request, report_id):
-    """Download a previously generated report"""
+def attendance_report_status(request, report_id):
+    """
+    Status of a report answered with 202; download it once ready.
+
+    'expired' means the render was lost and 404 that it failed or was
+    replaced; either way the client generates the report again.
+    """
     try:
-        # This would typically retrieve a saved report from database
-        # For now, we'll generate on-demand
+        report = get_object_or_404(AttendanceReport.objects.select_related('course'), id=report_id)
+        if request.user.role != 'admin' and report.course.instructor_id != request.user.id:
+            return Response({
+                'success': False,
+                'message': 'Access denied - You are not assigned to this course'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        return Response({
+            'success': True,
+            'report_id': report.id,
+            'status': 'expired' if claim_expired(report) else report.status,
+            'file_name': report.file_name
+        })
+        
+    except Http404:
+        return Response({
+            'success': False,
+            'message': 'Report not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.error(f"Failed to fetch report status: {str(e)}")
         return Response({
             'success': False,
-            'message': 'Report download not implemented yet'
-        }, status=status.HTTP_501_NOT_IMPLEMENTED)
+            'message': f'Failed to fetch report status: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_attendance_report(request, report_id):
+    """Download a previously generated report by id"""
+    try:
+        report = get_object_or_404(AttendanceReport.objects.select_related('course'), id=report_id, status='ready')
+        if request.user.role != 'admin' and report.course.instructor_id != request.user.id:
+            return Response({
+                'success': False,
+                'message': 'Access denied - You are not assigned to this course'
+            }, status=status.HTTP_403_FORBIDDEN)
+        if not report.file.storage.exists(report.file.name):
+            return Response({
+                'success': False,
+                'message': 'Report file is no longer available; generate the report again'
+            }, status=status.HTTP_404_NOT_FOUND)
         
+        return report_response(request, report)
+        
+    except Http404:
+        return Response({
+            'success': False,
+            'message': 'Report not found'
+        }, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
+        logger.error(f"Failed to download report: {str(e)}")
         return Response({
             'success': False,
             'message': f'Failed to download report: {str(e)}'
@@ -804,79 +802,87 @@ def download_attendance_report(request, report_id):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def scan_qr_attendance(request):
-    """Scan QR code for attendance"""
+    """
+    Scan QR code for attendance.
+    
+    The scan is acknowledged as queued and written by the scan buffer
+    within ATTENDANCE_SCAN_FLUSH_INTERVAL; the response never claims it
+    is recorded yet.
+    """
     try:
         qr_data = request.data.get('qr_data')
         course_id = request.data.get('course_id')
         
         if not qr_data or not course_id:
             return Response({'error': 'Missing QR data or course ID'}, status=400)
-        
-        # Parse QR data
-        try:
-            data = json.loads(qr_data)
-        except:
+        if not isinstance(qr_data, str):
             return Response({'error': 'Invalid QR code data'}, status=400)
         
-        student_id = data.get('student_id')
-        registration_no = data.get('registration_no')
-        
-        # Find student
-        if student_id:
-            student = Student.objects.get(id=student_id)
-        elif registration_no:
-            student = Student.objects.get(registration_no=registration_no)
-        else:
-            return Response({'error': 'Student not found in QR data'}, status=404)
-        
-        # Get course
-        course = Course.objects.get(id=course_id)
+        try:
+            course_id = int(course_id)
+        except (TypeError, ValueError):
+            return Response({'error': 'Invalid course ID'}, status=400)
         
-        # Check if student is enrolled in this course
-        if student.course != course:
-            return Response({'error': 'Student is not enrolled in this course'}, status=400)
+        # Same permission rules as bulk_update_attendance: the course's instructor, within their center
+        user = request.user
+        if user.role != 'instructor':
+            return Response({'error': 'Permission denied'}, status=403)
+        course = Course.objects.filter(id=course_id, instructor=user).only('id', 'center_id').first()
+        if course is None:
+            return Response({'error': 'Course not found or you do not have permission'}, status=403)
+        if user.center_id and course.center_id != user.center_id:
+            return Response({'error': 'You do not have permission to access this course'}, status=403)
+        
+        # Signed codes are verified without the database and resolved through the student id cache
+        try:
+            student = resolve_student_qr(qr_data)
+            if student is None:
+                return Response({'error': 'Student not found'}, status=404)
+            student_id, registration_no = student['id'], None
+        except InvalidQRCode as e:
+            if not (qr_data.lstrip().startswith('{') and accepts_legacy_codes()):
+                return Response({'error': str(e)}, status=400)
+            # Cards printed before signed codes carry a JSON payload
+            try:
+                data = json.loads(qr_data)
+                student_id = int(data['student_id']) if data.get('student_id') else None
+                registration_no = data.get('registration_no')
+            except (TypeError, ValueError, AttributeError):
+                return Response({'error': 'Invalid QR code data'}, status=400)
+            if not student_id and not registration_no:
+                return Response({'error': 'Student not found in QR data'}, status=404)
+            logger.warning(
+                f"Accepted legacy QR code for student {student_id or registration_no} "
+                f"from user {request.user.id} in course {course_id}"
+            )
         
-        # Create attendance record
-        today = timezone.now().date()
-        current_time = timezone.now().time()
-        
-        # Check if already marked today
-        attendance, created = Attendance.objects.get_or_create(
-            student=student,
-            course=course,
-            date=today,
-            defaults={
-                'status': 'present',
-                'check_in_time': current_time,
-                'recorded_by': request.user
-            }
+        # Checked against the in-memory course roster, not the database
+        result, student = scan_buffer.submit(
+            course_id,
+            request.user.id,
+            student_id=student_id,
+            registration_no=registration_no
         )
-        
-        if not created:
-            # Update existing record
-            attendance.status = 'present'
-            attendance.check_in_time = current_time
-            attendance.recorded_by = request.user
-            attendance.save()
+        if result == 'not_enrolled':
+            return Response({'error': 'Student is not enrolled in this course'}, status=400)
         
         return Response({
             'success': True,
+            'message': 'Scan already queued' if result == 'duplicate' else 'Scan queued for attendance',
             'student': {
-                'id': student.id,
-                'name': student.full_name_english,
-                'registration_no': student.registration_no
+                'id': student['id'],
+                'name': student['full_name_english'],
+                'registration_no': student['registration_no']
             },
             'attendance': {
-                'id': attendance.id,
-                'status': attendance.status,
-                'check_in_time': attendance.check_in_time,
-                'created': created
+                'status': 'present',
+                'duplicate': result == 'duplicate',
+                'queued': result == 'accepted',
+                # Written by the next scan buffer flush, not by this request
+                'recorded': False
             }
         })
         
-    except Student.DoesNotExist:
-        return Response({'error': 'Student not found'}, status=404)
-    except Course.DoesNotExist:
-        return Response({'error': 'Course not found'}, status=404)
     except Exception as e:
-        return Response({'error': str(e)}, status=500)
\ No newline at end of file
+        logger.error(f"Error scanning QR attendance: {str(e)}")
+        return Response({'error': str(e)}, status=500)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import GraduatedStudent
 from students.models import Student, EducationalQualification
+from students.photos import photo_url
 
 class StudentBasicSerializer(serializers.ModelSerializer):
     """Serializer for complete student information to include in graduated student records"""
@@ -79,10 +80,9 @@ class StudentBasicSerializer(serializers.ModelSerializer):
         return obj.batch.batch_name if obj.batch else None
     
     def get_profile_photo_url(self, obj):
-        if obj.profile_photo:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.profile_photo.url)
+        request = self.context.get('request')
+        if request:
+            return photo_url(obj, 'thumb', request=request)
         return None
     
     def get_ol_results(self, obj):
@@ -281,10 +281,9 @@ class GraduatedStudentListSerializer(serializers.ModelSerializer):
         return obj.student.batch.batch_name if obj.student.batch else None
     
     def get_profile_photo_url(self, obj):
-        if obj.student.profile_photo:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.student.profile_photo.url)
+        request = self.context.get('request')
+        if request:
+            return photo_url(obj.student, 'thumb', request=request)
         return None
     
     def get_ol_results(self, obj):
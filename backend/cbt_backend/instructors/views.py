@@ -443,22 +443,36 @@ def get_instructor_list(request):
                 specialization__icontains=specialization_filter
             )
         
-        # Get pagination parameters
-        page = int(request.GET.get('page', 1))
-        page_size = int(request.GET.get('page_size', 10))
-        start = (page - 1) * page_size
-        end = start + page_size
-        
-        total_count = instructor_profiles.count()
-        paginated_profiles = instructor_profiles[start:end]
+        # Get pagination parameters. `cursor` (the last id of the previous page) pages by keyset on the
+        # primary key; the legacy `page` number is still honoured for existing clients.
+        page_size = min(int(request.GET.get('page_size', 10)), 100)
+        cursor = request.GET.get('cursor')
+        include_count = cursor is None or request.GET.get('count', '').lower() in ('1', 'true', 'yes')
+        total_count = instructor_profiles.count() if include_count else None
+        
+        instructor_profiles = instructor_profiles.prefetch_related('user__courses_teaching', 'centers')
+        if cursor is not None:
+            page = None
+            instructor_profiles = instructor_profiles.order_by('-id')
+            if cursor:
+                instructor_profiles = instructor_profiles.filter(id__lt=int(cursor))
+            paginated_profiles = list(instructor_profiles[:page_size + 1])
+            has_more = len(paginated_profiles) > page_size
+            paginated_profiles = paginated_profiles[:page_size]
+        else:
+            page = int(request.GET.get('page', 1))
+            start = (page - 1) * page_size
+            paginated_profiles = list(instructor_profiles[start:start + page_size])
+            has_more = start + page_size < total_count
+        next_cursor = str(paginated_profiles[-1].id) if has_more and paginated_profiles else None
         
         # Get courses for each instructor
         result = []
         for profile in paginated_profiles:
             instructor_data = InstructorListSerializer(profile).data
             
-            # Get courses for this instructor
-            courses = Course.objects.filter(instructor=profile.user)
+            # Get courses for this instructor (prefetched)
+            courses = profile.user.courses_teaching.all()
             instructor_data['courses'] = [
                 {
                     'id': course.id,
@@ -490,7 +504,8 @@ def get_instructor_list(request):
             'total_count': total_count,
             'page': page,
             'page_size': page_size,
-            'total_pages': (total_count + page_size - 1) // page_size,
+            'total_pages': (total_count + page_size - 1) // page_size if total_count is not None else None,
+            'next_cursor': next_cursor,
         })
         
     except Exception as e:
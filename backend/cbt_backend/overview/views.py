@@ -16,6 +16,7 @@ from graduated_students.models import GraduatedStudent
 from courses.models import Course, CourseApproval
 from approvals.models import Approval
 from attendance.models import Attendance, AttendanceSummary
+from reports.timeseries import Series, last_months, time_series
 
 logger = logging.getLogger(__name__)
 
@@ -166,23 +167,10 @@ class OverviewView(APIView):
 
     def get_district_enrollment_data(self, district):
         """Get enrollment data for specific district"""
-        enrollment_data = []
-        for i in range(5, -1, -1):
-            month_start = timezone.now().replace(day=1) - timedelta(days=30*i)
-            month_name = month_start.strftime('%b')
-            
-            monthly_students = Student.objects.filter(
-                district=district,
-                created_at__year=month_start.year,
-                created_at__month=month_start.month
-            ).count()
-            
-            enrollment_data.append({
-                'month': month_name,
-                'students': monthly_students
-            })
-        
-        return enrollment_data
+        return [
+            {'month': row['period'].strftime('%b'), 'students': row['students']}
+            for row in time_series(*last_months(6), Series(Student.objects.filter(district=district), 'created_at', students=None))
+        ]
 
     def get_district_center_performance(self, district):
         """Get center performance distribution for district"""
@@ -314,22 +302,10 @@ class OverviewView(APIView):
     # Keep the original methods for admin users
     def get_enrollment_data(self):
         """Get real enrollment data for the last 6 months"""
-        enrollment_data = []
-        for i in range(5, -1, -1):
-            month_start = timezone.now().replace(day=1) - timedelta(days=30*i)
-            month_name = month_start.strftime('%b')
-            
-            monthly_students = Student.objects.filter(
-                created_at__year=month_start.year,
-                created_at__month=month_start.month
-            ).count()
-            
-            enrollment_data.append({
-                'month': month_name,
-                'students': monthly_students
-            })
-        
-        return enrollment_data
+        return [
+            {'month': row['period'].strftime('%b'), 'students': row['students']}
+            for row in time_series(*last_months(6), Series(Student.objects.all(), 'created_at', students=None))
+        ]
 
     def get_center_performance_data(self):
         """Get real center performance distribution"""
@@ -0,0 +1,120 @@
+# reports/jobs.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import HeadOfficeReport
+
+logger = logging.getLogger(__name__)
+
+# Reports rendered at once; further submissions wait in the executor's queue
+REPORT_WORKERS = getattr(settings, 'REPORT_JOB_WORKERS', 2)
+# A job still processing this long after a worker started it was lost with the process that ran it
+REPORT_JOB_TIMEOUT = getattr(settings, 'REPORT_JOB_TIMEOUT', timedelta(minutes=30))
+# A job no worker started this long after it was queued was lost with the queue of a stopped process
+REPORT_JOB_QUEUE_TIMEOUT = getattr(settings, 'REPORT_JOB_QUEUE_TIMEOUT', timedelta(hours=1))
+# Finished reports and their files are kept this long
+REPORT_RETENTION = getattr(settings, 'REPORT_JOB_RETENTION', timedelta(days=7))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def report_storage():
+    # Outside MEDIA_ROOT: reports hold student details and are only served through the download view
+    return FileSystemStorage(
+        location=getattr(settings, 'REPORT_JOB_ROOT', settings.BASE_DIR / 'private' / 'head_office_reports')
+    )
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix='report-job')
+        return _executor
+
+
+def submit_report(report, render):
+    """
+    Queue a saved HeadOfficeReport for rendering on the background workers.
+
+    `render(report)` returns (file bytes or a file object positioned at the
+    start, file name), like the renderers get_report takes for attendance
+    reports. The job starts once the transaction that created the row
+    commits, so the worker always finds it.
+    """
+    report_id = report.pk
+    transaction.on_commit(lambda: _get_executor().submit(run_report, report_id, render))
+
+
+def run_report(report_id, render):
+    """Render one report, store the file and record the outcome on its row"""
+    close_old_connections()
+    try:
+        # Claimed with one conditional UPDATE, so a job expired while it was queued is never run
+        started = HeadOfficeReport.objects.filter(
+            pk=report_id, status='processing', started_at__isnull=True
+        ).update(started_at=timezone.now())
+        if not started:
+            return
+        report = HeadOfficeReport.objects.select_related('generated_by').get(pk=report_id)
+        try:
+            content, file_name = render(report)
+            content = ContentFile(content) if isinstance(content, bytes) else File(content)
+            try:
+                path = report_storage().save(f"{report.pk}/{file_name}", content)
+            finally:
+                content.close()
+        except Exception as e:
+            logger.error(f"Error rendering report {report_id}: {str(e)}")
+            HeadOfficeReport.objects.filter(pk=report_id).update(
+                status='failed', error=str(e)[:1000], completed_at=timezone.now()
+            )
+            return
+        HeadOfficeReport.objects.filter(pk=report_id).update(
+            status='completed', file_path=path, file_name=file_name, completed_at=timezone.now()
+        )
+    except Exception as e:
+        logger.error(f"Error running report job {report_id}: {str(e)}")
+    finally:
+        # Worker threads keep their own connection; do not leave it open between jobs
+        connection.close()
+
+
+def expire_lost_reports(queryset=None):
+    """
+    Mark lost jobs as failed; returns how many.
+
+    A started job is lost REPORT_JOB_TIMEOUT after it started, a queued one
+    REPORT_JOB_QUEUE_TIMEOUT after it was created, so time spent waiting
+    for a worker does not count against the render.
+    """
+    queryset = HeadOfficeReport.objects.all() if queryset is None else queryset
+    now = timezone.now()
+    lost = queryset.filter(status='processing').filter(
+        Q(started_at__lt=now - REPORT_JOB_TIMEOUT)
+        | Q(started_at__isnull=True, created_at__lt=now - REPORT_JOB_QUEUE_TIMEOUT)
+    )
+    return lost.update(status='failed', error='Report generation did not finish', completed_at=now)
+
+
+def purge_old_reports():
+    """Delete reports older than REPORT_RETENTION together with their files"""
+    old = HeadOfficeReport.objects.filter(created_at__lt=timezone.now() - REPORT_RETENTION)
+    paths = [path for path in old.values_list('file_path', flat=True) if path]
+    old.delete()
+    storage = report_storage()
+    for path in paths:
+        try:
+            storage.delete(path)
+        except OSError as e:
+            logger.error(f"Error deleting report file {path}: {str(e)}")
@@ -0,0 +1,109 @@
+# reports/leaderboards.py
+from datetime import timedelta
+
+from django.db.models import Count, FloatField, Q, Window
+from django.db.models.functions import Cast, NullIf, Rank
+from django.utils import timezone
+
+from centers.models import Center
+from students.models import Student
+from users.models import User
+
+# Students registered within this many days count towards a district's growth
+GROWTH_WINDOW_DAYS = 30
+
+
+def _percent(part, whole):
+    return round((part / whole * 100) if whole > 0 else 0, 1)
+
+
+def _completion_ratio(students_field, completed_field):
+    """completed / total as a float SQL expression; NULL when there are no students"""
+    return Cast(completed_field, FloatField()) / NullIf(students_field, 0)
+
+
+def district_leaderboard():
+    """
+    One row per center district, ranked by completion rate then size.
+
+    Centers, students and instructors are each counted in one GROUP BY
+    district query (students with conditional counts for completed and new
+    registrations) and joined here, so the query count does not grow with
+    the number of districts. The ranks come from RANK() windows over the
+    grouped student counts. Districts without students are listed last,
+    unranked.
+    """
+    since = timezone.now() - timedelta(days=GROWTH_WINDOW_DAYS)
+
+    centers = dict(
+        Center.objects.exclude(district__isnull=True).exclude(district='')
+        .order_by().values('district').annotate(total=Count('id')).values_list('district', 'total')
+    )
+    instructors = dict(
+        User.objects.filter(role='instructor').order_by().values('district').annotate(total=Count('id'))
+        .values_list('district', 'total')
+    )
+
+    total = Count('id')
+    completed = Count('id', filter=Q(enrollment_status='Completed'))
+    student_rows = {
+        row['district']: row
+        for row in Student.objects.filter(district__in=list(centers)).order_by().values('district').annotate(
+            students=total,
+            completed=completed,
+            new_students=Count('id', filter=Q(created_at__gte=since)),
+            rank=Window(Rank(), order_by=[_completion_ratio(total, completed).desc(nulls_last=True), total.desc()]),
+            size_rank=Window(Rank(), order_by=total.desc())
+        )
+    }
+
+    performance = []
+    for district, centers_count in centers.items():
+        row = student_rows.get(district, {})
+        students_count = row.get('students', 0)
+        performance.append({
+            'name': district,
+            'rank': row.get('rank'),
+            'size_rank': row.get('size_rank'),
+            'centers': centers_count,
+            'students': students_count,
+            'instructors': instructors.get(district, 0),
+            'completion': _percent(row.get('completed', 0), students_count),
+            'growth': _percent(row.get('new_students', 0), students_count)
+        })
+    performance.sort(key=lambda entry: (entry['rank'] is None, entry['rank'] or 0, entry['name']))
+    return performance
+
+
+def top_centers(limit=5):
+    """
+    The largest centers by enrolled students, with completion rate and instructor count.
+
+    One grouped query ranks every center by size with a RANK() window and
+    keeps the top `limit`; one more counts instructors for just those
+    centers.
+    """
+    total = Count('enrolled_students', distinct=True)
+    completed = Count('enrolled_students', distinct=True, filter=Q(enrolled_students__enrollment_status='Completed'))
+    centers = list(
+        Center.objects.annotate(
+            total_students=total,
+            completed_students=completed,
+            rank=Window(Rank(), order_by=total.desc())
+        ).order_by('-total_students', 'id').values('id', 'name', 'district', 'total_students', 'completed_students', 'rank')[:limit]
+    )
+    instructors = dict(
+        User.objects.filter(role='instructor', center_id__in=[center['id'] for center in centers])
+        .order_by().values('center_id').annotate(total=Count('id')).values_list('center_id', 'total')
+    )
+    return [
+        {
+            'name': center['name'],
+            'district': center['district'],
+            'rank': center['rank'],
+            'students': center['total_students'],
+            'instructors': instructors.get(center['id'], 0),
+            'completion': _percent(center['completed_students'], center['total_students'])
+        }
+        for center in centers
+    ]
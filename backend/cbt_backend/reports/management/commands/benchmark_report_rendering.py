@@ -0,0 +1,110 @@
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from reports.render_pool import RenderPool, render_to_file
+
+# Seconds between simulated requests on each API thread
+REQUEST_GAP = 0.002
+
+
+def _student_rows(count):
+    return [
+        (f'COL/WEB/01/{index:04d}/26', f'A.B. Student {index}', f'{200000000000 + index}', f'Center {index % 12}', 'Enrolled')
+        for index in range(count)
+    ]
+
+
+def _api_response(count=50):
+    """A list endpoint's worth of rows, as the simulated API requests serialize them"""
+    return [
+        {'id': index, 'registration_no': f'COL/WEB/01/{index:04d}/26', 'name': f'Student {index}', 'status': 'Enrolled',
+         'attendance_rate': 87.5, 'center': {'id': index % 12, 'name': f'Center {index % 12}'}}
+        for index in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare API latency while student list PDFs render in the web process and on the render process pool. '
+        'Uses synthetic data; nothing is read from or written to the database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=3000, help='Students per rendered PDF')
+        parser.add_argument('--renders', type=int, default=4, help='Reports rendered at once')
+        parser.add_argument('--workers', type=int, default=2, help='Render pool processes')
+        parser.add_argument('--api-threads', type=int, default=4, help='Threads serving simulated API requests')
+        parser.add_argument('--baseline-seconds', type=float, default=2.0, help='Length of the run without renders')
+
+    def handle(self, *args, **options):
+        rows = _student_rows(options['rows'])
+        kwargs = {'rows': rows, 'title': 'Benchmark Student List'}
+
+        pool = RenderPool(workers=options['workers'], timeout=600)
+        try:
+            # Spawning workers imports Django and ReportLab once; keep that out of the timings
+            os.unlink(pool.render('student_list_pdf', **kwargs)[0])
+
+            results = [
+                self._run('no renders', None, options),
+                self._run('in-process', lambda: render_to_file('student_list_pdf', kwargs), options),
+                self._run(f"pool ({options['workers']} workers)", lambda: pool.render('student_list_pdf', **kwargs), options),
+            ]
+        finally:
+            pool.shutdown()
+
+        self.stdout.write(
+            f"{options['renders']} renders of {options['rows']} rows, {options['api_threads']} API threads, "
+            f"{os.cpu_count()} CPUs"
+        )
+        self.stdout.write(f"{'mode':<22}{'renders s':>10}{'requests/s':>12}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+        for label, elapsed, latencies, wall in results:
+            ordered = sorted(latencies)
+            p95 = ordered[int(len(ordered) * 0.95)] if ordered else 0
+            self.stdout.write(
+                f"{label:<22}{(f'{elapsed:.2f}' if elapsed is not None else '-'):>10}"
+                f"{len(latencies) / wall:>12.0f}"
+                f"{statistics.median(ordered) * 1000 if ordered else 0:>9.1f}"
+                f"{p95 * 1000:>9.1f}{(ordered[-1] if ordered else 0) * 1000:>9.1f}"
+            )
+
+    def _run(self, label, render, options):
+        """(label, render seconds or None, request latencies, wall seconds) for one mode under API load"""
+        stop = threading.Event()
+        latencies = []
+        response = _api_response()
+
+        def serve():
+            renderer = JSONRenderer()
+            while not stop.is_set():
+                # Requests arrive REQUEST_GAP apart; latency runs from arrival, so waiting for the GIL counts
+                arrived = time.perf_counter() + REQUEST_GAP
+                time.sleep(REQUEST_GAP)
+                renderer.render(response)
+                latencies.append(time.perf_counter() - arrived)
+
+        threads = [threading.Thread(target=serve, daemon=True) for _ in range(options['api_threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        elapsed = None
+        if render is None:
+            time.sleep(options['baseline_seconds'])
+        else:
+            with ThreadPoolExecutor(max_workers=options['renders']) as executor:
+                paths = list(executor.map(lambda _: render(), range(options['renders'])))
+            elapsed = time.perf_counter() - started
+            for path, _ in paths:
+                os.unlink(path)
+
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return label, elapsed, latencies, time.perf_counter() - started
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_alter_enrollment_unique_together_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='headofficereport',
+            name='district',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='headofficereport',
+            name='error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='headofficereport',
+            name='scope',
+            field=models.CharField(choices=[('head_office', 'Head Office'), ('district', 'District'), ('training', 'Training Officer')], default='head_office', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='headofficereport',
+            name='report_type',
+            field=models.CharField(choices=[('island', 'Island Performance'), ('districts', 'District Comparison'), ('centers', 'Centers Analysis'), ('comprehensive', 'Island-Wide Comprehensive'), ('instructors', 'Instructors Summary'), ('students', 'Student List'), ('graduated', 'Graduated Student List')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='headofficereport',
+            index=models.Index(fields=['generated_by', 'created_at'], name='reports_hea_generat_e5f3dc_idx'),
+        ),
+    ]
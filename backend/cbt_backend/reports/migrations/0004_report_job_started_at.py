@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_report_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='headofficereport',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -11,6 +11,14 @@ class HeadOfficeReport(models.Model):
         ('centers', 'Centers Analysis'),
         ('comprehensive', 'Island-Wide Comprehensive'),
         ('instructors', 'Instructors Summary'),
+        ('students', 'Student List'),
+        ('graduated', 'Graduated Student List'),
+    ]
+    
+    SCOPE_CHOICES = [
+        ('head_office', 'Head Office'),
+        ('district', 'District'),
+        ('training', 'Training Officer'),
     ]
     
     PERIOD_CHOICES = [
@@ -25,6 +33,7 @@ class HeadOfficeReport(models.Model):
         ('excel', 'Excel'),
     ]
     
+    scope = models.CharField(max_length=20, choices=SCOPE_CHOICES, default='head_office')
     report_type = models.CharField(max_length=20, choices=REPORT_TYPE_CHOICES)
     period = models.CharField(max_length=20, choices=PERIOD_CHOICES)
     format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
@@ -34,6 +43,8 @@ class HeadOfficeReport(models.Model):
     include_centers = models.BooleanField(default=True)
     include_courses = models.BooleanField(default=True)
     include_instructors = models.BooleanField(default=True)
+    # District the report covers, taken from the requesting user for district and training reports
+    district = models.CharField(max_length=100, blank=True, null=True)
     generated_by = models.ForeignKey(User, on_delete=models.CASCADE)
     file_path = models.CharField(max_length=500, blank=True, null=True)
     file_name = models.CharField(max_length=255, blank=True, null=True)
@@ -42,11 +53,17 @@ class HeadOfficeReport(models.Model):
         ('completed', 'Completed'),
         ('failed', 'Failed'),
     ])
+    error = models.TextField(blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set when a worker picks the job up; null while it waits in the queue
+    started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['generated_by', 'created_at']),
+        ]
     
     def __str__(self):
         return f"Head Office Report - {self.report_type} - {self.created_at.strftime('%Y-%m-%d')}"
\ No newline at end of file
@@ -0,0 +1,43 @@
+# reports/pdf.py
+from reportlab.platypus import SimpleDocTemplate
+
+
+class _LazyStory(list):
+    """
+    Story list for DocTemplate.build that pulls flowables from an iterator as they are laid out.
+
+    build() only ever looks at the front of the story and puts split parts
+    back there, so one flowable is kept buffered and the rest stay in the
+    iterator until the one before them has been drawn.
+    """
+
+    def __init__(self, flowables):
+        super().__init__()
+        self._source = iter(flowables)
+
+    def _fill(self):
+        if not list.__len__(self):
+            flowable = next(self._source, None)
+            if flowable is not None:
+                self.append(flowable)
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+class StreamingDocTemplate(SimpleDocTemplate):
+    """
+    SimpleDocTemplate whose build() accepts any iterable of flowables, such as a generator.
+
+    Pages are drawn as the story is consumed and drawn flowables are
+    released, so a generator that builds one bounded table at a time from a
+    chunked queryset renders any number of rows in bounded memory.
+    """
+
+    def build(self, flowables, *args, **kwargs):
+        return super().build(_LazyStory(flowables), *args, **kwargs)
@@ -0,0 +1,164 @@
+# reports/render_pool.py
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Worker processes, and so the number of renders running at once
+RENDER_WORKERS = getattr(settings, 'REPORT_RENDER_WORKERS', 2)
+# Seconds one render may run, and the longest a caller waits for a free worker
+RENDER_TIMEOUT = getattr(settings, 'REPORT_RENDER_TIMEOUT', 120)
+# False renders in the calling thread, for hosts that cannot start worker processes
+RENDER_IN_POOL = getattr(settings, 'REPORT_RENDER_IN_POOL', True)
+# Extra seconds the caller waits past RENDER_TIMEOUT before giving up on a stuck worker
+KILL_GRACE = 5
+
+
+class RenderError(Exception):
+    pass
+
+
+class RenderTimeout(RenderError):
+    pass
+
+
+class RenderBusy(RenderError):
+    pass
+
+
+def render_to_file(name, kwargs):
+    """
+    Run the named renderer from reports.renderers into a new temporary file.
+
+    Returns (path, file name); the caller owns the file at path. Nothing is
+    left behind when the renderer fails.
+    """
+    from .renderers import RENDERERS
+
+    renderer = RENDERERS[name]
+    fd, path = tempfile.mkstemp(prefix='report-')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            file_name = renderer(output, **kwargs)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, file_name
+
+
+def _init_worker():
+    # Spawned workers start from a fresh interpreter; they render only and never touch the database
+    import django
+    django.setup()
+
+
+def _raise_timeout(signum, frame):
+    raise RenderTimeout('Report rendering timed out')
+
+
+def _render_in_worker(name, kwargs, timeout):
+    """Worker entry point; SIGALRM enforces the deadline so the worker stays usable afterwards"""
+    alarm = hasattr(signal, 'SIGALRM')
+    if alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.alarm(max(1, math.ceil(timeout)))
+    try:
+        return render_to_file(name, kwargs)
+    finally:
+        if alarm:
+            signal.alarm(0)
+
+
+class RenderPool:
+    """
+    Bounded process pool for the CPU-bound PDF and Excel renderers.
+
+    ReportLab and xlsxwriter are pure Python and hold the GIL for the whole
+    render, stalling every other thread of a web worker. render() sends a
+    renderer name and plain-data arguments to one of `workers` spawned
+    processes and blocks, without holding the GIL, until the file is
+    written. At most `workers` renders run at once; further callers wait up
+    to `timeout` seconds for a free worker and then get RenderBusy. A
+    render running longer than `timeout` raises RenderTimeout; a worker
+    that does not stop is killed and the pool restarted.
+    """
+
+    def __init__(self, workers=RENDER_WORKERS, timeout=RENDER_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker
+                )
+            return self._executor
+
+    def _discard(self, executor, kill=False):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        if kill:
+            # ProcessPoolExecutor cannot cancel a running call; stop its processes directly
+            for process in list(getattr(executor, '_processes', {}).values()):
+                process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, name, **kwargs):
+        """(path, file name) of a new temporary file holding the render; see render_to_file"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise RenderBusy('Too many reports are being rendered; try again later')
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(_render_in_worker, name, kwargs, self.timeout)
+                return future.result(timeout=self.timeout + KILL_GRACE)
+            except FutureTimeoutError:
+                logger.error(f"Killing report render pool: {name} did not finish in {self.timeout}s")
+                self._discard(executor, kill=True)
+                raise RenderTimeout('Report rendering timed out')
+            except BrokenProcessPool as e:
+                self._discard(executor)
+                raise RenderError(f"Report render worker stopped: {str(e)}")
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+render_pool = RenderPool()
+
+
+def render_report_file(name, **kwargs):
+    """
+    Open file and file name for a render, run on render_pool unless REPORT_RENDER_IN_POOL is off.
+
+    The temporary file is unlinked once opened, so it disappears when the
+    returned file is closed.
+    """
+    if RENDER_IN_POOL:
+        path, file_name = render_pool.render(name, **kwargs)
+    else:
+        path, file_name = render_to_file(name, kwargs)
+    output = open(path, 'rb')
+    os.unlink(path)
+    return output, file_name
@@ -0,0 +1,488 @@
+# reports/renderers.py
+# Renderers take the output file and plain data (dicts, lists and row tuples, never querysets)
+# and return the download file name, so they can run in a render_pool worker process.
+import logging
+
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from attendance.renderers import generate_attendance_excel, generate_attendance_pdf
+from students.id_cards import render_id_cards
+from .xlsx import XlsxExport
+
+logger = logging.getLogger(__name__)
+
+
+def generate_excel_report(output, report_data, report_type, period, include_districts, include_centers, include_courses, include_instructors):
+    """Generate Excel report with the constant-memory XLSX writer"""
+    try:
+        export = XlsxExport(output)
+        export.write_records('Summary', [report_data['summary']])
+        
+        if include_districts and 'district_performance' in report_data:
+            export.write_records('Districts', report_data['district_performance'])
+        
+        if 'island_trends' in report_data:
+            export.write_records('Trends', report_data['island_trends'])
+        
+        if include_courses and 'course_distribution' in report_data:
+            export.write_records('Courses', report_data['course_distribution'])
+        
+        if include_centers and 'top_performing_centers' in report_data:
+            export.write_records('Top Centers', report_data['top_performing_centers'])
+        
+        if include_instructors and 'instructor_summary' in report_data:
+            export.write_records('Instructors', report_data['instructor_summary'])
+        
+        export.close()
+        return f"head_office_report_{period}_{timezone.now().strftime('%Y%m%d')}.xlsx"
+    
+    except Exception as e:
+        logger.error(f"Error generating Excel report: {str(e)}")
+        raise
+
+
+def generate_pdf_report(output, report_data, report_type, period, include_districts, include_centers, include_courses, include_instructors):
+    """Generate PDF report using reportlab"""
+    try:
+        doc = SimpleDocTemplate(output, pagesize=A4)
+        styles = getSampleStyleSheet()
+        story = []
+        
+        story.append(Paragraph(f"Head Office Report - {report_type.capitalize()} ({period.capitalize()})", styles['Title']))
+        story.append(Spacer(1, 12))
+        story.append(Paragraph(f"Generated on: {timezone.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal']))
+        story.append(Spacer(1, 20))
+        
+        story.append(Paragraph("Summary Statistics", styles['Heading2']))
+        summary_data = [
+            ['Metric', 'Value'],
+            ['Total Districts', str(report_data['summary']['total_districts'])],
+            ['Total Centers', str(report_data['summary']['total_centers'])],
+            ['Total Students', str(report_data['summary']['total_students'])],
+            ['Total Courses', str(report_data['summary']['total_courses'])],
+            ['Total Instructors', str(report_data['summary']['total_instructors'])],
+            ['Completion Rate', f"{report_data['summary']['completion_rate']}%"],
+            ['Pending Approvals', str(report_data['summary']['pending_approvals'])],
+        ]
+        
+        summary_table = Table(summary_data)
+        summary_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        story.append(summary_table)
+        story.append(Spacer(1, 20))
+        
+        if include_districts and 'district_performance' in report_data:
+            story.append(Paragraph("District Performance", styles['Heading2']))
+            district_data = [['District', 'Centers', 'Students', 'Instructors', 'Completion', 'Growth']]
+            
+            for district in report_data['district_performance']:
+                district_data.append([
+                    district['name'],
+                    str(district['centers']),
+                    str(district['students']),
+                    str(district['instructors']),
+                    f"{district['completion']}%",
+                    f"{district['growth']}%"
+                ])
+            
+            district_table = Table(district_data)
+            district_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('FONTSIZE', (0, 0), (-1, -1), 8)
+            ]))
+            story.append(district_table)
+            story.append(Spacer(1, 20))
+        
+        if 'island_trends' in report_data:
+            story.append(Paragraph("Island-Wide Trends", styles['Heading2']))
+            trends_data = [['Period', 'Enrollments', 'Completions', 'New Instructors']]
+            
+            for trend in report_data['island_trends']:
+                trends_data.append([
+                    trend['period'],
+                    str(trend['enrollment']),
+                    str(trend['completions']),
+                    str(trend['new_instructors'])
+                ])
+            
+            trends_table = Table(trends_data)
+            trends_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+            story.append(trends_table)
+            story.append(Spacer(1, 20))
+        
+        if include_courses and 'course_distribution' in report_data:
+            story.append(Paragraph("Course Distribution", styles['Heading2']))
+            courses_data = [['Course', 'Students', 'Color']]
+            
+            for course in report_data['course_distribution']:
+                courses_data.append([
+                    course['name'],
+                    str(course['value']),
+                    course['color']
+                ])
+            
+            courses_table = Table(courses_data)
+            courses_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+            story.append(courses_table)
+            story.append(Spacer(1, 20))
+        
+        if include_centers and 'top_performing_centers' in report_data:
+            story.append(Paragraph("Top Performing Centers", styles['Heading2']))
+            centers_data = [['Name', 'District', 'Students', 'Instructors', 'Completion']]
+            
+            for center in report_data['top_performing_centers']:
+                centers_data.append([
+                    center['name'],
+                    center['district'],
+                    str(center['students']),
+                    str(center['instructors']),
+                    f"{center['completion']}%"
+                ])
+            
+            centers_table = Table(centers_data)
+            centers_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+            story.append(centers_table)
+            story.append(Spacer(1, 20))
+        
+        if include_instructors and 'instructor_summary' in report_data:
+            story.append(Paragraph("Instructor Summary", styles['Heading2']))
+            instructors_data = [['District', 'Total', 'Active', 'Avg Rating']]
+            
+            for instructor in report_data['instructor_summary']:
+                instructors_data.append([
+                    instructor['district'] or 'Unassigned',
+                    str(instructor['total']),
+                    str(instructor['active']),
+                    str(instructor['avg_rating'])
+                ])
+            
+            instructors_table = Table(instructors_data)
+            instructors_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]))
+            story.append(instructors_table)
+        
+        doc.build(story)
+        return f'head_office_report_{period}_{timezone.now().strftime("%Y%m%d")}.pdf'
+        
+    except Exception as e:
+        logger.error(f"Error generating PDF report: {str(e)}")
+        raise
+
+
+def generate_district_excel_report(output, report_data, period):
+    """Generate Excel for district report"""
+    try:
+        export = XlsxExport(output)
+        export.write_records('Summary', [report_data['summary']])
+        export.write_records('Centers', report_data['centerPerformance'])
+        export.write_records('Trends', report_data['enrollmentTrend'])
+        export.write_records('Courses', report_data['courseDistribution'])
+        export.write_records('Approvals', report_data['recentApprovals'])
+        
+        export.close()
+        return f"district_report_{period}_{timezone.now().strftime('%Y%m%d')}.xlsx"
+    
+    except Exception as e:
+        logger.error(f"Error generating district Excel: {str(e)}")
+        raise
+
+
+def generate_district_pdf_report(output, report_data, period):
+    """Generate PDF for district report"""
+    try:
+        doc = SimpleDocTemplate(output, pagesize=A4)
+        styles = getSampleStyleSheet()
+        story = []
+        
+        story.append(Paragraph(f"District Report - {period.capitalize()}", styles['Title']))
+        story.append(Spacer(1, 12))
+        
+        # Summary
+        story.append(Paragraph("Summary", styles['Heading2']))
+        summary_data = [
+            ['Total Centers', str(report_data['summary']['totalCenters']['current'])],
+            ['Total Courses', str(report_data['summary']['totalCourses']['current'])],
+            ['Total Users', str(report_data['summary']['totalUsers']['current'])],
+            ['Pending Approvals', str(report_data['summary']['pendingApprovals']['current'])],
+            ['Active Students', str(report_data['summary']['activeStudents']['current'])],
+            ['Completion Rate', f"{report_data['summary']['completionRate']['current']}%"]
+        ]
+        table = Table([['Metric', 'Value']] + summary_data)
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        story.append(table)
+        
+        doc.build(story)
+        return f'district_report_{period}_{timezone.now().strftime("%Y%m%d")}.pdf'
+    
+    except Exception as e:
+        logger.error(f"Error generating district PDF: {str(e)}")
+        raise
+
+
+def generate_training_excel_report(output, report_data, period):
+    """Generate Excel report for training officer"""
+    try:
+        export = XlsxExport(output)
+        
+        # Overall Stats
+        export.write_records('Overall Stats', [report_data['overall_stats']])
+        
+        # Training Programs
+        export.write_records('Training Programs', [report_data['training_programs']])
+        
+        # Training Progress
+        export.write_records('Training Progress', [report_data['training_progress']])
+        
+        # Center Performance
+        if report_data['center_performance']:
+            export.write_records('Center Performance', report_data['center_performance'])
+        
+        # Instructor Metrics
+        if report_data['instructor_metrics']:
+            export.write_records('Instructor Metrics', report_data['instructor_metrics'])
+        
+        # Course Effectiveness
+        if report_data['course_effectiveness']:
+            export.write_records('Course Effectiveness', report_data['course_effectiveness'])
+        
+        # Training Trends
+        if report_data['training_trends']:
+            export.write_records('Training Trends', report_data['training_trends'])
+        
+        export.close()
+        return f"training_officer_report_{period}_{timezone.now().strftime('%Y%m%d')}.xlsx"
+    
+    except Exception as e:
+        logger.error(f"Error generating training Excel report: {str(e)}")
+        raise
+
+
+def generate_training_pdf_report(output, report_data, period):
+    """Generate PDF report for training officer"""
+    try:
+        doc = SimpleDocTemplate(output, pagesize=A4)
+        styles = getSampleStyleSheet()
+        story = []
+        
+        # Title
+        story.append(Paragraph(f"Training Officer Report - {period.capitalize()}", styles['Title']))
+        story.append(Spacer(1, 12))
+        story.append(Paragraph(f"District: {report_data['user_district']}", styles['Normal']))
+        story.append(Paragraph(f"Generated on: {timezone.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal']))
+        story.append(Spacer(1, 20))
+        
+        # Overall Statistics
+        story.append(Paragraph("Overall Statistics", styles['Heading2']))
+        overall_data = [
+            ['Metric', 'Value'],
+            ['Total Students', str(report_data['overall_stats']['total_students'])],
+            ['Total Centers', str(report_data['overall_stats']['total_centers'])],
+            ['Total Instructors', str(report_data['overall_stats']['total_instructors'])],
+            ['Total Courses', str(report_data['overall_stats']['total_courses'])],
+            ['Active Courses', str(report_data['overall_stats']['active_courses'])],
+            ['Completion Rate', f"{report_data['overall_stats']['completion_rate']}%"]
+        ]
+        
+        overall_table = Table(overall_data)
+        overall_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        story.append(overall_table)
+        story.append(Spacer(1, 20))
+        
+        # Training Programs
+        story.append(Paragraph("Training Programs", styles['Heading2']))
+        programs_data = [
+            ['Total Programs', str(report_data['training_programs']['total_programs'])],
+            ['Active Programs', str(report_data['training_programs']['active_programs'])],
+            ['Pending Approval', str(report_data['training_programs']['pending_approval'])],
+            ['Completed Programs', str(report_data['training_programs']['completed_programs'])]
+        ]
+        
+        programs_table = Table([['Program Type', 'Count']] + programs_data)
+        programs_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        story.append(programs_table)
+        story.append(Spacer(1, 20))
+        
+        # Center Performance (first 5 centers)
+        if report_data['center_performance']:
+            story.append(Paragraph("Center Performance", styles['Heading2']))
+            center_data = [['Center', 'Students', 'Courses', 'Completion Rate', 'Performance']]
+            
+            for center in report_data['center_performance'][:5]:
+                center_data.append([
+                    center['center_name'],
+                    str(center['total_students']),
+                    str(center['total_courses']),
+                    f"{center['completion_rate']}%",
+                    center['performance']
+                ])
+            
+            center_table = Table(center_data)
+            center_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('FONTSIZE', (0, 0), (-1, -1), 8)
+            ]))
+            story.append(center_table)
+            story.append(Spacer(1, 20))
+        
+        doc.build(story)
+        return f'training_officer_report_{period}_{timezone.now().strftime("%Y%m%d")}.pdf'
+        
+    except Exception as e:
+        logger.error(f"Error generating training PDF report: {str(e)}")
+        raise
+
+
+def generate_student_list_pdf(output, rows, title):
+    """Generate PDF list of students from (registration no, name with initials, NIC, center, status) rows"""
+    try:
+        doc = SimpleDocTemplate(output, pagesize=A4)
+        styles = getSampleStyleSheet()
+        story = []
+        
+        story.append(Paragraph(title, styles['Title']))
+        story.append(Spacer(1, 12))
+        story.append(Paragraph(f"Generated: {timezone.now().strftime('%Y-%m-%d')}", styles['Normal']))
+        story.append(Spacer(1, 20))
+        
+        data = [['Reg No', 'Name', 'NIC', 'Center', 'Status']]
+        for registration_no, name, nic_id, center_name, enrollment_status in rows:
+            data.append([
+                registration_no[:15] + '...' if len(registration_no or '') > 15 else registration_no,
+                name[:20] + '...' if len(name or '') > 20 else name,
+                nic_id,
+                center_name[:15] + '...' if center_name else 'N/A',
+                enrollment_status
+            ])
+            
+        table = Table(data, colWidths=[80, 120, 80, 100, 80])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        story.append(table)
+        
+        doc.build(story)
+        return f'{title.lower().replace(" ", "_")}_{timezone.now().strftime("%Y%m%d")}.pdf'
+    except Exception as e:
+        logger.error(f"Error generating student pdf: {str(e)}")
+        raise
+
+
+def generate_graduated_list_pdf(output, rows, title):
+    """Generate PDF list of graduated students from (registration no, name with initials, center, workplace, higher education) rows"""
+    try:
+        doc = SimpleDocTemplate(output, pagesize=A4)
+        styles = getSampleStyleSheet()
+        story = []
+        
+        story.append(Paragraph(title, styles['Title']))
+        story.append(Spacer(1, 12))
+        
+        data = [['Reg No', 'Name', 'Center', 'Workplace', 'Higher Edu']]
+        for registration_no, name, center_name, workplace, graduate_education in rows:
+            data.append([
+                registration_no[:15] + '...' if len(registration_no or '') > 15 else registration_no,
+                name[:20] + '...' if len(name or '') > 20 else name,
+                center_name[:15] + '...' if center_name else 'N/A',
+                workplace[:15] + '...' if len(workplace or '') > 15 else workplace,
+                graduate_education[:15] + '...' if len(graduate_education or '') > 15 else graduate_education
+            ])
+            
+        table = Table(data, colWidths=[80, 110, 90, 80, 80])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        story.append(table)
+        
+        doc.build(story)
+        return f'{title.lower().replace(" ", "_")}_{timezone.now().strftime("%Y%m%d")}.pdf'
+    except Exception as e:
+        logger.error(f"Error generating graduated pdf: {str(e)}")
+        raise
+
+# Names a render payload may ask for
+RENDERERS = {
+    'head_office_excel': generate_excel_report,
+    'head_office_pdf': generate_pdf_report,
+    'district_excel': generate_district_excel_report,
+    'district_pdf': generate_district_pdf_report,
+    'training_excel': generate_training_excel_report,
+    'training_pdf': generate_training_pdf_report,
+    'student_list_pdf': generate_student_list_pdf,
+    'graduated_list_pdf': generate_graduated_list_pdf,
+    'attendance_excel': generate_attendance_excel,
+    'attendance_pdf': generate_attendance_pdf,
+    'student_id_cards_pdf': render_id_cards,
+}
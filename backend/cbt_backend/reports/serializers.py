@@ -2,28 +2,47 @@
 from rest_framework import serializers
 from .models import HeadOfficeReport
 
+# Report types every export scope offers; district and training exports render anything else as their overview
+LIST_REPORT_TYPES = ('students', 'graduated')
+
 class HeadOfficeReportSerializer(serializers.ModelSerializer):
     generated_by_name = serializers.CharField(source='generated_by.get_full_name', read_only=True)
     
     class Meta:
         model = HeadOfficeReport
         fields = [
-            'id', 'report_type', 'period', 'format', 'start_date', 'end_date',
-            'include_districts', 'include_centers', 'include_courses', 'include_instructors',
-            'generated_by', 'generated_by_name', 'file_path', 'file_name', 'status',
-            'created_at', 'completed_at'
+            'id', 'scope', 'report_type', 'period', 'format', 'start_date', 'end_date',
+            'include_districts', 'include_centers', 'include_courses', 'include_instructors', 'district',
+            'generated_by', 'generated_by_name', 'file_path', 'file_name', 'status', 'error',
+            'created_at', 'started_at', 'completed_at'
+        ]
+        read_only_fields = [
+            'scope', 'district', 'generated_by', 'file_path', 'file_name', 'status', 'error', 'created_at',
+            'started_at', 'completed_at'
         ]
-        read_only_fields = ['generated_by', 'file_path', 'file_name', 'status', 'created_at', 'completed_at']
 
 class ReportExportSerializer(serializers.Serializer):
-    format = serializers.ChoiceField(choices=['pdf', 'excel'])
-    period = serializers.ChoiceField(choices=['weekly', 'monthly', 'quarterly', 'custom'])
-    report_type = serializers.ChoiceField(choices=[
-        'island', 'districts', 'centers', 'comprehensive', 'instructors'
-    ])
+    format = serializers.ChoiceField(choices=['pdf', 'excel'], default='pdf')
+    period = serializers.ChoiceField(choices=['weekly', 'monthly', 'quarterly', 'custom'], default='monthly')
+    report_type = serializers.CharField(default='comprehensive')
     start_date = serializers.DateField(required=False, allow_null=True)
     end_date = serializers.DateField(required=False, allow_null=True)
     include_districts = serializers.BooleanField(default=True)
     include_centers = serializers.BooleanField(default=True)
     include_courses = serializers.BooleanField(default=True)
-    include_instructors = serializers.BooleanField(default=True)
\ No newline at end of file
+    include_instructors = serializers.BooleanField(default=True)
+    
+    def validate_report_type(self, value):
+        if self.context.get('scope', 'head_office') != 'head_office':
+            return value if value in LIST_REPORT_TYPES else 'comprehensive'
+        if value not in dict(HeadOfficeReport.REPORT_TYPE_CHOICES):
+            raise serializers.ValidationError('Invalid report type')
+        return value
+    
+    def validate(self, attrs):
+        if attrs['period'] == 'custom':
+            if not (attrs.get('start_date') and attrs.get('end_date')):
+                raise serializers.ValidationError('Start and end dates required for custom period')
+            if attrs['start_date'] > attrs['end_date']:
+                raise serializers.ValidationError('Start date must not be after end date')
+        return attrs
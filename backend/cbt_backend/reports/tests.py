@@ -1,3 +1,107 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from reportlab.platypus import Paragraph
+from reportlab.lib.styles import getSampleStyleSheet
+
+from users.models import User
+from .jobs import expire_lost_reports, report_storage, run_report
+from .models import HeadOfficeReport
+from .pdf import StreamingDocTemplate
+
+
+class StreamingDocTemplateTests(SimpleTestCase):
+    """A generator story is pulled one flowable at a time as the document is laid out"""
+
+    def test_story_is_consumed_as_it_is_drawn(self):
+        style = getSampleStyleSheet()['Normal']
+        drawn = []
+
+        class TracedParagraph(Paragraph):
+            def drawOn(self, canvas, x, y, _sW=0):
+                drawn.append(self)
+                super().drawOn(canvas, x, y, _sW)
+
+        def story():
+            for index in range(300):
+                # Everything yielded before the previous flowable has been drawn
+                self.assertGreaterEqual(len(drawn), index - 1)
+                yield TracedParagraph(f'Line {index}', style)
+
+        output = io.BytesIO()
+        doc = StreamingDocTemplate(output)
+        doc.build(story())
+
+        self.assertEqual(len(drawn), 300)
+        self.assertGreater(doc.page, 1)
+        self.assertTrue(output.getvalue().startswith(b'%PDF'))
+
+
+class ReportJobTests(TestCase):
+    """Jobs time out from when a worker started them; queued jobs only after the separate queue timeout"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='admin', email='admin@example.com', role='admin')
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        settings_override = override_settings(REPORT_JOB_ROOT=root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # run_report manages the worker thread's connection; the test's must stay open
+        for name in ('connection', 'close_old_connections'):
+            patcher = mock.patch(f'reports.jobs.{name}')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create_job(self, created_ago, started_ago=None):
+        now = timezone.now()
+        job = HeadOfficeReport.objects.create(
+            report_type='island', period='monthly', format='pdf', generated_by=self.user
+        )
+        HeadOfficeReport.objects.filter(pk=job.pk).update(
+            created_at=now - created_ago,
+            started_at=now - started_ago if started_ago is not None else None
+        )
+        return job
+
+    def test_queue_time_does_not_count_against_the_render(self):
+        queued = self.create_job(created_ago=timedelta(minutes=45))
+        running = self.create_job(created_ago=timedelta(minutes=50), started_ago=timedelta(minutes=5))
+        stalled = self.create_job(created_ago=timedelta(minutes=40), started_ago=timedelta(minutes=31))
+        lost_in_queue = self.create_job(created_ago=timedelta(hours=2))
+
+        self.assertEqual(expire_lost_reports(), 2)
+        statuses = dict(HeadOfficeReport.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[queued.id], 'processing')
+        self.assertEqual(statuses[running.id], 'processing')
+        self.assertEqual(statuses[stalled.id], 'failed')
+        self.assertEqual(statuses[lost_in_queue.id], 'failed')
+
+    def test_worker_records_start_and_result(self):
+        job = self.create_job(created_ago=timedelta(minutes=45))
+        run_report(job.id, lambda report: (b'%PDF report', 'report.pdf'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertIsNotNone(job.started_at)
+        with report_storage().open(job.file_path) as stored:
+            self.assertEqual(stored.read(), b'%PDF report')
+
+    def test_expired_job_is_not_run(self):
+        job = self.create_job(created_ago=timedelta(hours=2))
+        expire_lost_reports()
+        render = mock.Mock()
+
+        run_report(job.id, render)
+
+        render.assert_not_called()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.started_at), ('failed', None))
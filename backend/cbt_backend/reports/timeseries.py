@@ -0,0 +1,95 @@
+# reports/timeseries.py
+import datetime
+from collections import defaultdict
+
+from django.db.models import Count, DateField
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+TRUNCATIONS = {
+    'month': TruncMonth,
+    'week': TruncWeek,
+}
+
+
+class Series:
+    """
+    Counts of one queryset bucketed by one of its date or datetime fields.
+
+    Each keyword is a metric name mapped to a Q filter (None counts every
+    row), so several metrics over the same table and date field come from
+    one grouped query.
+    """
+
+    def __init__(self, queryset, date_field, **metrics):
+        self.queryset = queryset
+        self.date_field = date_field
+        self.metrics = metrics
+
+
+def bucket_start(day, interval='month'):
+    if interval == 'month':
+        return day.replace(day=1)
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def buckets(start_date, end_date, interval='month'):
+    """Start dates of every month (or Monday-based week) that overlaps the range"""
+    starts = []
+    current = bucket_start(start_date, interval)
+    while current <= end_date:
+        starts.append(current)
+        if interval == 'month':
+            current = (current.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        else:
+            current += datetime.timedelta(days=7)
+    return starts
+
+
+def last_months(count=6, today=None):
+    """(start, end) covering the current calendar month and the count - 1 before it"""
+    today = today or timezone.localdate()
+    start = today.replace(day=1)
+    for _ in range(count - 1):
+        start = (start - datetime.timedelta(days=1)).replace(day=1)
+    return start, today
+
+
+def _range_filter(queryset, date_field, start_date, end_date):
+    field = queryset.model._meta.get_field(date_field)
+    if field.get_internal_type() == 'DateTimeField':
+        # Bounds as aware datetimes so the column's index can be used
+        start = timezone.make_aware(datetime.datetime.combine(start_date, datetime.time.min))
+        end = timezone.make_aware(datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min))
+        return queryset.filter(**{f'{date_field}__gte': start, f'{date_field}__lt': end})
+    return queryset.filter(**{f'{date_field}__range': (start_date, end_date)})
+
+
+def time_series(start_date, end_date, *series, interval='month'):
+    """
+    Zero-filled counts per bucket for every metric of every Series.
+
+    Issues one GROUP BY query per Series. Returns a list of
+    {'period': bucket start date, metric: count, ...} in date order, with
+    a row for every bucket in the range even when nothing happened in it.
+    """
+    trunc = TRUNCATIONS[interval]
+    counts = defaultdict(dict)
+    names = []
+    for entry in series:
+        names.extend(entry.metrics)
+        rows = _range_filter(entry.queryset, entry.date_field, start_date, end_date).order_by().annotate(
+            period=trunc(entry.date_field, output_field=DateField())
+        ).values('period').annotate(**{
+            name: Count('pk', filter=condition) if condition is not None else Count('pk')
+            for name, condition in entry.metrics.items()
+        })
+        for row in rows:
+            period = row.pop('period')
+            counts[period].update(row)
+
+    return [
+        {'period': period, **{name: counts[period].get(name, 0) for name in names}}
+        for period in buckets(start_date, end_date, interval)
+    ]
+
@@ -1,6 +1,9 @@
 # reports/urls.py
 from django.urls import path
-from .views import head_office_reports, export_head_office_report, district_reports, export_district_report, training_officer_reports, export_training_report    
+from .views import (
+    head_office_reports, export_head_office_report, district_reports, export_district_report,
+    training_officer_reports, export_training_report, report_jobs, report_job_status, download_report_job
+)
 
 urlpatterns = [
     path('head-office/', head_office_reports, name='head-office-reports'),
@@ -9,4 +12,7 @@ urlpatterns = [
     path('export-district/', export_district_report, name='export-district-report'),
     path('training-officer-reports/', training_officer_reports, name='training-officer-reports'), 
     path('export-training-report/', export_training_report, name='export-training-report'),  
+    path('jobs/', report_jobs, name='report-jobs'),
+    path('jobs/<int:report_id>/', report_job_status, name='report-job-status'),
+    path('jobs/<int:report_id>/download/', download_report_job, name='download-report-job'),
 ]
\ No newline at end of file
@@ -0,0 +1,122 @@
+# reports/xlsx.py
+import tempfile
+
+import xlsxwriter
+from django.http import FileResponse
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Named cell formats usable in column_formats
+NAMED_FORMATS = {
+    'date': {'num_format': 'yyyy-mm-dd'},
+    'datetime': {'num_format': 'yyyy-mm-dd hh:mm'},
+    'time': {'num_format': 'hh:mm'},
+    'integer': {'num_format': '0'},
+    'decimal': {'num_format': '0.00'},
+    'percent': {'num_format': '0.0%'},
+}
+
+HEADER_FORMAT = {'bold': True, 'bg_color': '#D9D9D9', 'border': 1}
+DEFAULT_COLUMN_WIDTH = 18
+MAX_COLUMN_WIDTH = 50
+
+
+def _cell_value(value):
+    """Coerce values xlsxwriter cannot write natively (nested dicts/lists, model objects) to text"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, 'isoformat') or hasattr(value, 'as_tuple'):
+        return value
+    return str(value)
+
+
+class XlsxExport:
+    """
+    Workbook written with xlsxwriter's constant_memory mode.
+
+    Rows are flushed to disk as soon as they are written, so a sheet can be fed
+    from a chunked queryset iterator without holding the workbook in memory.
+    Sheets must be written one after another, each row in order.
+    """
+
+    def __init__(self, output=None):
+        # A caller's file is written in place; otherwise the workbook goes to a temporary file
+        self._file = output if output is not None else tempfile.TemporaryFile(suffix='.xlsx')
+        self.workbook = xlsxwriter.Workbook(self._file, {
+            'constant_memory': True,
+            'strings_to_urls': False,
+            'remove_timezone': True,
+            'default_date_format': 'yyyy-mm-dd',
+        })
+        self._formats = {}
+        self._header_format = self.workbook.add_format(HEADER_FORMAT)
+        self._closed = False
+
+    def _format(self, spec):
+        if spec is None:
+            return None
+        key = spec if isinstance(spec, str) else tuple(sorted(spec.items()))
+        if key not in self._formats:
+            self._formats[key] = self.workbook.add_format(NAMED_FORMATS[spec] if isinstance(spec, str) else spec)
+        return self._formats[key]
+
+    def write_sheet(self, name, headers, rows, column_formats=None, widths=None):
+        """
+        Write one sheet: a header row, then every row from `rows` (any iterable of sequences).
+
+        column_formats maps a header (or column index) to a named format from
+        NAMED_FORMATS or an xlsxwriter format dict. widths maps a header (or
+        column index) to a column width. Returns the number of data rows written.
+        """
+        column_formats = column_formats or {}
+        widths = widths or {}
+        worksheet = self.workbook.add_worksheet(name[:31])
+
+        formats = []
+        for index, header in enumerate(headers):
+            formats.append(self._format(column_formats.get(header, column_formats.get(index))))
+            width = widths.get(header, widths.get(index))
+            if width is None:
+                width = min(max(len(str(header)) + 2, DEFAULT_COLUMN_WIDTH), MAX_COLUMN_WIDTH)
+            worksheet.set_column(index, index, width, formats[index])
+
+        worksheet.write_row(0, 0, headers, self._header_format)
+        worksheet.freeze_panes(1, 0)
+
+        row_number = 0
+        for row_number, row in enumerate(rows, start=1):
+            for column, value in enumerate(row):
+                worksheet.write(row_number, column, _cell_value(value), formats[column] if column < len(formats) else None)
+        return row_number
+
+    def write_records(self, name, records, column_formats=None, widths=None):
+        """Write a list of dicts as a sheet, with the union of their keys as headers (like DataFrame(records))"""
+        headers = []
+        for record in records:
+            for key in record:
+                if key not in headers:
+                    headers.append(key)
+        rows = ([record.get(header) for header in headers] for record in records)
+        return self.write_sheet(name, headers, rows, column_formats, widths)
+
+    def close(self):
+        """Finish the workbook and return its file object rewound to the start"""
+        if not self._closed:
+            self.workbook.close()
+            self._closed = True
+        self._file.seek(0)
+        return self._file
+
+    def to_bytes(self):
+        content = self.close().read()
+        self._file.close()
+        return content
+
+    def to_response(self, file_name):
+        """Stream the finished workbook from its temporary file as an attachment"""
+        return FileResponse(
+            self.close(),
+            as_attachment=True,
+            filename=file_name,
+            content_type=XLSX_CONTENT_TYPE
+        )
@@ -1,7 +1,7 @@
 # students/admin.py - COMPLETE UPDATED VERSION
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Student, EducationalQualification, DistrictCode, CourseCode, Batch, BatchYear
+from .models import Student, EducationalQualification, DistrictCode, CourseCode, Batch, BatchYear, RegistrationSequence
 
 @admin.register(DistrictCode)
 class DistrictCodeAdmin(admin.ModelAdmin):
@@ -43,6 +43,13 @@ class BatchYearAdmin(admin.ModelAdmin):
     ordering = ['-year_code']
     fields = ['year_code', 'description', 'is_active']
 
+@admin.register(RegistrationSequence)
+class RegistrationSequenceAdmin(admin.ModelAdmin):
+    list_display = ['district_code', 'course_code', 'batch_code', 'year', 'last_number', 'updated_at']
+    search_fields = ['district_code', 'course_code']
+    list_filter = ['year', 'batch_code']
+    readonly_fields = ['updated_at']
+
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
     list_display = ['registration_no', 'full_name_english', 'nic_id', 'district', 'course', 'batch', 'date_of_application', 'created_by']
@@ -0,0 +1,87 @@
+# students/exports.py
+import csv
+
+from reports.xlsx import XlsxExport
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (header, values() key) in export column order
+STUDENT_EXPORT_COLUMNS = [
+    ('Registration No', 'registration_no'),
+    ('District Code', 'district_code'),
+    ('Course Code', 'course_code'),
+    ('Batch', 'batch__batch_code'),
+    ('Batch Name', 'batch__batch_name'),
+    ('Student Number', 'student_number'),
+    ('Registration Year', 'registration_year'),
+    ('Full Name (English)', 'full_name_english'),
+    ('Full Name (Sinhala)', 'full_name_sinhala'),
+    ('Name with Initials', 'name_with_initials'),
+    ('Gender', 'gender'),
+    ('Date of Birth', 'date_of_birth'),
+    ('NIC/ID', 'nic_id'),
+    ('Address', 'address_line'),
+    ('District', 'district'),
+    ('Divisional Secretariat', 'divisional_secretariat'),
+    ('Grama Niladhari Division', 'grama_niladhari_division'),
+    ('Village', 'village'),
+    ('Marital Status', 'marital_status'),
+    ('Mobile No', 'mobile_no'),
+    ('Email', 'email'),
+    ('Training Received', 'training_received'),
+    ('Training Provider', 'training_provider'),
+    ('Course/Vocation', 'course_vocation_name'),
+    ('Training Duration', 'training_duration'),
+    ('Training Nature', 'training_nature'),
+    ('Training Establishment', 'training_establishment'),
+    ('Placement Preference', 'training_placement_preference'),
+    ('Center', 'center__name'),
+    ('Course', 'course__name'),
+    ('Enrollment Date', 'enrollment_date'),
+    ('Enrollment Status', 'enrollment_status'),
+    ('Date of Application', 'date_of_application'),
+]
+
+STUDENT_EXPORT_HEADERS = [header for header, _ in STUDENT_EXPORT_COLUMNS]
+
+STUDENT_EXPORT_FORMATS = {
+    'Student Number': 'integer',
+    'Date of Birth': 'date',
+    'Enrollment Date': 'date',
+    'Date of Application': 'date',
+}
+
+
+class Echo:
+    """File-like object whose write() hands the row back to the caller instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+def iter_student_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield export rows as plain lists straight from a chunked values() cursor"""
+    keys = [key for _, key in STUDENT_EXPORT_COLUMNS]
+    for values in queryset.values(*keys).iterator(chunk_size=chunk_size):
+        values['training_received'] = 'Yes' if values['training_received'] else 'No'
+        yield [values[key] if values[key] is not None else '' for key in keys]
+
+
+def stream_students_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the students CSV line by line, header first"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(STUDENT_EXPORT_HEADERS)
+    for row in iter_student_rows(queryset, chunk_size):
+        yield writer.writerow(row)
+
+
+def students_xlsx_response(queryset, file_name='students.xlsx', chunk_size=EXPORT_CHUNK_SIZE):
+    """Write the students export straight from the cursor into a constant-memory workbook"""
+    export = XlsxExport()
+    export.write_sheet(
+        'Students',
+        STUDENT_EXPORT_HEADERS,
+        iter_student_rows(queryset, chunk_size),
+        column_formats=STUDENT_EXPORT_FORMATS
+    )
+    return export.to_response(file_name)
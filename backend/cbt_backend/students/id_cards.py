@@ -0,0 +1,264 @@
+# students/id_cards.py
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+
+import qrcode
+from django.conf import settings
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+from .qr import encode_student_qr
+
+# CR80 card size, laid out in a grid on A4
+CARD_WIDTH = 85.6 * mm
+CARD_HEIGHT = 54 * mm
+CARD_COLUMNS = 2
+CARD_ROWS = 5
+CARD_H_GAP = 6 * mm
+CARD_V_GAP = 3 * mm
+CARDS_PER_PAGE = CARD_COLUMNS * CARD_ROWS
+
+BACKGROUND_FORM = 'student_id_card_background'
+
+CARD_FIELDS = [
+    'id', 'registration_no', 'full_name_english', 'nic_id', 'district',
+    'course__name', 'center__name', 'profile_photo',
+]
+
+# (label, card key) drawn in the middle column; labels are part of the background
+DETAIL_ROWS = [
+    ('REGISTRATION NO', 'registration_no'),
+    ('NIC', 'nic_id'),
+    ('COURSE', 'course__name'),
+    ('CENTER', 'center__name'),
+    ('DISTRICT', 'district'),
+]
+
+HEADER_HEIGHT = 12 * mm
+PHOTO_BOX = (4 * mm, 9 * mm, 18 * mm, 22 * mm)
+QR_BOX = (CARD_WIDTH - 25 * mm, 10 * mm, 22 * mm)
+DETAILS_X = 25 * mm
+DETAILS_WIDTH = QR_BOX[0] - DETAILS_X - 2 * mm
+DETAILS_TOP = 31 * mm
+DETAILS_STEP = 4.6 * mm
+
+
+def card_rows(queryset):
+    """Plain card dicts for every student in the queryset, in one query"""
+    return [
+        {key: value if value is not None else '' for key, value in row.items()}
+        for row in queryset.values(*CARD_FIELDS)
+    ]
+
+
+def qr_payload(card):
+    return encode_student_qr(card['id'], card['registration_no'])
+
+
+def qr_root():
+    # Outside MEDIA_ROOT: a code is as good as the student's card, so it is never served directly
+    return Path(getattr(settings, 'ID_CARD_QR_ROOT', settings.BASE_DIR / 'private' / 'id_card_qr'))
+
+
+def qr_file_name(card):
+    """
+    Content-hashed name of the card's QR PNG, relative to qr_root().
+
+    The hash covers the payload, so a renumbered student or a rotated key
+    gets a new file and never a stale code. Files are never culled; an
+    orphaned code is a few hundred bytes.
+    """
+    digest = hashlib.sha256(qr_payload(card).encode()).hexdigest()
+    return f"{digest[:2]}/{digest}.png"
+
+
+def _read_png(path):
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def _write_png(path, png):
+    # Written to a temporary name and renamed, so a concurrent reader never sees half a file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as output:
+        output.write(png)
+    os.replace(temp_path, path)
+
+
+def render_qr_png(payload):
+    """PNG bytes for one QR payload"""
+    # Small grayscale modules keep the embedded image (and its encoding cost) small;
+    # the card scales it up without smoothing
+    # A fixed mask skips scoring all eight patterns, which is most of the encoding time
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=3, border=2, mask_pattern=0)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    buffer = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").get_image().convert('L').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def get_qr_pngs(cards):
+    """
+    QR PNG bytes for each card, keyed by qr_file_name.
+
+    Stored codes are read from qr_root(); the rest are rendered and
+    written there.
+    """
+    root = qr_root()
+    keys = {qr_file_name(card): card for card in cards}
+    pngs = {}
+    for key in keys:
+        png = _read_png(root / key)
+        if png is not None:
+            pngs[key] = png
+    missing = [key for key in keys if key not in pngs]
+    if not missing:
+        return pngs
+
+    for key in missing:
+        png = render_qr_png(qr_payload(keys[key]))
+        _write_png(root / key, png)
+        pngs[key] = png
+    return pngs
+
+
+def _fit(text, font, size, width):
+    """Truncate text with an ellipsis so it fits in width points"""
+    text = str(text)
+    if stringWidth(text, font, size) <= width:
+        return text
+    while text and stringWidth(text + '...', font, size) > width:
+        text = text[:-1]
+    return text + '...'
+
+
+def _photo_reader(name):
+    if not name:
+        return None
+    from .models import Student
+
+    storage = Student._meta.get_field('profile_photo').storage
+    try:
+        with storage.open(name) as photo:
+            return ImageReader(io.BytesIO(photo.read()))
+    except Exception:
+        return None
+
+
+def _draw_background(p):
+    """Everything that is the same on every card, drawn once into a form XObject"""
+    p.beginForm(BACKGROUND_FORM, lowerx=0, lowery=0, upperx=CARD_WIDTH, uppery=CARD_HEIGHT)
+
+    p.setFillColorRGB(1, 1, 1)
+    p.setStrokeColorRGB(0.75, 0.75, 0.75)
+    p.setLineWidth(0.5)
+    p.roundRect(0, 0, CARD_WIDTH, CARD_HEIGHT, 3 * mm, stroke=1, fill=1)
+
+    p.setFillColorRGB(0, 0.5, 0)
+    p.rect(0, CARD_HEIGHT - HEADER_HEIGHT, CARD_WIDTH, HEADER_HEIGHT, fill=1, stroke=0)
+    p.setFillColorRGB(1, 1, 1)
+    p.setFont("Helvetica-Bold", 10)
+    p.drawCentredString(CARD_WIDTH / 2, CARD_HEIGHT - 6 * mm, "Student ID Card")
+    p.setFont("Helvetica", 6.5)
+    p.drawCentredString(CARD_WIDTH / 2, CARD_HEIGHT - 10 * mm, "Vocational Training Authority")
+
+    x, y, width, height = PHOTO_BOX
+    p.setStrokeColorRGB(0.8, 0.8, 0.8)
+    p.rect(x, y, width, height, fill=0, stroke=1)
+    p.setFillColorRGB(0.6, 0.6, 0.6)
+    p.setFont("Helvetica", 6)
+    p.drawCentredString(x + width / 2, y + height / 2, "PHOTO")
+
+    p.setFillColorRGB(0.4, 0.4, 0.4)
+    p.setFont("Helvetica", 4.5)
+    for index, (label, _) in enumerate(DETAIL_ROWS):
+        p.drawString(DETAILS_X, DETAILS_TOP - index * DETAILS_STEP, label)
+
+    qr_x, qr_y, qr_size = QR_BOX
+    p.setFont("Helvetica", 5.5)
+    p.drawCentredString(qr_x + qr_size / 2, qr_y - 3 * mm, "Scan for Attendance")
+
+    p.setFillColorRGB(0.3, 0.3, 0.3)
+    p.setFont("Helvetica-Oblique", 5.5)
+    p.drawString(4 * mm, 3.5 * mm, "Valid until course completion")
+
+    p.endForm()
+
+
+def _draw_card(p, card, qr_png):
+    """Per-student content on top of the shared background, in card coordinates"""
+    p.doForm(BACKGROUND_FORM)
+
+    p.setFillColorRGB(0, 0, 0)
+    p.setFont("Helvetica-Bold", 8)
+    p.drawString(4 * mm, CARD_HEIGHT - 17 * mm, _fit(card['full_name_english'], "Helvetica-Bold", 8, CARD_WIDTH - 8 * mm))
+
+    photo = _photo_reader(card['profile_photo'])
+    if photo is not None:
+        x, y, width, height = PHOTO_BOX
+        p.drawImage(photo, x, y, width, height, preserveAspectRatio=True, anchor='c')
+
+    p.setFont("Helvetica", 6.5)
+    for index, (_, key) in enumerate(DETAIL_ROWS):
+        value = card[key] or 'Not assigned'
+        p.drawString(
+            DETAILS_X,
+            DETAILS_TOP - index * DETAILS_STEP - 2.6 * mm,
+            _fit(value, "Helvetica", 6.5, DETAILS_WIDTH)
+        )
+
+    qr_x, qr_y, qr_size = QR_BOX
+    p.drawImage(ImageReader(io.BytesIO(qr_png)), qr_x, qr_y, qr_size, qr_size)
+
+
+def card_origin(slot):
+    """Lower-left corner of the card in grid slot `slot` on an A4 page"""
+    page_width, page_height = A4
+    grid_width = CARD_COLUMNS * CARD_WIDTH + (CARD_COLUMNS - 1) * CARD_H_GAP
+    grid_height = CARD_ROWS * CARD_HEIGHT + (CARD_ROWS - 1) * CARD_V_GAP
+    left = (page_width - grid_width) / 2
+    top = page_height - (page_height - grid_height) / 2
+    column, row = slot % CARD_COLUMNS, slot // CARD_COLUMNS
+    return (
+        left + column * (CARD_WIDTH + CARD_H_GAP),
+        top - (row + 1) * CARD_HEIGHT - row * CARD_V_GAP,
+    )
+
+
+def render_id_cards(output, cards, file_name=None):
+    """
+    Write a PDF with CARDS_PER_PAGE cards per A4 page, in the order given, and return its file name.
+
+    Registered in reports.renderers.RENDERERS, so views run it on the
+    report render pool with card_rows() dicts.
+    """
+    qr_pngs = get_qr_pngs(cards)
+
+    p = canvas.Canvas(output, pagesize=A4)
+    p.setTitle("Student ID Cards")
+    _draw_background(p)
+
+    for index, card in enumerate(cards):
+        slot = index % CARDS_PER_PAGE
+        if index and slot == 0:
+            p.showPage()
+        x, y = card_origin(slot)
+        p.saveState()
+        p.translate(x, y)
+        _draw_card(p, card, qr_pngs[qr_file_name(card)])
+        p.restoreState()
+
+    p.showPage()
+    p.save()
+    return file_name or f"student_id_cards_{timezone.now().strftime('%Y%m%d_%H%M')}.pdf"
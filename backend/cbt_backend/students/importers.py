@@ -0,0 +1,338 @@
+# students/importers.py
+import json
+import logging
+
+import pandas as pd
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Student, EducationalQualification, DistrictCode, CourseCode, Batch, RegistrationSequence
+from .search import index_students
+from attendance.rosters import invalidate_rosters
+from centers.models import Center
+from courses.models import Course
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 500
+
+# Spreadsheet column -> Student field for plain text values
+TEXT_COLUMNS = {
+    'Full Name (English)': 'full_name_english',
+    'Full Name (Sinhala)': 'full_name_sinhala',
+    'Name with Initials': 'name_with_initials',
+    'NIC/ID': 'nic_id',
+    'Address': 'address_line',
+    'District': 'district',
+    'Divisional Secretariat': 'divisional_secretariat',
+    'Grama Niladhari Division': 'grama_niladhari_division',
+    'Village': 'village',
+    'Mobile No': 'mobile_no',
+    'Email': 'email',
+    'Training Provider': 'training_provider',
+    'Course/Vocation': 'course_vocation_name',
+    'Training Duration': 'training_duration',
+    'Training Establishment': 'training_establishment',
+}
+
+# Columns that fall back to a default when left empty
+DEFAULTED_COLUMNS = {
+    'Gender': ('gender', 'Male'),
+    'Training Nature': ('training_nature', 'Initial'),
+    'Placement Preference': ('training_placement_preference', '1st'),
+    'Enrollment Status': ('enrollment_status', 'Pending'),
+}
+
+QUALIFICATION_COLUMNS = {
+    'O/L Results': 'OL',
+    'A/L Results': 'AL',
+}
+
+# Foreign keys are resolved from the lookup tables, so full_clean must not query them again
+CLEAN_EXCLUDE = ['center', 'course', 'batch', 'created_by', 'registration_no']
+
+
+def read_import_file(file):
+    """Read an uploaded CSV/Excel file as text columns, or return None if the format is unsupported"""
+    if file.name.endswith('.csv'):
+        df = pd.read_csv(file, dtype=str, keep_default_na=False)
+    elif file.name.endswith(('.xls', '.xlsx')):
+        df = pd.read_excel(file, dtype=str)
+    else:
+        return None
+
+    df.columns = [str(column).strip() for column in df.columns]
+    return df.fillna('').apply(lambda column: column.str.strip())
+
+
+def _column(df, name, default=''):
+    if name in df.columns:
+        return df[name].where(df[name] != '', default)
+    return pd.Series(default, index=df.index, dtype=object)
+
+
+def _normalize_batch_code(code):
+    code = str(code).strip()
+    if code.endswith('.0'):
+        code = code[:-2]
+    return code.zfill(2) if code.isdigit() and len(code) == 1 else code
+
+
+def _parse_qualifications(raw, qualification_type):
+    if not raw:
+        return []
+    results = json.loads(raw)
+    return [
+        {
+            'subject': str(result.get('subject', '')),
+            'grade': str(result.get('grade', '')),
+            'year': int(result.get('year')),
+            'type': qualification_type,
+        }
+        for result in results
+    ]
+
+
+class StudentImporter:
+    """Set-based student import: one lookup per table, validation over the whole frame, chunked inserts"""
+
+    def __init__(self, user, chunk_size=IMPORT_CHUNK_SIZE):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.errors = {}
+
+    def run(self, df):
+        """Import the frame and return (imported_count, errors) with errors in file row order"""
+        df = df.reset_index(drop=True)
+        frame = self._build_frame(df)
+        lookups = self._load_lookups(frame)
+        self._validate_frame(frame, lookups)
+
+        pending = []
+        for index in frame.index:
+            if index in self.errors:
+                continue
+            try:
+                student, qualifications = self._build_student(frame.loc[index], lookups)
+            except ValidationError as e:
+                self._add_error(index, e.message_dict if hasattr(e, 'error_dict') else e.messages)
+                continue
+            except (AttributeError, TypeError, ValueError) as e:
+                self._add_error(index, str(e))
+                continue
+            pending.append((index, student, qualifications))
+
+        self._assign_registration_numbers([student for _, student, _ in pending], lookups)
+
+        imported_count = 0
+        for start in range(0, len(pending), self.chunk_size):
+            imported_count += self._insert_chunk(pending[start:start + self.chunk_size])
+
+        errors = [f"Row {index + 1}: {self.errors[index]}" for index in sorted(self.errors)]
+        return imported_count, errors
+
+    def _add_error(self, index, message):
+        self.errors.setdefault(index, message)
+
+    def _build_frame(self, df):
+        """Map spreadsheet columns to Student fields in one vectorised pass"""
+        frame = pd.DataFrame(index=df.index)
+        for column, field in TEXT_COLUMNS.items():
+            frame[field] = _column(df, column)
+        for column, (field, default) in DEFAULTED_COLUMNS.items():
+            frame[field] = _column(df, column, default)
+
+        # Checked against the user's district in _validate_frame; blank cells take it
+        frame['district_raw'] = frame['district']
+        if self.user.role == 'data_entry' and self.user.district:
+            frame['district'] = self.user.district
+
+        frame['training_received'] = _column(df, 'Training Received', 'No').str.lower() == 'yes'
+        frame['center_name'] = _column(df, 'Center')
+        frame['course_name'] = _column(df, 'Course')
+        frame['batch_code'] = _column(df, 'Batch Code', '01').map(_normalize_batch_code)
+
+        frame['date_of_birth'] = pd.to_datetime(_column(df, 'Date of Birth'), errors='coerce').dt.date
+        frame['enrollment_date'] = pd.to_datetime(_column(df, 'Enrollment Date'), errors='coerce').dt.date
+        frame['date_of_birth_raw'] = _column(df, 'Date of Birth')
+        frame['enrollment_date_raw'] = _column(df, 'Enrollment Date')
+
+        for column in QUALIFICATION_COLUMNS:
+            frame[column] = _column(df, column)
+        return frame
+
+    def _load_lookups(self, frame):
+        """Resolve every center, course, batch and code table referenced by the frame up front"""
+        district = self.user.district
+        center_names = set(frame['center_name']) - {''}
+        course_names = set(frame['course_name']) - {''}
+        batch_codes = set(frame['batch_code']) - {''}
+
+        centers = {}
+        for center in Center.objects.filter(name__in=center_names, district=district).order_by('pk'):
+            centers.setdefault(center.name, center)
+
+        courses = {}
+        for course in Course.objects.filter(name__in=course_names, district=district).order_by('-created_at'):
+            courses.setdefault(course.name, course)
+
+        batches = {batch.batch_code: batch for batch in Batch.objects.filter(batch_code__in=batch_codes)}
+        default_batch = Batch.objects.filter(is_active=True).order_by('display_order').first()
+        if default_batch is None:
+            default_batch, _ = Batch.objects.get_or_create(
+                batch_code='01',
+                defaults={
+                    'batch_name': '1st Batch',
+                    'description': 'Default 1st Batch',
+                    'is_active': True,
+                    'display_order': 1
+                }
+            )
+
+        district_codes = {
+            name.lower(): code
+            for name, code in DistrictCode.objects.values_list('district_name', 'district_code')
+        }
+        course_code_rows = list(CourseCode.objects.values_list('course_name', 'course_code'))
+        course_codes = {}
+        for course in courses.values():
+            match = next((code for name, code in course_code_rows if course.name.lower() in name.lower()), None)
+            if match:
+                course_codes[course.id] = match
+            elif course.code:
+                course_codes[course.id] = course.code[:3].upper()
+
+        return {
+            'centers': centers,
+            'courses': courses,
+            'batches': batches,
+            'default_batch': default_batch,
+            'district_codes': district_codes,
+            'course_codes': course_codes,
+        }
+
+    def _validate_frame(self, frame, lookups):
+        """Run the checks that span rows (required fields, dates, NIC uniqueness, district scoping)"""
+        required = {
+            'full_name_english': 'Full Name (English) is required.',
+            'name_with_initials': 'Name with Initials is required.',
+            'nic_id': 'NIC/ID is required.',
+            'district': 'District is required to generate registration number.',
+        }
+        for field, message in required.items():
+            for index in frame.index[frame[field] == '']:
+                self._add_error(index, {field: [message]})
+
+        for index in frame.index[frame['date_of_birth'].isna()]:
+            self._add_error(index, {'date_of_birth': [f"Invalid date '{frame.at[index, 'date_of_birth_raw']}'."]})
+
+        bad_enrollment = frame['enrollment_date'].isna() & (frame['enrollment_date_raw'] != '')
+        for index in frame.index[bad_enrollment]:
+            self._add_error(index, {'enrollment_date': [f"Invalid date '{frame.at[index, 'enrollment_date_raw']}'."]})
+
+        nics = frame['nic_id']
+        for index in frame.index[(nics != '') & nics.duplicated(keep='first')]:
+            self._add_error(index, {'nic_id': ['Duplicate NIC/ID within the import file.']})
+
+        existing_nics = set(
+            Student.objects.filter(nic_id__in=set(nics) - {''}).values_list('nic_id', flat=True)
+        )
+        for index in frame.index[nics.isin(existing_nics)]:
+            self._add_error(index, {'nic_id': ['Student with this nic id already exists.']})
+
+        if self.user.role == 'data_entry' and self.user.district:
+            uploaded = frame['district_raw']
+            foreign = (uploaded != '') & (uploaded.str.lower() != self.user.district.lower())
+            for index in frame.index[foreign]:
+                self._add_error(index, {
+                    'district': [f"You can only add students from your assigned district ({self.user.district})."]
+                })
+
+        for index in frame.index:
+            center = lookups['centers'].get(frame.at[index, 'center_name'])
+            course = lookups['courses'].get(frame.at[index, 'course_name'])
+            district = frame.at[index, 'district']
+            if center and district and center.district != district:
+                self._add_error(index, {'center': ['Selected center must be in the same district as the student.']})
+            elif course and district and course.district != district:
+                self._add_error(index, {'course': ['Selected course must be in the same district as the student.']})
+
+    def _build_student(self, row, lookups):
+        center = lookups['centers'].get(row['center_name'])
+        if center is None and self.user.role == 'data_entry' and self.user.center:
+            center = self.user.center
+
+        batch = lookups['batches'].get(row['batch_code']) or lookups['default_batch']
+
+        student = Student(
+            **{field: row[field] for field in TEXT_COLUMNS.values()},
+            **{field: row[field] for field, _ in DEFAULTED_COLUMNS.values()},
+            training_received=bool(row['training_received']),
+            date_of_birth=row['date_of_birth'],
+            enrollment_date=None if pd.isna(row['enrollment_date']) else row['enrollment_date'],
+            center=center,
+            course=lookups['courses'].get(row['course_name']),
+            batch=batch,
+            created_by=self.user,
+        )
+        student.full_clean(exclude=CLEAN_EXCLUDE, validate_unique=False, validate_constraints=False)
+
+        qualifications = []
+        for column, qualification_type in QUALIFICATION_COLUMNS.items():
+            qualifications.extend(_parse_qualifications(row[column], qualification_type))
+        return student, qualifications
+
+    def _assign_registration_numbers(self, students, lookups):
+        """Fill registration components without a per-row query, reserving one number block per prefix"""
+        current_year = str(timezone.now().year)
+        groups = {}
+        for student in students:
+            student.district_code = lookups['district_codes'].get(
+                student.district.lower(), student.district[:3].upper() or 'GEN'
+            )
+            student.course_code = lookups['course_codes'].get(student.course_id, 'GEN')
+            student.registration_year = (
+                str(student.enrollment_date.year) if student.enrollment_date else current_year
+            )
+            student.batch_year = student.batch.batch_code
+            key = (student.district_code, student.course_code, student.batch_year, student.registration_year)
+            groups.setdefault(key, []).append(student)
+
+        for key, members in groups.items():
+            first_number = RegistrationSequence.reserve(*key, count=len(members))
+            for offset, student in enumerate(members):
+                student.student_number = first_number + offset
+                student.registration_no = student.generate_registration_number(use_existing_components=True)
+
+    def _insert_chunk(self, chunk):
+        """Insert one chunk atomically; on a constraint clash retry row by row to report the offenders"""
+        try:
+            with transaction.atomic():
+                students = Student.objects.bulk_create([student for _, student, _ in chunk])
+                EducationalQualification.objects.bulk_create([
+                    EducationalQualification(student=student, **qualification)
+                    for student, (_, _, qualifications) in zip(students, chunk)
+                    for qualification in qualifications
+                ])
+                index_students([student.pk for student in students])
+            invalidate_rosters([student.course_id for student in students])
+            return len(students)
+        except IntegrityError as e:
+            logger.warning(f"Bulk insert of {len(chunk)} students failed, retrying per row: {str(e)}")
+
+        imported_count = 0
+        for index, student, qualifications in chunk:
+            student.pk = None
+            student._state.adding = True
+            try:
+                with transaction.atomic():
+                    student.save()
+                    EducationalQualification.objects.bulk_create([
+                        EducationalQualification(student=student, **qualification)
+                        for qualification in qualifications
+                    ])
+                imported_count += 1
+            except IntegrityError as e:
+                self._add_error(index, str(e))
+        return imported_count
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from students.models import Student
+from students.photos import build_photo_derivatives
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail and card-sized copies for student photos that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Also re-check students that already have derivatives, writing any that are missing')
+
+    def handle(self, *args, **options):
+        students = Student.objects.exclude(profile_photo='').exclude(profile_photo__isnull=True)
+        if not options['all']:
+            students = students.filter(profile_photo_hash='')
+
+        built = failed = 0
+        for student in students.only('id', 'profile_photo').iterator(chunk_size=200):
+            photo_hash = build_photo_derivatives(student.profile_photo)
+            if photo_hash:
+                # update() rather than save(): nothing else about the student changed
+                Student.objects.filter(pk=student.pk).update(profile_photo_hash=photo_hash)
+                built += 1
+            else:
+                failed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Built photo derivatives for {built} students'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} photos could not be read'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from students.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Drop and rebuild the student search index from the students table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if get_backend() is None:
+            self.stdout.write(self.style.WARNING('This database has no search index backend; search uses icontains.'))
+            return
+        indexed = rebuild_index(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} students'))
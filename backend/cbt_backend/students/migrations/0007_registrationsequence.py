@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:31
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def seed_sequences(apps, schema_editor):
+    Student = apps.get_model('students', 'Student')
+    RegistrationSequence = apps.get_model('students', 'RegistrationSequence')
+    rows = (
+        Student.objects
+        .exclude(batch__isnull=True)
+        .values('district_code', 'course_code', 'batch__batch_code', 'registration_year')
+        .annotate(last_number=Max('student_number'))
+    )
+    RegistrationSequence.objects.bulk_create([
+        RegistrationSequence(
+            district_code=row['district_code'],
+            course_code=row['course_code'],
+            batch_code=row['batch__batch_code'],
+            year=row['registration_year'],
+            last_number=row['last_number'] or 0,
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_remove_student_residence_type_student_marital_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistrationSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('district_code', models.CharField(max_length=10)),
+                ('course_code', models.CharField(max_length=10)),
+                ('batch_code', models.CharField(max_length=2)),
+                ('year', models.CharField(max_length=4)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Registration Sequence',
+                'verbose_name_plural': 'Registration Sequences',
+                'ordering': ['district_code', 'course_code', 'batch_code', 'year'],
+                'unique_together': {('district_code', 'course_code', 'batch_code', 'year')},
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:52
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from students.search import INDEX_SOURCE_FIELDS, _document_row, get_backend
+
+    backend = get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    Student = apps.get_model('students', 'Student')
+    with schema_editor.connection.cursor() as cursor:
+        backend.create(cursor)
+        rows = []
+        for values in Student.objects.order_by().values(*INDEX_SOURCE_FIELDS).iterator(chunk_size=2000):
+            rows.append(_document_row(values))
+            if len(rows) >= 2000:
+                backend.insert(cursor, rows)
+                rows = []
+        if rows:
+            backend.insert(cursor, rows)
+
+
+def drop_search_index(apps, schema_editor):
+    from students.search import get_backend
+
+    backend = get_backend(schema_editor.connection)
+    if backend is not None:
+        with schema_editor.connection.cursor() as cursor:
+            backend.drop(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0007_registrationsequence'),
+        ('centers', '0004_rename_instructors_center_instructor_count_and_more'),
+        ('courses', '0004_alter_courseduration_options_courseduration_order'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
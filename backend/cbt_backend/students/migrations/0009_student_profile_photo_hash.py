@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0008_student_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='profile_photo_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
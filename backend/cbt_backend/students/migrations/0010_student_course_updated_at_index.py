@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('centers', '0004_rename_instructors_center_instructor_count_and_more'),
+        ('courses', '0004_alter_courseduration_options_courseduration_order'),
+        ('students', '0009_student_profile_photo_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['course', 'updated_at'], name='students_st_course__784627_idx'),
+        ),
+    ]
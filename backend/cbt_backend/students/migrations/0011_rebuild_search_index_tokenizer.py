@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+def rebuild_search_index(apps, schema_editor):
+    # The index tokenizer now keeps combining marks inside words; existing rows were split apart at them
+    from students.search import INDEX_SOURCE_FIELDS, _document_row, get_backend
+
+    backend = get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    Student = apps.get_model('students', 'Student')
+    with schema_editor.connection.cursor() as cursor:
+        backend.drop(cursor)
+        backend.create(cursor)
+        rows = []
+        for values in Student.objects.order_by().values(*INDEX_SOURCE_FIELDS).iterator(chunk_size=2000):
+            rows.append(_document_row(values))
+            if len(rows) >= 2000:
+                backend.insert(cursor, rows)
+                rows = []
+        if rows:
+            backend.insert(cursor, rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0010_student_course_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0011_rebuild_search_index_tokenizer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -1,9 +1,12 @@
 # students/models.py - COMPLETE FIXED VERSION
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Max
 from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
 from django.utils import timezone
 
+from .photos import build_photo_derivatives
+
 User = get_user_model()
 
 class DistrictCode(models.Model):
@@ -70,6 +73,60 @@ class BatchYear(models.Model):
     def __str__(self):
         return f"{self.year_code} - {self.description}"
 
+class RegistrationSequence(models.Model):
+    """Next student number per registration prefix (district/course/batch/year)"""
+    district_code = models.CharField(max_length=10)
+    course_code = models.CharField(max_length=10)
+    batch_code = models.CharField(max_length=2)
+    year = models.CharField(max_length=4)
+    last_number = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Registration Sequence"
+        verbose_name_plural = "Registration Sequences"
+        unique_together = ['district_code', 'course_code', 'batch_code', 'year']
+        ordering = ['district_code', 'course_code', 'batch_code', 'year']
+    
+    def __str__(self):
+        return f"{self.district_code}/{self.course_code}/{self.batch_code}/{self.year} - {self.last_number:04d}"
+    
+    @classmethod
+    def reserve(cls, district_code, course_code, batch_code, year, count=1):
+        """Atomically reserve `count` consecutive student numbers and return the first one"""
+        key = {
+            'district_code': district_code,
+            'course_code': course_code,
+            'batch_code': batch_code,
+            'year': str(year),
+        }
+        with transaction.atomic():
+            sequence = cls.objects.filter(**key).first()
+            if sequence is None:
+                # First number for this prefix: continue after any students numbered before the table existed
+                seed = Student.objects.filter(
+                    district_code=district_code,
+                    course_code=course_code,
+                    batch__batch_code=batch_code,
+                    registration_year=str(year)
+                ).aggregate(last=Max('student_number'))['last'] or 0
+                sequence, created = cls.objects.get_or_create(**key, defaults={'last_number': seed})
+            
+            cls.objects.filter(pk=sequence.pk).update(last_number=F('last_number') + count)
+            last_number = cls.objects.filter(pk=sequence.pk).values_list('last_number', flat=True).get()
+        return last_number - count + 1
+    
+    @classmethod
+    def peek(cls, district_code, course_code, batch_code, year):
+        """Return the number the next reserve() would hand out, without reserving it"""
+        last_number = cls.objects.filter(
+            district_code=district_code,
+            course_code=course_code,
+            batch_code=batch_code,
+            year=str(year)
+        ).values_list('last_number', flat=True).first()
+        return (last_number or 0) + 1
+
 class Student(models.Model):
     GENDER_CHOICES = [
         ('Male', 'Male'),
@@ -150,6 +207,8 @@ class Student(models.Model):
         blank=True,
         help_text='Student profile photo'
     )
+    # Content hash naming the resized copies of profile_photo (see students/photos.py)
+    profile_photo_hash = models.CharField(max_length=64, blank=True, editable=False)
     
     # Center and Course Information
     center = models.ForeignKey(
@@ -189,6 +248,7 @@ class Student(models.Model):
             models.Index(fields=['created_at']),
             models.Index(fields=['center']),
             models.Index(fields=['course']),
+            models.Index(fields=['course', 'updated_at']),
             models.Index(fields=['district_code']),
             models.Index(fields=['course_code']),
             models.Index(fields=['batch']),
@@ -255,16 +315,6 @@ class Student(models.Model):
                 )
                 self.batch = default_batch
         
-        # Get student number
-        if not self.student_number or self.student_number == 0:
-            students_in_batch = Student.objects.filter(
-                district=self.district,
-                course=self.course,
-                batch=self.batch
-            ).exclude(id=self.id)
-            
-            self.student_number = students_in_batch.count() + 1
-        
         # Get registration year
         if not self.registration_year:
             if self.enrollment_date:
@@ -273,6 +323,16 @@ class Student(models.Model):
                 self.registration_year = str(current_year)
         
         batch_code = self.batch.batch_code if self.batch else "01"
+        
+        # Get student number
+        if not self.student_number or self.student_number == 0:
+            self.student_number = RegistrationSequence.reserve(
+                self.district_code,
+                self.course_code,
+                batch_code,
+                self.registration_year
+            )
+        
         return f"{self.district_code}/{self.course_code}/{batch_code}/{self.student_number:04d}/{self.registration_year}"
     
     def save(self, *args, **kwargs):
@@ -295,6 +355,11 @@ class Student(models.Model):
         if self.batch:
             self.batch_year = self.batch.batch_code
         
+        if not self.profile_photo:
+            self.profile_photo_hash = ''
+        elif not self.profile_photo._committed:
+            self.profile_photo_hash = build_photo_derivatives(self.profile_photo)
+        
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -316,4 +381,7 @@ class EducationalQualification(models.Model):
         ordering = ['type', 'year', 'subject']
     
     def __str__(self):
-        return f"{self.student.name_with_initials} - {self.subject} ({self.grade})"
\ No newline at end of file
+        return f"{self.student.name_with_initials} - {self.subject} ({self.grade})"
+class StudentVersion(models.Model):
+    """Single counter bumped on every student save or delete, so each process can tell its cached QR lookups are stale"""
+    version = models.PositiveBigIntegerField(default=0)
@@ -0,0 +1,111 @@
+# students/photos.py
+import hashlib
+import io
+import logging
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+PHOTO_DERIVATIVE_DIR = 'student_photos/derived'
+
+# Size name -> bounding box in pixels; photos are scaled down to fit, never up
+PHOTO_SIZES = {
+    'thumb': (160, 160),
+    'card': (480, 600),
+}
+
+# Extension -> (Pillow format, save options)
+PHOTO_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def derivative_name(photo_hash, size, extension):
+    """Storage name of one derivative; identical uploads hash to the same names and are stored once"""
+    return f"{PHOTO_DERIVATIVE_DIR}/{photo_hash[:2]}/{photo_hash}_{size}.{extension}"
+
+
+def _flatten(image):
+    """Upright RGB copy of the image, with any transparency composited onto white"""
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def build_photo_derivatives(field_file):
+    """
+    Write every size and format of the photo in `field_file` to its storage.
+
+    Returns the content hash the derivatives are named by, or '' when the
+    file cannot be read as an image. Derivatives that already exist (from an
+    identical upload) are not rendered again.
+    """
+    storage = field_file.storage
+    try:
+        field_file.open('rb')
+        field_file.seek(0)
+        content = field_file.read()
+        field_file.seek(0)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading profile photo {field_file.name}: {str(e)}")
+        return ''
+
+    photo_hash = hashlib.sha256(content).hexdigest()
+    missing = [
+        (size, extension)
+        for size in PHOTO_SIZES
+        for extension in PHOTO_FORMATS
+        if not storage.exists(derivative_name(photo_hash, size, extension))
+    ]
+    if not missing:
+        return photo_hash
+
+    try:
+        image = _flatten(Image.open(io.BytesIO(content)))
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.error(f"Error processing profile photo {field_file.name}: {str(e)}")
+        return ''
+
+    resized = {}
+    for size, extension in missing:
+        if size not in resized:
+            resized[size] = image.copy()
+            resized[size].thumbnail(PHOTO_SIZES[size], Image.LANCZOS)
+        image_format, options = PHOTO_FORMATS[extension]
+        buffer = io.BytesIO()
+        resized[size].save(buffer, image_format, **options)
+        storage.save(derivative_name(photo_hash, size, extension), ContentFile(buffer.getvalue()))
+    return photo_hash
+
+
+def photo_url(student, size, extension='jpg', request=None):
+    """
+    URL of one derivative of the student's photo, or None without a photo.
+
+    Photos uploaded before derivatives existed fall back to the original
+    until `build_photo_derivatives` has been run for them.
+    """
+    if not student.profile_photo:
+        return None
+    if student.profile_photo_hash:
+        url = student.profile_photo.storage.url(derivative_name(student.profile_photo_hash, size, extension))
+    else:
+        url = student.profile_photo.url
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def photo_urls(student, request=None):
+    """{size: {extension: url}} for every derivative, or None without a photo"""
+    if not student.profile_photo:
+        return None
+    return {
+        size: {extension: photo_url(student, size, extension, request) for extension in PHOTO_FORMATS}
+        for size in PHOTO_SIZES
+    }
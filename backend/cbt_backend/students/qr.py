@@ -0,0 +1,179 @@
+# students/qr.py
+import base64
+import hashlib
+import hmac
+import struct
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.utils import timezone
+
+# Payload: key version (1 byte), student id (4 bytes), registration hash (4 bytes), HMAC-SHA256 tag (8 bytes).
+# 17 bytes encode to 28 base32 characters, which QR codes store in compact alphanumeric mode.
+PAYLOAD_FORMAT = '>BII'
+PAYLOAD_SIZE = struct.calcsize(PAYLOAD_FORMAT)
+TAG_SIZE = 8
+CODE_LENGTH = len(base64.b32encode(bytes(PAYLOAD_SIZE + TAG_SIZE)).rstrip(b'='))
+
+# Last day (a datetime.date) the unsigned JSON codes printed before signed codes are accepted; None rejects them
+ACCEPT_LEGACY_CODES_UNTIL = getattr(settings, 'STUDENT_QR_ACCEPT_LEGACY_UNTIL', None)
+
+RESOLVER_CACHE_SIZE = getattr(settings, 'STUDENT_QR_RESOLVER_CACHE_SIZE', 4096)
+# Seconds between reads of the shared StudentVersion; bounds how long another process's change goes unseen
+RESOLVER_CHECK_INTERVAL = getattr(settings, 'STUDENT_QR_RESOLVER_CHECK_INTERVAL', 2)
+# Seconds an entry is trusted at most, for writes that bypass the student signals (queryset updates)
+RESOLVER_MAX_AGE = getattr(settings, 'STUDENT_QR_RESOLVER_MAX_AGE', 300)
+RESOLVER_FIELDS = ['id', 'registration_no', 'full_name_english', 'course_id', 'center_id']
+
+
+class InvalidQRCode(ValueError):
+    pass
+
+
+def accepts_legacy_codes():
+    """Whether old JSON codes are still accepted; they carry no signature, so only during the reprint transition"""
+    return ACCEPT_LEGACY_CODES_UNTIL is not None and timezone.localdate() <= ACCEPT_LEGACY_CODES_UNTIL
+
+
+def _signing_keys():
+    """{version: key}; STUDENT_QR_KEYS can list old versions so rotated codes keep working"""
+    keys = getattr(settings, 'STUDENT_QR_KEYS', None)
+    if keys:
+        return {int(version): key.encode() if isinstance(key, str) else key for version, key in keys.items()}
+    return {1: hashlib.sha256(f'student-qr:{settings.SECRET_KEY}'.encode()).digest()}
+
+
+def current_key_version():
+    return getattr(settings, 'STUDENT_QR_KEY_VERSION', max(_signing_keys()))
+
+
+def registration_hash(registration_no):
+    return struct.unpack('>I', hashlib.sha256((registration_no or '').encode()).digest()[:4])[0]
+
+
+def _tag(key, payload):
+    return hmac.new(key, payload, hashlib.sha256).digest()[:TAG_SIZE]
+
+
+def encode_student_qr(student_id, registration_no, key_version=None):
+    """Signed base32 code for a student's ID card"""
+    key_version = key_version or current_key_version()
+    payload = struct.pack(PAYLOAD_FORMAT, key_version, student_id, registration_hash(registration_no))
+    return base64.b32encode(payload + _tag(_signing_keys()[key_version], payload)).rstrip(b'=').decode()
+
+
+def decode_student_qr(code):
+    """
+    Verify a signed code without touching the database.
+
+    Returns (student_id, registration hash); raises InvalidQRCode when the
+    code is malformed, signed with an unknown key version or tampered with.
+    """
+    code = (code or '').strip().upper()
+    if len(code) != CODE_LENGTH:
+        raise InvalidQRCode('Invalid QR code data')
+    try:
+        raw = base64.b32decode(code + '=' * (-len(code) % 8))
+    except ValueError:
+        raise InvalidQRCode('Invalid QR code data')
+
+    payload, tag = raw[:PAYLOAD_SIZE], raw[PAYLOAD_SIZE:]
+    key_version, student_id, reg_hash = struct.unpack(PAYLOAD_FORMAT, payload)
+    key = _signing_keys().get(key_version)
+    if key is None or not hmac.compare_digest(tag, _tag(key, payload)):
+        raise InvalidQRCode('QR code signature is not valid')
+    return student_id, reg_hash
+
+
+def student_version():
+    from .models import StudentVersion
+
+    return StudentVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def bump_student_version():
+    """Stale every process's resolved students; called from the student save and delete signals"""
+    from django.db.models import F
+
+    from .models import StudentVersion
+
+    StudentVersion.objects.bulk_create([StudentVersion(pk=1)], ignore_conflicts=True)
+    StudentVersion.objects.filter(pk=1).update(version=F('version') + 1)
+
+
+class StudentResolver:
+    """
+    Bounded LRU of student id -> RESOLVER_FIELDS values.
+
+    A save or delete drops the student's entry in the saving process at
+    once. Other processes see it through StudentVersion, which the signals
+    bump and every resolver reads at most once per check_interval,
+    clearing all its entries when the version has moved. Entries older
+    than max_age are read again regardless.
+    """
+
+    def __init__(self, max_size=RESOLVER_CACHE_SIZE, check_interval=RESOLVER_CHECK_INTERVAL, max_age=RESOLVER_MAX_AGE):
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._version = None
+        self._checked_at = None
+
+    def _check_version(self, now):
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        # Read before any student is fetched, so a change committed meanwhile is caught by the next check
+        version = student_version()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._checked_at = now
+
+    def get(self, student_id):
+        """The student's values, or None when no such student exists"""
+        now = time.monotonic()
+        self._check_version(now)
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is not None and now - entry[0] < self.max_age:
+                self._entries.move_to_end(student_id)
+                return entry[1]
+
+        from .models import Student
+
+        values = Student.objects.filter(id=student_id).values(*RESOLVER_FIELDS).first()
+        with self._lock:
+            if values is None:
+                self._entries.pop(student_id, None)
+            else:
+                self._entries[student_id] = (now, values)
+                self._entries.move_to_end(student_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return values
+
+    def forget(self, student_id):
+        with self._lock:
+            self._entries.pop(student_id, None)
+
+
+student_resolver = StudentResolver()
+
+
+def resolve_student_qr(code):
+    """
+    Student values for a scanned code, or None when the student no longer exists.
+
+    The registration hash must match the student's current registration
+    number, so a card for a renumbered student stops working.
+    """
+    student_id, reg_hash = decode_student_qr(code)
+    student = student_resolver.get(student_id)
+    if student is not None and registration_hash(student['registration_no']) != reg_hash:
+        raise InvalidQRCode('QR code does not match the student record')
+    return student
@@ -0,0 +1,267 @@
+# students/search.py
+import unicodedata
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+SEARCH_TABLE = 'students_student_search'
+
+# Columns kept in the index, in bm25 weight order
+SEARCH_COLUMNS = [
+    ('registration_no', 10.0),
+    ('nic_id', 10.0),
+    ('full_name_english', 5.0),
+    ('name_with_initials', 5.0),
+    ('full_name_sinhala', 5.0),
+    ('codes', 2.0),
+    ('places', 1.0),
+]
+
+# Unicode categories that make up a word, matching the index tokenizer's; marks are included so
+# Sinhala vowel signs and viramas stay inside their words instead of splitting them apart
+TOKEN_CATEGORIES = ('L', 'N', 'M', 'Co')
+FTS_TOKENIZER = "unicode61 remove_diacritics 2 categories 'L* N* Co M*'"
+
+INDEX_SOURCE_FIELDS = [
+    'id', 'registration_no', 'nic_id', 'full_name_english', 'name_with_initials', 'full_name_sinhala',
+    'district', 'district_code', 'course_code', 'batch__batch_code', 'batch__batch_name',
+    'center__name', 'course__name',
+]
+
+
+def _is_token_char(char):
+    category = unicodedata.category(char)
+    return category[0] in TOKEN_CATEGORIES or category in TOKEN_CATEGORIES
+
+
+def _tokens(term):
+    """Lower-cased words of a search term, split on whitespace, punctuation and symbols"""
+    tokens = []
+    current = []
+    for char in term or '':
+        if _is_token_char(char):
+            current.append(char)
+        elif current:
+            tokens.append(''.join(current).lower())
+            current = []
+    if current:
+        tokens.append(''.join(current).lower())
+    return tokens
+
+
+def _like_escape(value):
+    """value with the LIKE wildcards and the default escape character escaped"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _document_row(values):
+    """Flatten one values() row into the indexed columns"""
+    codes = ' '.join(filter(None, [
+        values['district_code'], values['course_code'], values['batch__batch_code'], values['batch__batch_name'],
+    ]))
+    places = ' '.join(filter(None, [values['district'], values['center__name'], values['course__name']]))
+    return [
+        values['id'],
+        values['registration_no'] or '',
+        values['nic_id'] or '',
+        values['full_name_english'] or '',
+        values['name_with_initials'] or '',
+        values['full_name_sinhala'] or '',
+        codes,
+        places,
+    ]
+
+
+class SQLiteSearchBackend:
+    """FTS5 table with prefix indexes; rows are keyed by rowid = student id and ranked with bm25"""
+
+    def create(self, cursor):
+        columns = ', '.join(name for name, _ in SEARCH_COLUMNS)
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            f"{columns}, tokenize=\"{FTS_TOKENIZER}\", prefix='2 3 4')"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+    def delete(self, cursor, ids):
+        placeholders = ', '.join(['%s'] * len(ids))
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})", list(ids))
+
+    def insert(self, cursor, rows):
+        columns = ', '.join(['rowid'] + [name for name, _ in SEARCH_COLUMNS])
+        placeholders = ', '.join(['%s'] * (len(SEARCH_COLUMNS) + 1))
+        cursor.executemany(f"INSERT INTO {SEARCH_TABLE} ({columns}) VALUES ({placeholders})", rows)
+
+    def _match_query(self, tokens):
+        return ' AND '.join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+    def match(self, tokens):
+        """Ids of the students matching every token, as a subquery for id__in"""
+        return RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [self._match_query(tokens)])
+
+    def rank_expression(self, tokens, term):
+        """bm25 score of each student's own index row (lower is better), looked up by rowid"""
+        weights = ', '.join(str(weight) for _, weight in SEARCH_COLUMNS)
+        return RawSQL(
+            f"(SELECT bm25({SEARCH_TABLE}, {weights}) FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s AND {SEARCH_TABLE}.rowid = \"students_student\".\"id\")",
+            [self._match_query(tokens)],
+            output_field=FloatField()
+        )
+
+
+class PostgresSearchBackend:
+    """Plain table with a pg_trgm GIN index over the concatenated document; ranked by word similarity"""
+
+    def create(self, cursor):
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+            "student_id bigint PRIMARY KEY, "
+            "registration_no text NOT NULL, "
+            "nic_id text NOT NULL, "
+            "document text NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_trgm "
+            f"ON {SEARCH_TABLE} USING gin (document gin_trgm_ops)"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+    def delete(self, cursor, ids):
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE student_id = ANY(%s)", [list(ids)])
+
+    def insert(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (student_id, registration_no, nic_id, document) VALUES (%s, %s, %s, %s)",
+            [(row[0], row[1].lower(), row[2].lower(), ' '.join(row[1:]).lower()) for row in rows]
+        )
+
+    def match(self, tokens):
+        """Ids of the students matching every token, as a subquery for id__in"""
+        # Tokens are letters, digits and marks only, so they are safe inside a word-start regex
+        conditions = ' AND '.join(["document ~ ('\\m' || %s)"] * len(tokens))
+        return RawSQL(f"SELECT student_id FROM {SEARCH_TABLE} WHERE {conditions}", list(tokens))
+
+    def rank_expression(self, tokens, term):
+        """Registration number or NIC prefix matches first, then word similarity; lower is better"""
+        # The prefix is the term as typed, so the slashes of a registration number stay in it
+        prefix = _like_escape(term.strip().lower()) + '%'
+        return RawSQL(
+            "(SELECT -((registration_no LIKE %s OR nic_id LIKE %s)::int * 2 + word_similarity(%s, document)) "
+            f"FROM {SEARCH_TABLE} WHERE student_id = \"students_student\".\"id\")",
+            [prefix, prefix, ' '.join(tokens)],
+            output_field=FloatField()
+        )
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(conn=None):
+    """Return the search backend for the connection's vendor, or None when searching falls back to icontains"""
+    backend_class = BACKENDS.get((conn or connection).vendor)
+    return backend_class() if backend_class else None
+
+
+def index_students(student_ids, chunk_size=1000):
+    """(Re)index the given students; ids that no longer exist are simply removed from the index"""
+    from .models import Student
+
+    backend = get_backend()
+    student_ids = list(student_ids)
+    if backend is None or not student_ids:
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(student_ids), chunk_size):
+            chunk = student_ids[start:start + chunk_size]
+            rows = [
+                _document_row(values)
+                for values in Student.objects.filter(id__in=chunk).order_by().values(*INDEX_SOURCE_FIELDS)
+            ]
+            backend.delete(cursor, chunk)
+            if rows:
+                backend.insert(cursor, rows)
+
+
+def remove_students(student_ids):
+    backend = get_backend()
+    student_ids = list(student_ids)
+    if backend is None or not student_ids:
+        return
+    with connection.cursor() as cursor:
+        backend.delete(cursor, student_ids)
+
+
+def rebuild_index(chunk_size=2000):
+    """Drop and repopulate the whole index from the students table; returns the number of rows indexed"""
+    from .models import Student
+
+    backend = get_backend()
+    if backend is None:
+        return 0
+    indexed = 0
+    with connection.cursor() as cursor:
+        backend.drop(cursor)
+        backend.create(cursor)
+        rows = []
+        for values in Student.objects.order_by().values(*INDEX_SOURCE_FIELDS).iterator(chunk_size=chunk_size):
+            rows.append(_document_row(values))
+            if len(rows) >= chunk_size:
+                backend.insert(cursor, rows)
+                indexed += len(rows)
+                rows = []
+        if rows:
+            backend.insert(cursor, rows)
+            indexed += len(rows)
+    return indexed
+
+
+def icontains_filter(queryset, term):
+    """Unindexed fallback used on backends without a search index"""
+    return queryset.filter(
+        Q(full_name_english__icontains=term) |
+        Q(full_name_sinhala__icontains=term) |
+        Q(name_with_initials__icontains=term) |
+        Q(nic_id__icontains=term) |
+        Q(registration_no__icontains=term) |
+        Q(district__icontains=term) |
+        Q(center__name__icontains=term) |
+        Q(course__name__icontains=term) |
+        Q(district_code__icontains=term) |
+        Q(course_code__icontains=term) |
+        Q(batch__batch_code__icontains=term) |
+        Q(batch__batch_name__icontains=term)
+    )
+
+
+def search_students(queryset, term):
+    """
+    Restrict `queryset` to students matching `term`, best matches first.
+
+    Every word of the term must match the start of a word in the indexed fields
+    (registration number, NIC, English/Sinhala names, codes, district, center
+    and course names). The index is consulted inside the queryset's own SQL,
+    so its filters (a user's district, list filters) apply before ranking and
+    every matching student in scope is returned.
+    """
+    tokens = _tokens(term)
+    if not tokens:
+        return queryset
+
+    backend = get_backend()
+    if backend is None:
+        return icontains_filter(queryset, term)
+
+    return queryset.filter(id__in=backend.match(tokens)).annotate(
+        search_rank=backend.rank_expression(tokens, term)
+    ).order_by('search_rank', 'id')
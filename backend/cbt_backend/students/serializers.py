@@ -4,6 +4,7 @@ from rest_framework import serializers
 from django.utils import timezone
 from datetime import datetime
 from .models import Student, EducationalQualification, DistrictCode, CourseCode, Batch, BatchYear
+from .photos import photo_url, photo_urls
 from centers.models import Center
 from courses.models import Course
 
@@ -41,6 +42,7 @@ class StudentSerializer(serializers.ModelSerializer):
     batch_display = serializers.CharField(source='batch.batch_name', read_only=True)
     profile_photo = serializers.ImageField(required=False, allow_null=True, write_only=True)
     profile_photo_url = serializers.SerializerMethodField(read_only=True)
+    profile_photo_urls = serializers.SerializerMethodField(read_only=True)
     registration_components = serializers.SerializerMethodField()
     
     class Meta:
@@ -82,6 +84,7 @@ class StudentSerializer(serializers.ModelSerializer):
             'date_of_application',
             'profile_photo',  
             'profile_photo_url',  
+            'profile_photo_urls',
             'center', 
             'center_name', 
             'course', 
@@ -100,18 +103,20 @@ class StudentSerializer(serializers.ModelSerializer):
             'student_number', 
             'registration_year',
             'profile_photo_url',
+            'profile_photo_urls',
             'created_at', 
             'updated_at'
         ]
     
     def get_profile_photo_url(self, obj):
-        """Return the full URL for the profile photo"""
-        if obj.profile_photo and hasattr(obj.profile_photo, 'url'):
-            request = self.context.get('request')
-            if request is not None:
-                return request.build_absolute_uri(obj.profile_photo.url)
-            return obj.profile_photo.url
-        return None
+        """Return the URL of a resized photo: thumbnails in lists, card size otherwise"""
+        view = self.context.get('view')
+        size = 'thumb' if getattr(view, 'action', None) == 'list' else 'card'
+        return photo_url(obj, size, request=self.context.get('request'))
+    
+    def get_profile_photo_urls(self, obj):
+        """Return WebP and JPEG URLs for every photo size"""
+        return photo_urls(obj, request=self.context.get('request'))
     
     def get_registration_components(self, obj):
         """Return registration number components as a dictionary"""
@@ -130,12 +135,14 @@ class StudentSerializer(serializers.ModelSerializer):
     
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        # Separate O/L and A/L results for response
+        # Separate O/L and A/L results for response; .all() reads the prefetch cache when the view prefetched,
+        # otherwise it is a single query for both types
+        qualifications = list(instance.qualifications.all())
         representation['ol_results'] = EducationalQualificationSerializer(
-            instance.qualifications.filter(type='OL'), many=True
+            [qualification for qualification in qualifications if qualification.type == 'OL'], many=True
         ).data
         representation['al_results'] = EducationalQualificationSerializer(
-            instance.qualifications.filter(type='AL'), many=True
+            [qualification for qualification in qualifications if qualification.type == 'AL'], many=True
         ).data
         return representation
     
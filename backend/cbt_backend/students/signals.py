@@ -0,0 +1,62 @@
+# students/signals.py
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from centers.models import Center
+from courses.models import Course
+from .models import Student, Batch
+from .search import index_students, remove_students
+from .qr import bump_student_version, student_resolver
+
+# Fields of related models that are copied into the student search index
+INDEXED_RELATED_FIELDS = {
+    Center: ('center', ['name']),
+    Course: ('course', ['name']),
+    Batch: ('batch', ['batch_code', 'batch_name']),
+}
+
+
+@receiver(post_save, sender=Student)
+def index_student_on_save(sender, instance, raw=False, **kwargs):
+    """Keep the search index row in step with the student"""
+    if not raw:
+        index_students([instance.pk])
+
+
+@receiver(post_delete, sender=Student)
+def remove_student_from_index(sender, instance, **kwargs):
+    remove_students([instance.pk])
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def forget_resolved_student(sender, instance, raw=False, **kwargs):
+    """Scanned QR codes resolve through an id cache; drop the student's entry here and stale it in other processes"""
+    if raw:
+        return
+    student_resolver.forget(instance.pk)
+    bump_student_version()
+
+
+@receiver(pre_save, sender=Center)
+@receiver(pre_save, sender=Course)
+@receiver(pre_save, sender=Batch)
+def track_indexed_field_changes(sender, instance, raw=False, **kwargs):
+    _, fields = INDEXED_RELATED_FIELDS[sender]
+    instance._search_fields_changed = False
+    if raw or not instance.pk:
+        return
+    previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    if previous is not None:
+        instance._search_fields_changed = any(previous[field] != getattr(instance, field) for field in fields)
+
+
+@receiver(post_save, sender=Center)
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Batch)
+def reindex_related_students(sender, instance, raw=False, **kwargs):
+    """Center, course and batch names are part of the index; refresh their students when one is renamed"""
+    if raw or not getattr(instance, '_search_fields_changed', False):
+        return
+    lookup, _ = INDEXED_RELATED_FIELDS[sender]
+    index_students(Student.objects.filter(**{lookup: instance}).values_list('id', flat=True))
@@ -1,3 +1,353 @@
-from django.test import TestCase
+import datetime
+import pickle
+import shutil
+import tempfile
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import pandas as pd
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from centers.models import Center
+from courses.models import Course
+from reports.render_pool import render_to_file
+from users.models import User
+from .models import Student, EducationalQualification, Batch
+from .importers import StudentImporter
+from .qr import StudentResolver
+from .search import PostgresSearchBackend, _tokens
+
+
+class StudentQualificationQueryTests(TestCase):
+    """O/L and A/L results are prefetched once per page, not queried per student"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='admin', email='admin@example.com', role='admin')
+        cls.center = Center.objects.create(name='Colombo Center', district='Colombo')
+        cls.course = Course.objects.create(name='Web Development', code='WEB01', district='Colombo', center=cls.center)
+        cls.batch = Batch.objects.create(batch_code='01', batch_name='1st Batch')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_students(self, count):
+        for index in range(Student.objects.count(), Student.objects.count() + count):
+            student = Student.objects.create(
+                full_name_english=f'Student {index}',
+                name_with_initials=f'S. {index}',
+                gender='Male',
+                date_of_birth=datetime.date(2000, 1, 1),
+                nic_id=f'2000{index:08d}',
+                district='Colombo',
+                divisional_secretariat='Colombo',
+                grama_niladhari_division='Colombo',
+                village='Colombo',
+                mobile_no='0771234567',
+                center=self.center,
+                course=self.course,
+                batch=self.batch,
+            )
+            EducationalQualification.objects.create(student=student, subject='Maths', grade='A', year=2016, type='OL')
+            EducationalQualification.objects.create(student=student, subject='Science', grade='B', year=2016, type='OL')
+            EducationalQualification.objects.create(student=student, subject='Physics', grade='C', year=2019, type='AL')
+
+    def list_query_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/students/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_list_query_count_does_not_grow_with_students(self):
+        self.create_students(3)
+        small_count, _ = self.list_query_count()
+
+        self.create_students(20)
+        large_count, students = self.list_query_count()
+
+        self.assertEqual(len(students), 23)
+        self.assertEqual(small_count, large_count)
+        self.assertLessEqual(large_count, 2)
+
+    def test_list_splits_prefetched_results_by_type(self):
+        self.create_students(2)
+        _, students = self.list_query_count()
+
+        for student in students:
+            self.assertEqual([result['subject'] for result in student['ol_results']], ['Maths', 'Science'])
+            self.assertEqual([result['subject'] for result in student['al_results']], ['Physics'])
+
+    def test_retrieve_uses_one_query_for_results(self):
+        self.create_students(1)
+        student = Student.objects.get()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/students/{student.id}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['ol_results']), 2)
+        self.assertEqual(len(response.json()['al_results']), 1)
+        qualification_queries = [
+            query for query in queries if 'students_educationalqualification' in query['sql']
+        ]
+        self.assertEqual(len(qualification_queries), 1)
+
+
+class StudentImportTests(TestCase):
+    """Data entry users import into their own district only"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='entry', email='entry@example.com', role='data_entry', district='Colombo')
+        Batch.objects.create(batch_code='01', batch_name='1st Batch')
+
+    def row(self, index, district):
+        return {
+            'Full Name (English)': f'Student {index}',
+            'Name with Initials': f'S. {index}',
+            'NIC/ID': f'2000{index:08d}',
+            'Date of Birth': '2000-01-01',
+            'District': district,
+            'Divisional Secretariat': 'Colombo',
+            'Grama Niladhari Division': 'Colombo',
+            'Village': 'Colombo',
+            'Mobile No': '0771234567',
+        }
+
+    def test_rows_from_another_district_are_rejected(self):
+        df = pd.DataFrame([self.row(1, 'Galle'), self.row(2, ''), self.row(3, 'colombo')])
+
+        imported, errors = StudentImporter(self.user).run(df)
+
+        self.assertEqual(imported, 2)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith('Row 1: '))
+        self.assertIn('You can only add students from your assigned district (Colombo).', errors[0])
+        self.assertEqual(
+            sorted(Student.objects.values_list('nic_id', 'district')),
+            [('200000000002', 'Colombo'), ('200000000003', 'Colombo')]
+        )
+
+class StudentSearchTests(TestCase):
+    """Search goes through the students search index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='admin', email='admin@example.com', role='admin')
+        cls.center = Center.objects.create(name='Colombo Center', district='Colombo')
+        cls.course = Course.objects.create(name='Web Development', code='WEB01', district='Colombo', center=cls.center)
+        cls.batch = Batch.objects.create(batch_code='01', batch_name='1st Batch')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_student(self, index, **fields):
+        values = dict(
+            full_name_english=f'Student {index}',
+            name_with_initials=f'S. {index}',
+            gender='Male',
+            date_of_birth=datetime.date(2000, 1, 1),
+            nic_id=f'2000{index:08d}',
+            district='Colombo',
+            divisional_secretariat='Colombo',
+            grama_niladhari_division='Colombo',
+            village='Colombo',
+            mobile_no='0771234567',
+            center=self.center,
+            course=self.course,
+            batch=self.batch,
+        )
+        values.update(fields)
+        return Student.objects.create(**values)
+
+    def search(self, term):
+        response = self.client.get('/api/students/', {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [student['id'] for student in response.json()]
+
+    def test_finds_student_by_sinhala_name(self):
+        sunil = self.create_student(1, full_name_sinhala='සුනිල් පෙරේරා')
+        # Starts a word with every consonant of the name above once its vowel signs are dropped
+        self.create_student(2, full_name_sinhala='සමන් නලින් ලක්මාල් පියල් රවී')
+
+        self.assertEqual(self.search('සුනිල් පෙරේරා'), [sunil.id])
+        self.assertEqual(self.search('පෙරේ'), [sunil.id])
+
+    @skipUnless(connection.vendor == 'postgresql', 'ranks with the pg_trgm search backend')
+    def test_registration_number_prefix_ranks_first_on_postgres(self):
+        student = self.create_student(1)
+        # Matches every word of the term by name, but its registration number starts elsewhere
+        namesake = self.create_student(
+            2, full_name_english=f"{student.registration_no.replace('/', ' ')} Perera",
+            district_code='GAM', course_code='ICT', student_number=1, registration_year='2026'
+        )
+        prefix = student.registration_no.rsplit('/', 2)[0]
+
+        self.assertEqual(self.search(prefix), [student.id, namesake.id])
+
+    def test_search_is_ranked_within_the_users_district(self):
+        galle = Center.objects.create(name='Galle Center', district='Galle')
+        for index in range(10, 40):
+            self.create_student(index, full_name_english=f'Nimal Perera {index}', district='Galle', center=galle)
+        own = [
+            self.create_student(index, full_name_english=f'Nimal Perera {index}')
+            for index in range(40, 43)
+        ]
+        self.create_student(50, full_name_english='Kamal Silva')
+        manager = User.objects.create(username='manager', email='manager@example.com', role='district_manager', district='Colombo')
+        self.client.force_authenticate(manager)
+
+        self.assertCountEqual(self.search('nimal perera'), [student.id for student in own])
+
+        response = self.client.get('/api/students/stats/', {'search': 'nimal'})
+        self.assertEqual(response.json()['total_students'], 3)
+
+        response = self.client.get('/api/students/export/', {'search': 'nimal'})
+        self.assertEqual(len(b''.join(response.streaming_content).decode().strip().splitlines()), 4)
+
+        first = self.client.get('/api/students/', {'search': 'perera', 'page_size': 2}).json()
+        second = self.client.get(first['next']).json()
+        paged = [student['id'] for student in first['results'] + second['results']]
+        self.assertCountEqual(paged, [student.id for student in own])
+
+
+class PostgresSearchRankTests(SimpleTestCase):
+    """The Postgres prefix boost compares the term as typed, wildcards escaped, with the stored numbers"""
+
+    def rank_params(self, term):
+        return PostgresSearchBackend().rank_expression(_tokens(term), term).params
+
+    def test_registration_number_keeps_its_slashes(self):
+        self.assertEqual(self.rank_params(' COL/WEB/01 '), ['col/web/01%', 'col/web/01%', 'col web 01'])
+
+    def test_like_wildcards_are_escaped(self):
+        self.assertEqual(self.rank_params('20%_1\\')[0], '20\\%\\_1\\\\%')
+
+class StudentResolverTests(TestCase):
+    """Resolved QR students go stale in every process once a student is saved or deleted"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.center = Center.objects.create(name='Colombo Center', district='Colombo')
+        cls.course = Course.objects.create(name='Web Development', code='WEB01', district='Colombo', center=cls.center)
+        cls.batch = Batch.objects.create(batch_code='01', batch_name='1st Batch')
+        cls.student = Student.objects.create(
+            full_name_english='Student 1',
+            name_with_initials='S. 1',
+            gender='Male',
+            date_of_birth=datetime.date(2000, 1, 1),
+            nic_id='200000000001',
+            district='Colombo',
+            divisional_secretariat='Colombo',
+            grama_niladhari_division='Colombo',
+            village='Colombo',
+            mobile_no='0771234567',
+            center=cls.center,
+            course=cls.course,
+            batch=cls.batch,
+        )
+
+    @mock.patch('students.qr.time.monotonic')
+    def test_save_in_another_process_invalidates_resolved_student(self, monotonic):
+        monotonic.return_value = 100.0
+        # This resolver stands in for another process's; the signals never call forget() on it
+        other = StudentResolver(check_interval=2, max_age=300)
+        self.assertEqual(other.get(self.student.id)['full_name_english'], 'Student 1')
+
+        self.student.full_name_english = 'Renamed Student'
+        self.student.save()
+
+        monotonic.return_value = 101.0
+        self.assertEqual(other.get(self.student.id)['full_name_english'], 'Student 1')
+
+        monotonic.return_value = 102.5
+        with self.assertNumQueries(2):
+            self.assertEqual(other.get(self.student.id)['full_name_english'], 'Renamed Student')
+        with self.assertNumQueries(0):
+            other.get(self.student.id)
+
+        student_id = self.student.id
+        self.student.delete()
+        monotonic.return_value = 105.0
+        self.assertIsNone(other.get(student_id))
+
+    @mock.patch('students.qr.time.monotonic')
+    def test_entries_expire_without_a_version_bump(self, monotonic):
+        monotonic.return_value = 100.0
+        resolver = StudentResolver(check_interval=2, max_age=300)
+        resolver.get(self.student.id)
+
+        # Queryset updates send no signals, so only the age limit catches them
+        Student.objects.filter(id=self.student.id).update(full_name_english='Updated In Bulk')
+        monotonic.return_value = 250.0
+        self.assertEqual(resolver.get(self.student.id)['full_name_english'], 'Student 1')
+
+        monotonic.return_value = 401.0
+        self.assertEqual(resolver.get(self.student.id)['full_name_english'], 'Updated In Bulk')
+
+
+class StudentIdCardTests(TestCase):
+    """ID cards render on the report render pool, not in a pool of their own"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='admin', email='admin@example.com', role='admin')
+        cls.center = Center.objects.create(name='Colombo Center', district='Colombo')
+        cls.course = Course.objects.create(name='Web Development', code='WEB01', district='Colombo', center=cls.center)
+        cls.batch = Batch.objects.create(batch_code='01', batch_name='1st Batch')
+        cls.students = [
+            Student.objects.create(
+                full_name_english=f'Student {index}',
+                name_with_initials=f'S. {index}',
+                gender='Male',
+                date_of_birth=datetime.date(2000, 1, 1),
+                nic_id=f'2000{index:08d}',
+                district='Colombo',
+                divisional_secretariat='Colombo',
+                grama_niladhari_division='Colombo',
+                village='Colombo',
+                mobile_no='0771234567',
+                center=cls.center,
+                course=cls.course,
+                batch=cls.batch,
+            )
+            for index in range(1, 4)
+        ]
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        settings_override = override_settings(ID_CARD_QR_ROOT=root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def render_in_thread(self, name, **kwargs):
+        # What a spawned worker receives must survive pickling
+        return render_to_file(name, pickle.loads(pickle.dumps(kwargs)))
+
+    def test_bulk_id_cards_render_on_the_render_pool(self):
+        with mock.patch('reports.render_pool.render_pool.render', side_effect=self.render_in_thread) as render:
+            response = self.client.post(
+                '/api/students/bulk_id_cards/', {'student_ids': [student.id for student in self.students]}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(render.call_args.args, ('student_id_cards_pdf',))
+        self.assertEqual(len(render.call_args.kwargs['cards']), 3)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertIn('student_id_cards_', response['Content-Disposition'])
+
+    def test_single_id_card_keeps_its_file_name(self):
+        student = self.students[0]
+        with mock.patch('reports.render_pool.render_pool.render', side_effect=self.render_in_thread):
+            response = self.client.get(f'/api/students/{student.id}/id_card/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'filename="student_id_card_{student.registration_no.replace("/", "_")}.pdf"', response['Content-Disposition'])
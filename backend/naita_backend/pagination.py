@@ -0,0 +1,55 @@
+# naita_backend/pagination.py
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination used as the project default.
+
+    Pages are fetched with WHERE <key> < <last seen> on an indexed ordering
+    key, so deep pages cost the same as the first. Views choose the key with
+    `pagination_ordering` (default '-id') or `get_pagination_ordering(queryset)`.
+
+    Requests that send neither `cursor` nor `page_size` get the full,
+    unpaginated list as before; this keeps existing clients working while
+    they move to cursors. The total row count is only computed when the
+    client asks for it with `?count=true`.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-id',)
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.count = None
+        if params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        if hasattr(view, 'get_pagination_ordering'):
+            return tuple(view.get_pagination_ordering(queryset))
+        if getattr(view, 'pagination_ordering', None):
+            return tuple(view.pagination_ordering)
+        return super().get_ordering(request, queryset, view)
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        return response_schema
@@ -56,6 +56,8 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
 ]
+# Lets the frontend read a stored report's id and version from the download response
+CORS_EXPOSE_HEADERS = ['Content-Disposition', 'ETag', 'X-Report-Id']
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', 'localhost:5173']
 
@@ -68,6 +70,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Cursor pagination; unpaginated when a request sends neither ?cursor nor ?page_size
+    'DEFAULT_PAGINATION_CLASS': 'naita_backend.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
 SIMPLE_JWT = {
@@ -142,3 +147,13 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'users.User'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Unsigned JSON ID card QR codes from before signed codes are accepted through this date (a datetime.date)
+# while old cards are reprinted; None rejects them
+STUDENT_QR_ACCEPT_LEGACY_UNTIL = None
@@ -6,6 +6,7 @@ from graduated_students.models import GraduatedStudent
 from courses.models import Course
 from centers.models import Center
 from students.models import Student
+from students.photos import photo_url as student_photo_url
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -52,7 +53,7 @@ def public_graduates_performance(request):
 
     success_stories = []
     for gs in success_stories_qs:
-        photo_url = gs.student.profile_photo.url if gs.student.profile_photo else None
+        photo_url = student_photo_url(gs.student, 'card')
         # Ensure absolute URL if needed, or let frontend handle it if strictly relative
         # Ideally, request.build_absolute_uri(photo_url)
         
@@ -813,29 +813,23 @@ class InstructorListView(generics.ListAPIView):
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         
-        # Get stats
-        total = queryset.count()
-        active = queryset.filter(is_active=True).count()
-        inactive = queryset.filter(is_active=False).count()
+        # Stats over every matching instructor, not just the page, in one query
+        stats = queryset.order_by().aggregate(
+            count=models.Count('id'),
+            active=models.Count('id', filter=models.Q(is_active=True))
+        )
+        stats['inactive'] = stats['count'] - stats['active']
         
-        # Paginate
+        # Paginate; the counts sit beside next/previous/results rather than inside results
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response({
-                'count': total,
-                'active': active,
-                'inactive': inactive,
-                'results': serializer.data
-            })
+            response = self.get_paginated_response(serializer.data)
+            response.data = {**stats, **response.data}
+            return response
         
         serializer = self.get_serializer(queryset, many=True)
-        return Response({
-            'count': total,
-            'active': active,
-            'inactive': inactive,
-            'results': serializer.data
-        })
+        return Response({**stats, 'results': serializer.data})
 
 # GET INSTRUCTOR STATS
 @api_view(["GET"])
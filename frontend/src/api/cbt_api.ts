@@ -1299,13 +1299,50 @@ export interface AttendanceReportType {
   status: 'processing' | 'completed' | 'failed';
 }
 
-// Generate attendance report - FIXED SIMPLIFIED VERSION
-export const generateAttendanceReport = async (reportData: ReportRequest): Promise<ReportResponse> => {
-  const res = await api.post("/api/attendance/reports/generate/", reportData, {
+export interface AttendanceReportStatusType {
+  success: boolean;
+  report_id: number;
+  status: 'pending' | 'ready' | 'expired';
+  file_name: string;
+}
+
+const ATTENDANCE_REPORT_POLL_INTERVAL_MS = 1500;
+
+const postAttendanceReport = (reportData: ReportRequest) =>
+  api.post("/api/attendance/reports/generate/", reportData, {
     responseType: 'blob',
     timeout: 60000
   });
 
+// Wait for a report another request is rendering, then fetch it; a failed or lost render is requested again
+const awaitAttendanceReport = async (reportId: number, reportData: ReportRequest) => {
+  let state: string;
+  try {
+    do {
+      await new Promise((resolve) => setTimeout(resolve, ATTENDANCE_REPORT_POLL_INTERVAL_MS));
+      state = (await getReportStatus(reportId)).status;
+    } while (state === 'pending');
+  } catch (error) {
+    if (!axios.isAxiosError(error) || error.response?.status !== 404) {
+      throw error;
+    }
+    state = 'missing';
+  }
+  if (state === 'ready') {
+    return api.get(`/api/attendance/reports/${reportId}/download/`, { responseType: 'blob' });
+  }
+  return postAttendanceReport(reportData);
+};
+
+// Generate attendance report - FIXED SIMPLIFIED VERSION
+export const generateAttendanceReport = async (reportData: ReportRequest): Promise<ReportResponse> => {
+  let res = await postAttendanceReport(reportData);
+  // 202: the same report is being rendered by another request
+  while (res.status === 202) {
+    const accepted: AttendanceReportStatusType = JSON.parse(await res.data.text());
+    res = await awaitAttendanceReport(accepted.report_id, reportData);
+  }
+
   // Extract filename from headers
   const contentDisposition = res.headers['content-disposition'];
   let fileName = `attendance_report_${Date.now()}.${reportData.format}`;
@@ -1368,7 +1405,7 @@ export const downloadAttendanceReport = async (reportId: number): Promise<Blob>
 };
 
 // Get report status
-export const getReportStatus = async (reportId: number): Promise<AttendanceReportType> => {
+export const getReportStatus = async (reportId: number): Promise<AttendanceReportStatusType> => {
   const res = await api.get(`/api/attendance/reports/${reportId}/status/`);
   return res.data;
 };
@@ -1461,6 +1498,50 @@ export const fetchTrainingOfficerReports = async (period?: string): Promise<Trai
   return res.data;
 };
 
+/* ========== REPORT EXPORT JOBS ========== */
+export interface ReportJobType {
+  id: number;
+  scope: 'head_office' | 'district' | 'training';
+  report_type: string;
+  period: string;
+  format: 'pdf' | 'excel';
+  start_date: string | null;
+  end_date: string | null;
+  district: string | null;
+  file_name: string | null;
+  status: 'processing' | 'completed' | 'failed';
+  error: string;
+  created_at: string;
+  started_at: string | null;
+  completed_at: string | null;
+}
+
+const REPORT_POLL_INTERVAL_MS = 1500;
+
+export const fetchReportJob = async (id: number): Promise<ReportJobType> => {
+  const res = await api.get(`/api/reports/jobs/${id}/`);
+  return res.data;
+};
+
+export const downloadReportJob = async (id: number): Promise<Blob> => {
+  const res = await api.get(`/api/reports/jobs/${id}/download/`, { responseType: 'blob' });
+  return res.data;
+};
+
+// Submit an export, wait for the background job to finish and fetch its file
+const runReportJob = async (url: string, params: Record<string, unknown>): Promise<Blob> => {
+  const submitted = await api.post(url, params);
+  let job: ReportJobType = submitted.data;
+  while (job.status === 'processing') {
+    await new Promise((resolve) => setTimeout(resolve, REPORT_POLL_INTERVAL_MS));
+    job = await fetchReportJob(job.id);
+  }
+  if (job.status === 'failed') {
+    throw new Error(job.error || 'Report generation failed');
+  }
+  return downloadReportJob(job.id);
+};
+
 export const exportTrainingReport = async (
   format: 'pdf' | 'excel',
   period: 'weekly' | 'monthly' | 'quarterly' | 'custom' | string,
@@ -1472,11 +1553,7 @@ export const exportTrainingReport = async (
     report_type: reportType
   };
 
-  const res = await api.get("/api/reports/export-training-report/", {
-    params,
-    responseType: 'blob'
-  });
-  return res.data;
+  return runReportJob("/api/reports/export-training-report/", params);
 };
 
 /* ========== HEAD OFFICE REPORTS API ========== */
@@ -1551,11 +1628,7 @@ export const exportHeadOfficeReport = async (
     ...options
   };
 
-  const res = await api.get("/api/reports/export-head-office/", {
-    params,
-    responseType: 'blob'
-  });
-  return res.data;
+  return runReportJob("/api/reports/export-head-office/", params);
 };
 
 
@@ -1621,11 +1694,7 @@ export const exportDistrictReport = async (
     ...options
   };
 
-  const res = await api.get("/api/reports/export-district/", {
-    params,
-    responseType: 'blob'
-  });
-  return res.data;
+  return runReportJob("/api/reports/export-district/", params);
 };
 
 // Permission check
@@ -178,7 +178,8 @@ const QRScanner: React.FC<QRScannerProps> = ({ onScanComplete, onClose, courseId
 
       setScannedData(result);
       setStatus('success');
-      setMessage(`Attendance marked for ${studentData.full_name_english}`);
+      // The server queues scans and writes them within a second
+      setMessage(`Attendance queued for ${studentData.full_name_english}`);
 
       // Auto-close after 2 seconds on success
       setTimeout(() => {